@@ -1,36 +1,75 @@
 import re
 import os
+import mmap
+import json
+import hashlib
 import copy
 import sys
+import io
+import time
+import contextlib
+import tracemalloc
+import heapq
+import queue
+import threading
+import random
+import bisect
+import itertools
+from array import array
+from collections import deque
 
 # Configurações
 MAX_PREFERENCES = 3  # limite máximo de preferências por aluno conforme enunciado
+LIMITE_PREFERENCES = 50  # maior MAX_PREFERENCES aceito (--max-preferencias, cenários)
 GANHO_THRESHOLD = 3  # considera 'Ganho' se aluno obteve uma das top N opções
 
-try:
-    import matplotlib.pyplot as plt
-    import networkx as nx
-    import pandas as pd
-    import numpy as np
-    import imageio.v2 as imageio
-except ModuleNotFoundError as e:
-    print(f"ERRO: Módulo não encontrado: {e.name}")
-    print("Instale as dependências executando (PowerShell):")
-    print("  python -m pip install -r requirements.txt")
-    sys.exit(1)
+# Bibliotecas pesadas são importadas só no primeiro uso (por exemplo, uma execução só de
+# emparelhamento nunca carrega matplotlib/pandas). No primeiro acesso o nome global passa
+# a apontar para o próprio módulo, então os usos seguintes não pagam nada a mais.
+class _ModuloSobDemanda:
+    def __init__(self, nome_global, modulo):
+        self._nome_global = nome_global
+        self._modulo = modulo
+
+    def __getattr__(self, atributo):
+        import importlib
+        try:
+            modulo = importlib.import_module(self._modulo)
+        except ModuleNotFoundError as e:
+            print(f"ERRO: Módulo não encontrado: {e.name}")
+            print("Instale as dependências executando (PowerShell):")
+            print("  python -m pip install -r requirements.txt")
+            sys.exit(1)
+        globals()[self._nome_global] = modulo
+        return getattr(modulo, atributo)
+
+plt = _ModuloSobDemanda('plt', 'matplotlib.pyplot')
+pd = _ModuloSobDemanda('pd', 'pandas')
+np = _ModuloSobDemanda('np', 'numpy')
+imageio = _ModuloSobDemanda('imageio', 'imageio.v2')
 
 # --- Estruturas de Dados ---
 class Projeto:
+    __slots__ = ('codigo', 'vagas', 'nota_minima', 'alunos_alocados', 'candidatos', 'ranking')
+
     def __init__(self, codigo, vagas, nota_minima):
         self.codigo = codigo
         self.vagas = int(vagas)
         self.nota_minima = int(nota_minima)
         self.alunos_alocados = [] # Lista de objetos Aluno
+        # Alunos elegíveis (projeto nas preferências filtradas), por nota decrescente;
+        # preenchido por filtrar_preferencias
+        self.candidatos = []
+        # Ranking próprio do projeto (códigos de alunos, melhor primeiro); vazio = por nota
+        self.ranking = []
 
     def __repr__(self):
         return f"[{self.codigo}: Vagas={self.vagas}, Min={self.nota_minima}]"
 
 class Aluno:
+    __slots__ = ('codigo', 'preferencias', 'preferencias_originais', 'preferencias_filtradas',
+                 'nota', 'projeto_alocado')
+
     def __init__(self, codigo, preferencias_raw, nota):
         self.codigo = codigo
         # Limpa espaços e cria lista
@@ -52,7 +91,96 @@ class Aluno:
         return f"[{self.codigo}: Nota={self.nota}]"
 
 # --- Funções de Leitura e Processamento ---
-def carregar_dados(caminho_arquivo):
+# Registros do formato de entrada (ver FORMATO_ENTRADA.txt), um por linha:
+#   (P1, 2, 5)               -> projeto, vagas, nota mínima
+#   (A1):(P1, P30, P50) (5)  -> aluno, preferências, nota
+#   (P1):(A7, A2, A9)        -> ranking próprio do projeto (opcional, melhor primeiro)
+_RE_PROJETO = re.compile(r'\(\s*(P\w*)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)\s*(?://.*)?')
+_RE_ALUNO = re.compile(r'\(\s*(A\w*)\s*\)\s*:\s*\(([^()]*)\)\s*\(\s*(\d+)\s*\)\s*(?://.*)?')
+_RE_RANKING = re.compile(r'\(\s*(P\w*)\s*\)\s*:\s*\(([^()]*)\)\s*(?://.*)?')
+
+class ErroFormatoEntrada(ValueError):
+    def __init__(self, caminho, num_linha, linha):
+        super().__init__(f"{caminho}:{num_linha}: registro malformado: {linha!r}")
+        self.caminho = caminho
+        self.num_linha = num_linha
+        self.linha = linha
+
+def _linhas_arquivo(caminho_arquivo, usar_mmap=False):
+    if not usar_mmap:
+        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
+            yield from f
+        return
+    # mmap: o SO pagina o arquivo sob demanda, sem copiá-lo inteiro para um buffer
+    with open(caminho_arquivo, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for linha in iter(mm.readline, b''):
+                yield linha.decode('utf-8')
+
+def ler_registros(caminho_arquivo, usar_mmap=False, estrito=False):
+    # Leitura em streaming, linha a linha e em uma única passada. Gera tuplas
+    # ('P', num_linha, codigo, vagas, nota_minima), ('A', num_linha, codigo, prefs_str, nota)
+    # e ('R', num_linha, codigo_projeto, alunos_str) para os rankings próprios.
+    # Linhas em branco e comentários (//) são ignorados; qualquer outra linha que não
+    # seja um registro válido é reportada com o número da linha (ou levanta
+    # ErroFormatoEntrada se estrito=True).
+    for num_linha, linha in enumerate(_linhas_arquivo(caminho_arquivo, usar_mmap), 1):
+        linha = linha.strip()
+        if num_linha == 1:
+            linha = linha.lstrip('\ufeff')
+        if not linha or linha.startswith('//'):
+            continue
+
+        # Alunos são a imensa maioria das linhas: testa o formato de aluno primeiro
+        m = _RE_ALUNO.fullmatch(linha)
+        if m:
+            a_code, prefs_str, nota = m.groups()
+            yield 'A', num_linha, a_code, prefs_str, int(nota)
+            continue
+        m = _RE_PROJETO.fullmatch(linha)
+        if m:
+            p_code, vagas, nota_min = m.groups()
+            yield 'P', num_linha, p_code, int(vagas), int(nota_min)
+            continue
+        m = _RE_RANKING.fullmatch(linha)
+        if m:
+            p_code, alunos_str = m.groups()
+            yield 'R', num_linha, p_code, alunos_str
+            continue
+
+        if estrito:
+            raise ErroFormatoEntrada(caminho_arquivo, num_linha, linha)
+        print(f"Aviso: {caminho_arquivo}:{num_linha}: registro malformado ignorado: {linha!r}")
+
+def _codigos_lista(lista_str):
+    return [codigo for codigo in ''.join(lista_str.split()).split(',') if codigo]
+
+def carregar_dados(caminho_arquivo, usar_mmap=False, estrito=False):
+    projetos = {}
+    alunos = {}
+    rankings = {}
+    for registro in ler_registros(caminho_arquivo, usar_mmap, estrito):
+        if registro[0] == 'P':
+            _, _, p_code, vagas, nota_min = registro
+            projetos[p_code] = Projeto(p_code, vagas, nota_min)
+        elif registro[0] == 'R':
+            _, _, p_code, alunos_str = registro
+            rankings[p_code] = _codigos_lista(alunos_str)
+        else:
+            _, _, a_code, prefs_str, nota = registro
+            alunos[a_code] = Aluno(a_code, prefs_str, nota)
+    # Rankings podem vir antes da definição do projeto; os de projetos inexistentes são ignorados
+    for p_code, ranking in rankings.items():
+        if p_code in projetos:
+            projetos[p_code].ranking = ranking
+    return projetos, alunos
+
+# Leitor original (arquivo inteiro em memória + re.findall), mantido para comparação
+# em scripts/benchmark_carregamento.py. Ignora silenciosamente linhas que não casam,
+# inclusive notas com dois dígitos.
+def carregar_dados_legado(caminho_arquivo):
     projetos = {}
     alunos = {}
 
@@ -84,10 +212,1903 @@ def filtrar_preferencias(projetos, alunos):
         # Salva preferências filtradas separadamente antes que a execução de Gale-Shapley as modifique
         aluno.preferencias_filtradas = list(validas)
         aluno.preferencias = list(validas)
+    # Índice reverso projeto -> candidatos: alunos percorridos uma vez por nota decrescente
+    # (sort estável: empates ficam na ordem de leitura), sem varrer todos os alunos por projeto
+    for proj in projetos.values():
+        proj.candidatos = []
+    for aluno in sorted(alunos.values(), key=lambda a: a.nota, reverse=True):
+        for p_code in dict.fromkeys(aluno.preferencias_filtradas):
+            projetos[p_code].candidatos.append(aluno)
     print(f"Filtragem: {remocoes} preferências removidas por requisitos não atendidos.")
 
+# --- Representação Compacta (índices inteiros + arrays) ---
+class InstanciaCompacta:
+    # Instância construída uma única vez após carregar/filtrar: códigos mapeados para ids
+    # inteiros densos (posição na ordem de leitura) e todos os dados em arrays tipados
+    # contíguos. As preferências ficam em formato CSR: as do aluno `a` são
+    # pref_projeto[pref_inicio[a]:pref_inicio[a + 1]]. O campo `orig_*` guarda a lista
+    # original (após truncamento, -1 = projeto inexistente) e `pref_posicao` a posição de
+    # cada preferência filtrada na lista original, usada no 'Rank Escolha'. O índice
+    # reverso `cand_*` (ver indexar_candidatos) é o ranking de cada projeto, também em CSR,
+    # montado sob demanda (None até o primeiro uso).
+    # Rankings próprios dos projetos (registros (P1):(A7, A2, ...)) ficam em `orig_rank`,
+    # alinhado a orig_projeto: a posição do aluno na lista do projeto que ele escolheu, -1
+    # se o projeto não o listou. É a matriz de rankings esparsa (só os pares que existem),
+    # None quando a entrada não traz rankings e os projetos ordenam só por nota.
+    __slots__ = ('codigos_projetos', 'indice_projetos', 'vagas', 'nota_minima',
+                 'codigos_alunos', '_indice_alunos', 'nota',
+                 'orig_inicio', 'orig_projeto', 'orig_rank', 'pref_inicio', 'pref_projeto', 'pref_posicao',
+                 'cand_inicio', 'cand_aluno', 'pref_rank')
+
+    def __init__(self, codigos_projetos, vagas, nota_minima, codigos_alunos, nota,
+                 orig_inicio, orig_projeto, pref_inicio=None, pref_projeto=None, pref_posicao=None,
+                 indice_projetos=None, indice_alunos=None,
+                 cand_inicio=None, cand_aluno=None, pref_rank=None, orig_rank=None):
+        self.codigos_projetos = codigos_projetos
+        if indice_projetos is None:
+            indice_projetos = {p_code: i for i, p_code in enumerate(codigos_projetos)}
+        self.indice_projetos = indice_projetos
+        self.vagas = vagas
+        self.nota_minima = nota_minima
+        self.codigos_alunos = codigos_alunos
+        self._indice_alunos = indice_alunos
+        self.nota = nota
+        self.orig_inicio = orig_inicio
+        self.orig_projeto = orig_projeto
+        self.orig_rank = orig_rank
+        self.pref_inicio = pref_inicio
+        self.pref_projeto = pref_projeto
+        self.pref_posicao = pref_posicao
+        self.cand_inicio = cand_inicio
+        self.cand_aluno = cand_aluno
+        self.pref_rank = pref_rank
+
+    @property
+    def n_alunos(self):
+        return len(self.codigos_alunos)
+
+    @property
+    def n_projetos(self):
+        return len(self.codigos_projetos)
+
+    @property
+    def ranking_explicito(self):
+        # Projetos com ranking próprio: os motores comparam alunos por pref_rank, não pela nota
+        return self.orig_rank is not None
+
+    @property
+    def indice_alunos(self):
+        # Construído só quando alguém precisa buscar aluno por código
+        if self._indice_alunos is None:
+            self._indice_alunos = {a_code: i for i, a_code in enumerate(self.codigos_alunos)}
+        return self._indice_alunos
+
+    def preferencias(self, a):
+        return self.pref_projeto[self.pref_inicio[a]:self.pref_inicio[a + 1]]
+
+    def preferencias_originais(self, a):
+        return self.orig_projeto[self.orig_inicio[a]:self.orig_inicio[a + 1]]
+
+    def candidatos(self, p):
+        if self.cand_inicio is None:
+            indexar_candidatos(self)
+        return self.cand_aluno[self.cand_inicio[p]:self.cand_inicio[p + 1]]
+
+    def rank_no_projeto(self, a, p):
+        # Posição (0 = melhor) do aluno `a` no ranking do projeto `p`, ou -1 se não for
+        # candidato; olha só as preferências filtradas do próprio aluno
+        if self.pref_rank is None:
+            indexar_candidatos(self)
+        pref_projeto = self.pref_projeto
+        for j in range(self.pref_inicio[a], self.pref_inicio[a + 1]):
+            if pref_projeto[j] == p:
+                return self.pref_rank[j]
+        return -1
+
+    def visao_numpy(self, campo):
+        # Visão NumPy sem cópia sobre o buffer do array (para os estágios vetorizados)
+        import numpy as np
+        return np.frombuffer(getattr(self, campo), dtype=np.intc)
+
+def construir_instancia(projetos, alunos):
+    codigos_projetos = list(projetos)
+    indice = {p_code: i for i, p_code in enumerate(codigos_projetos)}
+    vagas = array('i', (p.vagas for p in projetos.values()))
+    nota_minima = array('i', (p.nota_minima for p in projetos.values()))
+
+    codigos_alunos = list(alunos)
+    nota = array('i', (a.nota for a in alunos.values()))
+    orig_inicio, orig_projeto = array('i', [0]), array('i')
+    pref_inicio, pref_projeto, pref_posicao = array('i', [0]), array('i'), array('i')
+    for aluno in alunos.values():
+        posicao = {}
+        for j, p_code in enumerate(aluno.preferencias_originais):
+            orig_projeto.append(indice.get(p_code, -1))
+            posicao.setdefault(p_code, j)
+        orig_inicio.append(len(orig_projeto))
+        for p_code in aluno.preferencias_filtradas:
+            pref_projeto.append(indice[p_code])
+            pref_posicao.append(posicao.get(p_code, -1))
+        pref_inicio.append(len(pref_projeto))
+
+    orig_rank = None
+    if any(p.ranking for p in projetos.values()):
+        indice_alunos = {a_code: i for i, a_code in enumerate(codigos_alunos)}
+        orig_rank = _matriz_rankings(orig_inicio, orig_projeto, len(codigos_projetos),
+                                     ((p.codigo, p.ranking) for p in projetos.values()), indice, indice_alunos)
+    return InstanciaCompacta(codigos_projetos, vagas, nota_minima, codigos_alunos, nota,
+                             orig_inicio, orig_projeto, pref_inicio, pref_projeto, pref_posicao,
+                             orig_rank=orig_rank)
+
+def _matriz_rankings(orig_inicio, orig_projeto, n_projetos, rankings, indice_projetos, indice_alunos):
+    # orig_rank a partir dos rankings próprios (pares (código do projeto, códigos dos
+    # alunos)): as entradas (aluno, projeto) -> posição viram chaves ordenadas e cada
+    # preferência da lista original é procurada nelas por busca binária vetorizada. Aluno
+    # repetido numa lista vale pela primeira posição; códigos desconhecidos são ignorados.
+    # None se nenhum ranking se refere a um projeto e aluno existentes.
+    n = max(n_projetos, 1)
+    alunos, projetos, posicoes = array('i'), array('i'), array('i')
+    for p_code, ranking in rankings:
+        p = indice_projetos.get(p_code)
+        if p is None:
+            continue
+        # Uma chamada de C por lista (map/extend), não uma iteração Python por aluno
+        alunos.extend(map(indice_alunos.get, ranking, itertools.repeat(-1, len(ranking))))
+        projetos.extend(array('i', [p]) * len(ranking))
+        posicoes.extend(range(len(ranking)))
+    aluno = np.frombuffer(alunos, dtype=np.intc).astype(np.int64)
+    existe = aluno >= 0
+    if not existe.any():
+        return None
+    chaves, primeira = np.unique((aluno * n + np.frombuffer(projetos, dtype=np.intc))[existe], return_index=True)
+    posicoes = np.frombuffer(posicoes, dtype=np.intc)[existe][primeira]
+    inicio = np.frombuffer(orig_inicio, dtype=np.intc)
+    projeto = np.frombuffer(orig_projeto, dtype=np.intc).astype(np.int64)
+    procura = np.repeat(np.arange(len(inicio) - 1, dtype=np.int64), np.diff(inicio)) * n + projeto
+    k = np.minimum(np.searchsorted(chaves, procura), len(chaves) - 1)
+    return _array_intc(np.where((projeto >= 0) & (chaves[k] == procura), posicoes[k], -1))
+
+def carregar_instancia(caminho_arquivo, usar_mmap=False, estrito=False):
+    # Leitura em streaming direto para a InstanciaCompacta, sem criar objetos
+    # Projeto/Aluno nem listas intermediárias de registros. Preferências ainda não
+    # filtradas: chame filtrar_instancia em seguida.
+    codigos_projetos, indice_projetos = [], {}
+    vagas, nota_minima = array('i'), array('i')
+    # Projetos referenciados antes de serem definidos recebem ids provisórios (<= -2),
+    # resolvidos no final (-1 se nunca forem definidos)
+    pendentes = {}
+
+    codigos_alunos, indice_alunos = [], {}
+    linha_do_aluno = array('i')  # aluno -> linha (registro) com seus dados
+    nota = array('i')
+    orig_inicio, orig_projeto = array('i', [0]), array('i')
+    rankings = {}  # projeto -> códigos dos alunos (vale a última definição)
+
+    for registro in ler_registros(caminho_arquivo, usar_mmap, estrito):
+        if registro[0] == 'R':
+            rankings[registro[2]] = _codigos_lista(registro[3])
+            continue
+        if registro[0] == 'P':
+            _, _, p_code, v, n_min = registro
+            p = indice_projetos.get(p_code)
+            if p is None:
+                indice_projetos[p_code] = len(codigos_projetos)
+                codigos_projetos.append(p_code)
+                vagas.append(v)
+                nota_minima.append(n_min)
+            else:
+                # Redefinição: mantém a posição e atualiza os valores (como no dicionário original)
+                vagas[p], nota_minima[p] = v, n_min
+            continue
+
+        _, _, a_code, prefs_str, n = registro
+        prefs = _codigos_lista(prefs_str)
+        if len(prefs) > MAX_PREFERENCES:
+            print(f"Aviso: Aluno {a_code} indicou {len(prefs)} preferências; truncando para {MAX_PREFERENCES}.")
+            del prefs[MAX_PREFERENCES:]
+        for p_code in prefs:
+            p = indice_projetos.get(p_code)
+            if p is None:
+                p = pendentes.setdefault(p_code, -2 - len(pendentes))
+            orig_projeto.append(p)
+        orig_inicio.append(len(orig_projeto))
+        nota.append(n)
+
+        a = indice_alunos.get(a_code)
+        if a is None:
+            indice_alunos[a_code] = len(codigos_alunos)
+            codigos_alunos.append(a_code)
+            linha_do_aluno.append(len(nota) - 1)
+        else:
+            # Aluno repetido: vale a última definição, na posição da primeira
+            linha_do_aluno[a] = len(nota) - 1
+
+    if pendentes:
+        resolvido = {tmp: indice_projetos.get(p_code, -1) for p_code, tmp in pendentes.items()}
+        for j, p in enumerate(orig_projeto):
+            if p <= -2:
+                orig_projeto[j] = resolvido[p]
+
+    if len(nota) != len(codigos_alunos):
+        # Houve alunos repetidos: descarta as definições antigas
+        nota_final, inicio_final, projeto_final = array('i'), array('i', [0]), array('i')
+        for linha in linha_do_aluno:
+            nota_final.append(nota[linha])
+            projeto_final.extend(orig_projeto[orig_inicio[linha]:orig_inicio[linha + 1]])
+            inicio_final.append(len(projeto_final))
+        nota, orig_inicio, orig_projeto = nota_final, inicio_final, projeto_final
+
+    orig_rank = None
+    if rankings:
+        orig_rank = _matriz_rankings(orig_inicio, orig_projeto, len(codigos_projetos), rankings.items(),
+                                     indice_projetos, indice_alunos)
+    return InstanciaCompacta(codigos_projetos, vagas, nota_minima, codigos_alunos, nota,
+                             orig_inicio, orig_projeto,
+                             indice_projetos=indice_projetos, indice_alunos=indice_alunos,
+                             orig_rank=orig_rank)
+
+# Motivo de remoção de cada preferência da lista original (0 = elegível)
+REMOCAO_PROJETO_INEXISTENTE, REMOCAO_NOTA_MINIMA = 1, 2
+
+def elegibilidade(inst):
+    # Máscara de elegibilidade sobre a lista original (CSR orig_*) em uma passada colunar:
+    # a nota de cada aluno repetida para as suas preferências contra um único gather de
+    # nota_minima (projeto inexistente, -1, cai numa sentinela maior que qualquer nota).
+    # Devolve (elegivel, motivo): motivo é REMOCAO_* por preferência, 0 se elegível.
+    orig_inicio = inst.visao_numpy('orig_inicio')
+    orig_projeto = inst.visao_numpy('orig_projeto')
+    nota_pref = np.repeat(inst.visao_numpy('nota'), np.diff(orig_inicio))
+    minima = np.append(inst.visao_numpy('nota_minima'), np.iinfo(np.intc).max)[orig_projeto]
+    elegivel = nota_pref >= minima
+    # 0 se elegível, senão 1 (inexistente) ou 2 (nota): aritmética em int8, sem where
+    motivo = (~elegivel).view(np.int8) * (1 + (orig_projeto >= 0).view(np.int8))
+    return elegivel, motivo
+
+def remocoes_por_projeto(inst, motivo=None):
+    # Preferências removidas por nota abaixo do mínimo, por projeto (subproduto da máscara)
+    if motivo is None:
+        _, motivo = elegibilidade(inst)
+    orig_projeto = inst.visao_numpy('orig_projeto')
+    return np.bincount(orig_projeto[motivo == REMOCAO_NOTA_MINIMA], minlength=inst.n_projetos)
+
+def _filtrar_instancia_numpy(inst):
+    elegivel, motivo = elegibilidade(inst)
+    orig_inicio = inst.visao_numpy('orig_inicio')
+    # Início de cada aluno na lista filtrada = elegíveis antes do seu início na original
+    acumulado = np.zeros(len(elegivel) + 1, dtype=np.intc)
+    np.cumsum(elegivel, dtype=np.intc, out=acumulado[1:])
+    pref_inicio = acumulado[orig_inicio]
+    posicao = np.arange(len(elegivel), dtype=np.intc) - np.repeat(orig_inicio[:-1], np.diff(orig_inicio))
+    pref_posicao = posicao[elegivel]
+    pref_projeto = inst.visao_numpy('orig_projeto')[elegivel]
+    por_motivo = np.bincount(motivo.view(np.uint8), minlength=3)
+    return (array('i', pref_inicio.tobytes()), array('i', pref_projeto.tobytes()),
+            array('i', pref_posicao.astype(np.intc).tobytes()),
+            int(por_motivo[REMOCAO_PROJETO_INEXISTENTE]), int(por_motivo[REMOCAO_NOTA_MINIMA]))
+
+def _filtrar_instancia_python(inst):
+    inexistente = abaixo = 0
+    pref_inicio, pref_projeto, pref_posicao = array('i', [0]), array('i'), array('i')
+    orig_inicio, orig_projeto, nota, nota_minima = inst.orig_inicio, inst.orig_projeto, inst.nota, inst.nota_minima
+    for a in range(inst.n_alunos):
+        nota_a = nota[a]
+        base = orig_inicio[a]
+        for j in range(base, orig_inicio[a + 1]):
+            p = orig_projeto[j]
+            if p < 0:
+                inexistente += 1
+            elif nota_a < nota_minima[p]:
+                abaixo += 1
+            else:
+                pref_projeto.append(p)
+                pref_posicao.append(j - base)
+        pref_inicio.append(len(pref_projeto))
+    return pref_inicio, pref_projeto, pref_posicao, inexistente, abaixo
+
+def filtrar_instancia(inst, usar_numpy=None):
+    # Mesma regra de filtrar_preferencias, sobre a lista original da instância compacta:
+    # vetorizada com NumPy quando disponível (ou usar_numpy=True), laço em Python caso contrário
+    if usar_numpy is None:
+        usar_numpy = _numpy_disponivel()
+    filtro = _filtrar_instancia_numpy if usar_numpy else _filtrar_instancia_python
+    inst.pref_inicio, inst.pref_projeto, inst.pref_posicao, inexistente, abaixo = filtro(inst)
+    inst.cand_inicio = inst.cand_aluno = inst.pref_rank = None  # índice reverso sob demanda
+    remocoes = inexistente + abaixo
+    print(f"Filtragem: {remocoes} preferências removidas por requisitos não atendidos "
+          f"({inexistente} projeto inexistente, {abaixo} nota abaixo do mínimo).")
+    return remocoes
+
+def indexar_candidatos(inst):
+    # Índice reverso projeto -> candidatos (alunos com o projeto nas preferências
+    # filtradas), ordenados uma única vez por nota decrescente, empates na ordem de
+    # leitura: cand_aluno[cand_inicio[p]:cand_inicio[p + 1]]. pref_rank[j] é a posição do
+    # aluno no ranking do projeto pref_projeto[j], então 'Rank no Projeto' sai em O(1).
+    # Com rankings próprios (orig_rank) os alunos listados pelo projeto vêm primeiro, na
+    # ordem da lista, e os demais candidatos depois, por nota: pref_rank vira a linha da
+    # matriz de rankings de cada aluno e "p prefere a a b" é comparar dois inteiros.
+    n_alunos, n_projetos = inst.n_alunos, inst.n_projetos
+    pref_inicio = inst.visao_numpy('pref_inicio')
+    pref_projeto = inst.visao_numpy('pref_projeto').astype(np.int64)
+    nota = inst.visao_numpy('nota')
+    aluno_de = np.repeat(np.arange(n_alunos, dtype=np.int64), np.diff(pref_inicio))
+    # Um par (aluno, projeto) por candidato, mesmo que o aluno repita o projeto na lista
+    pares, inverso = np.unique(aluno_de * n_projetos + pref_projeto, return_inverse=True)
+    inverso = inverso.reshape(-1)
+    aluno_par, projeto_par = pares // max(n_projetos, 1), pares % max(n_projetos, 1)
+    if inst.ranking_explicito:
+        j_orig = inst.visao_numpy('orig_inicio')[aluno_de] + inst.visao_numpy('pref_posicao')
+        explicito = inst.visao_numpy('orig_rank')[j_orig].astype(np.int64)
+        listado = np.full(len(pares), np.iinfo(np.int64).max, dtype=np.int64)
+        listado[inverso] = np.where(explicito >= 0, explicito, np.iinfo(np.int64).max)
+        ordem = np.lexsort((aluno_par, -nota[aluno_par], listado, projeto_par))
+    else:
+        ordem = np.lexsort((aluno_par, -nota[aluno_par], projeto_par))
+    contagem = np.bincount(projeto_par, minlength=n_projetos)
+    cand_inicio = np.zeros(n_projetos + 1, dtype=np.int64)
+    np.cumsum(contagem, out=cand_inicio[1:])
+    rank_par = np.empty(len(pares), dtype=np.int64)
+    rank_par[ordem] = np.arange(len(pares)) - cand_inicio[projeto_par[ordem]]
+
+    inst.cand_inicio = array('i', cand_inicio.astype(np.intc).tobytes())
+    inst.cand_aluno = array('i', aluno_par[ordem].astype(np.intc).tobytes())
+    inst.pref_rank = array('i', rank_par[inverso].astype(np.intc).tobytes())
+
+# --- Cache Binário da Instância ---
+# Instância já lida e filtrada gravada em um arquivo binário plano, chaveado pelo hash do
+# conteúdo da entrada e por MAX_PREFERENCES: execuções repetidas pulam leitura e filtragem.
+# Layout: MAGIC | tamanho do cabeçalho (uint32) | cabeçalho JSON | seções alinhadas em 8
+# bytes (arrays int32 nativos e blobs de códigos separados por '\n'), mapeáveis com mmap.
+DIR_CACHE = '.cache_emparelhamento'
+_CACHE_MAGIC = b'EMPINST1'
+_CACHE_VERSAO = 3
+_CACHE_ARRAYS = ('vagas', 'nota_minima', 'nota', 'orig_inicio', 'orig_projeto', 'orig_rank',
+                 'pref_inicio', 'pref_projeto', 'pref_posicao',
+                 'cand_inicio', 'cand_aluno', 'pref_rank')
+
+def hash_arquivo(caminho_arquivo):
+    h = hashlib.sha256()
+    with open(caminho_arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _nome_cache(hash_entrada, max_preferencias):
+    # sha256 completo no nome: um prefixo truncado poderia colidir entre entradas distintas
+    return f"instancia_{hash_entrada}_max{max_preferencias}.bin"
+
+def caminho_cache(dir_cache, hash_entrada):
+    return os.path.join(dir_cache, _nome_cache(hash_entrada, MAX_PREFERENCES))
+
+def salvar_cache(inst, caminho, hash_entrada, origem, remocoes=0):
+    # O índice reverso só entra no cache se já tiver sido montado (seções vazias caso contrário)
+    indexado = inst.cand_inicio is not None
+    secoes = [(nome, getattr(inst, nome).tobytes() if getattr(inst, nome) is not None else b'')
+              for nome in _CACHE_ARRAYS]
+    secoes.append(('codigos_projetos', '\n'.join(inst.codigos_projetos).encode('utf-8')))
+    secoes.append(('codigos_alunos', '\n'.join(inst.codigos_alunos).encode('utf-8')))
+
+    campos, offset = [], 0
+    for nome, dados in secoes:
+        campos.append([nome, offset, len(dados)])
+        offset += len(dados) + (-len(dados) % 8)
+    cabecalho = json.dumps({
+        'versao': _CACHE_VERSAO,
+        'sha256': hash_entrada,
+        'max_preferencias': MAX_PREFERENCES,
+        'origem': os.path.abspath(origem),
+        'byteorder': sys.byteorder,
+        'itemsize': array('i').itemsize,
+        'n_projetos': inst.n_projetos,
+        'n_alunos': inst.n_alunos,
+        'remocoes': remocoes,
+        'indexado': indexado,
+        'ranking_explicito': inst.ranking_explicito,
+        'campos': campos,
+    }).encode('utf-8')
+    cabecalho += b' ' * (-(len(_CACHE_MAGIC) + 4 + len(cabecalho)) % 8)
+
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(_CACHE_MAGIC)
+        f.write(len(cabecalho).to_bytes(4, 'little'))
+        f.write(cabecalho)
+        for _, dados in secoes:
+            f.write(dados)
+            f.write(b'\0' * (-len(dados) % 8))
+    os.replace(temporario, caminho)  # escrita atômica: nunca deixa um cache pela metade
+
+def _ler_cabecalho_cache(mm):
+    if mm[:len(_CACHE_MAGIC)] != _CACHE_MAGIC:
+        return None, 0
+    inicio = len(_CACHE_MAGIC) + 4
+    tamanho = int.from_bytes(mm[len(_CACHE_MAGIC):inicio], 'little')
+    return json.loads(mm[inicio:inicio + tamanho].decode('utf-8')), inicio + tamanho
+
+def ler_cache(caminho, hash_entrada):
+    # Devolve (instância, remoções) ou None se o arquivo não for um cache válido para esta entrada
+    try:
+        with open(caminho, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            cabecalho, base = _ler_cabecalho_cache(mm)
+            if (cabecalho is None or cabecalho['versao'] != _CACHE_VERSAO
+                    or cabecalho['sha256'] != hash_entrada
+                    or cabecalho['max_preferencias'] != MAX_PREFERENCES
+                    or cabecalho['byteorder'] != sys.byteorder
+                    or cabecalho['itemsize'] != array('i').itemsize):
+                return None
+            secoes = {nome: (base + offset, base + offset + tamanho)
+                      for nome, offset, tamanho in cabecalho['campos']}
+            dados = {}
+            for nome in _CACHE_ARRAYS:
+                inicio, fim = secoes[nome]
+                dados[nome] = array('i')
+                dados[nome].frombytes(mm[inicio:fim])
+            for nome in ('codigos_projetos', 'codigos_alunos'):
+                inicio, fim = secoes[nome]
+                blob = mm[inicio:fim].decode('utf-8')
+                dados[nome] = blob.split('\n') if blob else []
+    except (OSError, ValueError, KeyError):
+        return None
+
+    if (len(dados['codigos_projetos']) != cabecalho['n_projetos']
+            or len(dados['codigos_alunos']) != cabecalho['n_alunos']
+            or len(dados['orig_inicio']) != cabecalho['n_alunos'] + 1
+            or len(dados['pref_inicio']) != cabecalho['n_alunos'] + 1):
+        return None
+    if not cabecalho['ranking_explicito']:
+        dados['orig_rank'] = None
+    elif len(dados['orig_rank']) != len(dados['orig_projeto']):
+        return None
+    if not cabecalho.get('indexado', True):
+        dados['cand_inicio'] = dados['cand_aluno'] = dados['pref_rank'] = None
+    elif (len(dados['cand_inicio']) != cabecalho['n_projetos'] + 1
+            or len(dados['pref_rank']) != len(dados['pref_projeto'])):
+        return None
+    inst = InstanciaCompacta(dados['codigos_projetos'], dados['vagas'], dados['nota_minima'],
+                             dados['codigos_alunos'], dados['nota'],
+                             dados['orig_inicio'], dados['orig_projeto'],
+                             dados['pref_inicio'], dados['pref_projeto'], dados['pref_posicao'],
+                             cand_inicio=dados['cand_inicio'], cand_aluno=dados['cand_aluno'],
+                             pref_rank=dados['pref_rank'], orig_rank=dados['orig_rank'])
+    return inst, cabecalho['remocoes']
+
+def _invalidar_caches(dir_cache, origem, hash_atual, manter):
+    # Remove entradas obsoletas do mesmo arquivo: conteúdo (sha256) diferente, outra versão
+    # do formato ou nome antigo. Caches do mesmo conteúdo com outro MAX_PREFERENCES
+    # continuam válidos e ficam; arquivos de cache ilegíveis são removidos.
+    origem = os.path.abspath(origem)
+    for nome in os.listdir(dir_cache):
+        caminho = os.path.join(dir_cache, nome)
+        if (not (nome.startswith('instancia_') and nome.endswith('.bin'))
+                or os.path.abspath(caminho) == os.path.abspath(manter)):
+            continue
+        try:
+            with open(caminho, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                cabecalho, _ = _ler_cabecalho_cache(mm)
+        except (OSError, ValueError):
+            cabecalho = None
+        if cabecalho is None:
+            os.remove(caminho)
+        elif cabecalho.get('origem') == origem and (
+                cabecalho.get('sha256') != hash_atual or cabecalho.get('versao') != _CACHE_VERSAO
+                or nome != _nome_cache(cabecalho.get('sha256'), cabecalho.get('max_preferencias'))):
+            os.remove(caminho)
+
+def carregar_instancia_com_cache(caminho_arquivo, dir_cache=DIR_CACHE, usar_mmap=False, estrito=False):
+    # Instância lida E filtrada; só lê/filtra o arquivo texto se não houver cache válido
+    hash_entrada = hash_arquivo(caminho_arquivo)
+    caminho = caminho_cache(dir_cache, hash_entrada)
+    if os.path.exists(caminho):
+        lido = ler_cache(caminho, hash_entrada)
+        if lido is not None:
+            inst, remocoes = lido
+            print(f"Cache: instância lida de '{caminho}' ({remocoes} preferências removidas na filtragem).")
+            return inst
+        print(f"Cache: '{caminho}' inválido; recriando.")
+        os.remove(caminho)
+
+    inst = carregar_instancia(caminho_arquivo, usar_mmap, estrito)
+    remocoes = filtrar_instancia(inst)
+    salvar_cache(inst, caminho, hash_entrada, caminho_arquivo, remocoes)
+    _invalidar_caches(dir_cache, caminho_arquivo, hash_entrada, manter=caminho)
+    return inst
+
+# --- Registro Compacto de Propostas ---
+class RegistroPropostas:
+    # Um registro de tamanho fixo por proposta (aluno, projeto, resultado, removido) em arrays
+    # tipados, no lugar de cópias completas do estado a cada iteração. O estado das conexões
+    # em qualquer iteração é reconstruído sob demanda a partir de checkpoints periódicos.
+    SEM_ALUNO = -1
+
+    def __init__(self, codigos_alunos, codigos_projetos, intervalo_checkpoint=None):
+        self.codigos_alunos = codigos_alunos
+        self.codigos_projetos = codigos_projetos
+        n_alunos = len(self.codigos_alunos)
+
+        self.iteracao = array('q')
+        self.aluno = array('i')
+        self.projeto = array('i')
+        self.aceito = array('b')
+        self.removido = array('i')
+
+        # Com intervalo >= número de alunos, os checkpoints (um vetor aluno -> projeto cada)
+        # ocupam no máximo o mesmo que os próprios registros: memória linear nas propostas.
+        self.intervalo = max(1, intervalo_checkpoint or max(1024, n_alunos))
+        self._estado = array('i', [self.SEM_ALUNO]) * n_alunos
+        self._checkpoints = [array('i', self._estado)]
+
+    def __len__(self):
+        return len(self.aluno)
+
+    def registrar(self, iteracao, aluno, projeto, aceito, removido=SEM_ALUNO):
+        self.iteracao.append(iteracao)
+        self.aluno.append(aluno)
+        self.projeto.append(projeto)
+        self.aceito.append(1 if aceito else 0)
+        self.removido.append(removido)
+
+        if removido != self.SEM_ALUNO:
+            self._estado[removido] = self.SEM_ALUNO
+        if aceito:
+            self._estado[aluno] = projeto
+        if len(self.aluno) % self.intervalo == 0:
+            self._checkpoints.append(array('i', self._estado))
+
+    def estado_em(self, k):
+        # Vetor aluno -> projeto (ou -1) após as k primeiras propostas
+        k = max(0, min(k, len(self)))
+        c = min(k // self.intervalo, len(self._checkpoints) - 1)
+        estado = array('i', self._checkpoints[c])
+        self.avancar(estado, c * self.intervalo, k)
+        return estado
+
+    def avancar(self, estado, inicio, fim):
+        # Aplica ao vetor `estado` as propostas [inicio, fim) e devolve os alunos alterados
+        alterados = []
+        for i in range(inicio, fim):
+            if self.removido[i] != self.SEM_ALUNO:
+                estado[self.removido[i]] = self.SEM_ALUNO
+                alterados.append(self.removido[i])
+            if self.aceito[i]:
+                estado[self.aluno[i]] = self.projeto[i]
+                alterados.append(self.aluno[i])
+        return alterados
+
+    def conexoes_em(self, k):
+        # Mesmo formato do antigo 'estado_conexoes': {(aluno, projeto): 'aceito'}
+        estado = self.estado_em(k)
+        return {(self.codigos_alunos[a], self.codigos_projetos[p]): 'aceito'
+                for a, p in enumerate(estado) if p != self.SEM_ALUNO}
+
+    def proposta(self, k):
+        # Dados da k-ésima proposta (0-based) com os códigos originais
+        removido = self.removido[k]
+        return {
+            'iteracao': self.iteracao[k],
+            'acao': 'proposta',
+            'aluno': self.codigos_alunos[self.aluno[k]],
+            'projeto': self.codigos_projetos[self.projeto[k]],
+            'resultado': 'aceito' if self.aceito[k] else 'rejeitado',
+            'removido': self.codigos_alunos[removido] if removido != self.SEM_ALUNO else None,
+        }
+
 # --- Algoritmo Gale-Shapley ---
-def executar_gale_shapley(projetos, alunos):
+class _NucleoGaleShapley:
+    # Estado comum aos motores proposto pelos alunos e proposto pelos projetos: alocação
+    # aluno -> projeto, registro de propostas e contadores de eventos (rejeições =
+    # propostas - aceites, derivado de ordem_aceite). As "iterações" do relatório são as
+    # propostas; retiradas_fila conta as vezes em que um aluno (ou projeto) livre saiu da
+    # fila, e é o número da iteração gravado no registro para os snapshots.
+    def __init__(self, instancia, registrar=True):
+        self.instancia = instancia
+        self.alocacao = array('i', [-1]) * instancia.n_alunos  # aluno -> projeto (-1 = não alocado)
+        self.ordem_aceite = 0
+        self.retiradas_fila = 0
+        self.propostas = 0
+        self.despejos = 0
+        self.operacoes_heap = 0
+        self.registro = (RegistroPropostas(instancia.codigos_alunos, instancia.codigos_projetos)
+                         if registrar else None)
+
+    @property
+    def rejeicoes(self):
+        return self.propostas - self.ordem_aceite
+
+    def contadores(self):
+        return {'retiradas_fila': self.retiradas_fila, 'propostas': self.propostas,
+                'rejeicoes': self.rejeicoes, 'despejos': self.despejos,
+                'operacoes_heap': self.operacoes_heap}
+
+class MotorGaleShapley(_NucleoGaleShapley):
+    # Gale-Shapley (proposta pelo aluno) sobre a InstanciaCompacta.
+    # Fila (deque) de alunos livres: retirar do início é O(1). Cada projeto mantém um
+    # min-heap com (nota, ordem de aceite, aluno): o topo é sempre o pior alocado.
+    # O desempate pela ordem de aceite reproduz exatamente o sort estável da versão original,
+    # então o emparelhamento resultante é idêntico, mas cada proposta custa O(log vagas).
+    # Com por_ranking=True a chave do heap é a posição no ranking do projeto (índice
+    # reverso, sem empates): é o ótimo dos alunos para o mesmo ranking estrito usado por
+    # MotorGaleShapleyProjetos e ReticuladoEstavel. Instâncias com rankings próprios dos
+    # projetos usam sempre essa chave.
+    def __init__(self, instancia, registrar=True, por_ranking=False):
+        super().__init__(instancia, registrar)
+        n_alunos = instancia.n_alunos
+        # Posição (no CSR) da próxima proposta de cada aluno
+        self.proxima = array('i', instancia.pref_inicio[:n_alunos])
+        self.heaps = [[] for _ in range(instancia.n_projetos)]
+        por_ranking = por_ranking or instancia.ranking_explicito
+        self.por_ranking = por_ranking
+        if por_ranking and instancia.pref_rank is None:
+            indexar_candidatos(instancia)
+        inicio = instancia.pref_inicio
+        self.fila = deque(a for a in range(n_alunos) if inicio[a] < inicio[a + 1])
+
+    def executar(self):
+        inst = self.instancia
+        fila, heaps, alocacao, proxima = self.fila, self.heaps, self.alocacao, self.proxima
+        fim, pref_projeto, vagas, nota = inst.pref_inicio, inst.pref_projeto, inst.vagas, inst.nota
+        rank = inst.pref_rank if self.por_ranking else None
+        registro = self.registro
+        iteracao, ordem_aceite = self.retiradas_fila, self.ordem_aceite
+        propostas, despejos = self.propostas, self.despejos
+
+        while fila:
+            iteracao += 1
+            a = fila.popleft()
+
+            i = proxima[a]
+            if i >= fim[a + 1]:
+                continue
+            proxima[a] = i + 1
+            propostas += 1
+
+            p = pref_projeto[i]
+            heap = heaps[p]
+            nota_a = nota[a] if rank is None else -rank[i]
+            removido = RegistroPropostas.SEM_ALUNO
+
+            # 1. Vaga Livre
+            if len(heap) < vagas[p]:
+                heapq.heappush(heap, (nota_a, ordem_aceite, a))
+                ordem_aceite += 1
+                alocacao[a] = p
+                aceito = True
+
+            # 2. Cheio -> Competição por Nota contra o pior alocado (topo do heap)
+            elif heap and nota_a > heap[0][0]:
+                _, _, removido = heapq.heapreplace(heap, (nota_a, ordem_aceite, a))
+                ordem_aceite += 1
+                despejos += 1
+                alocacao[removido] = -1
+                fila.append(removido) # O removido volta pra fila
+                alocacao[a] = p
+                aceito = True
+
+            # 3. Rejeitado
+            else:
+                fila.append(a)
+                aceito = False
+
+            if registro is not None:
+                registro.registrar(iteracao, a, p, aceito, removido)
+
+        self.retiradas_fila, self.ordem_aceite = iteracao, ordem_aceite
+        self.propostas, self.despejos = propostas, despejos
+        # Cada aceite é exatamente um heappush (vaga livre) ou um heapreplace (despejo)
+        self.operacoes_heap = ordem_aceite
+        return registro
+
+    def alocados(self, p):
+        # Alunos do projeto p em ordem de nota (e ordem de aceite)
+        return [a for _, _, a in sorted(self.heaps[p])]
+
+def executar_gale_shapley(projetos, alunos, por_ranking=False):
+    # Ponto de entrada sobre os objetos Projeto/Aluno: roda o motor na instância compacta
+    # e materializa o resultado de volta nos objetos. por_ranking=True desempata notas
+    # iguais pela ordem de leitura (o mesmo de ReemparelhamentoIncremental(por_ranking=True)).
+    inst = construir_instancia(projetos, alunos)
+    motor = MotorGaleShapley(inst, por_ranking=por_ranking)
+    registro = motor.executar()
+
+    lista_projetos = list(projetos.values())
+    lista_alunos = list(alunos.values())
+    for p, projeto in enumerate(lista_projetos):
+        projeto.alunos_alocados = [lista_alunos[a] for a in motor.alocados(p)]
+    for a, aluno in enumerate(lista_alunos):
+        p = motor.alocacao[a]
+        aluno.projeto_alocado = lista_projetos[p] if p >= 0 else None
+        aluno.preferencias = [inst.codigos_projetos[q]
+                              for q in inst.pref_projeto[motor.proxima[a]:inst.pref_inicio[a + 1]]]
+
+    return registro
+
+# --- Variante Proposta pelos Projetos e Reticulado Estável ---
+# Os projetos ordenam os candidatos pelo índice reverso (nota decrescente, empates na
+# ordem de leitura). Como esse ranking é o mesmo em todos os projetos, o ótimo dos alunos e
+# o dos projetos coincidem e o reticulado tem um único emparelhamento; as rotações só
+# aparecem quando os projetos têm rankings próprios (registros (P1):(A7, ...) na entrada).
+def posicoes_candidatos(inst):
+    # Para cada entrada k do índice reverso (aluno cand_aluno[k] candidato ao projeto p),
+    # a posição de p na lista filtrada do aluno: comparar duas ofertas custa O(1)
+    if inst.pref_rank is None:
+        indexar_candidatos(inst)
+    pref_inicio = inst.visao_numpy('pref_inicio')
+    pref_projeto = inst.visao_numpy('pref_projeto').astype(np.int64)
+    cand_inicio = inst.visao_numpy('cand_inicio').astype(np.int64)
+    aluno_de = np.repeat(np.arange(inst.n_alunos, dtype=np.int64), np.diff(pref_inicio))
+    k = cand_inicio[pref_projeto] + inst.visao_numpy('pref_rank')
+    posicao = np.full(len(inst.cand_aluno), np.iinfo(np.intc).max, dtype=np.int64)
+    # Projeto repetido na lista do aluno: vale a primeira ocorrência
+    np.minimum.at(posicao, k, np.arange(len(pref_projeto)) - pref_inicio[aluno_de])
+    return array('i', posicao.astype(np.intc).tobytes())
+
+class MotorGaleShapleyProjetos(_NucleoGaleShapley):
+    # Gale-Shapley proposto pelos projetos: cada projeto com vaga livre oferece a próxima
+    # vaga ao próximo aluno do seu ranking (índice reverso cand_*); o aluno fica com a
+    # melhor oferta pela posição na própria lista e, ao trocar, libera a vaga do projeto
+    # anterior, que volta à fila. Resultado: o emparelhamento estável ótimo dos projetos.
+    # Cada proposta custa O(1); as mesmas estruturas (alocação, registro, contadores) do
+    # motor proposto pelos alunos. despejos conta alunos que trocaram de projeto.
+    def __init__(self, instancia, registrar=True):
+        super().__init__(instancia, registrar)
+        if instancia.cand_inicio is None:
+            indexar_candidatos(instancia)
+        n_projetos = instancia.n_projetos
+        self.posicao = posicoes_candidatos(instancia)
+        # Posição (no índice reverso) da próxima oferta de cada projeto
+        self.proxima = array('i', instancia.cand_inicio[:n_projetos])
+        self.ocupacao = array('i', [0]) * n_projetos
+        # Posição, na lista do aluno, do projeto em que ele está
+        self.posicao_atual = array('i', [np.iinfo(np.intc).max]) * instancia.n_alunos
+        inicio, vagas = instancia.cand_inicio, instancia.vagas
+        self.fila = deque(p for p in range(n_projetos) if vagas[p] > 0 and inicio[p] < inicio[p + 1])
+
+    def executar(self):
+        inst = self.instancia
+        fila, alocacao, proxima, ocupacao = self.fila, self.alocacao, self.proxima, self.ocupacao
+        posicao, posicao_atual = self.posicao, self.posicao_atual
+        fim, cand_aluno, vagas = inst.cand_inicio, inst.cand_aluno, inst.vagas
+        registro = self.registro
+        iteracao, ordem_aceite = self.retiradas_fila, self.ordem_aceite
+        propostas, despejos = self.propostas, self.despejos
+
+        while fila:
+            p = fila.popleft()
+            k, fim_p, vagas_p = proxima[p], fim[p + 1], vagas[p]
+            # O projeto oferece vagas até lotar ou esgotar o ranking
+            while ocupacao[p] < vagas_p and k < fim_p:
+                iteracao += 1
+                propostas += 1
+                a, pos = cand_aluno[k], posicao[k]
+                k += 1
+                aceito = pos < posicao_atual[a]
+                if aceito:
+                    q = alocacao[a]
+                    if q >= 0:
+                        ocupacao[q] -= 1
+                        despejos += 1
+                        # q estava lotado (fora da fila): volta a oferecer
+                        if ocupacao[q] == vagas[q] - 1:
+                            fila.append(q)
+                    alocacao[a] = p
+                    posicao_atual[a] = pos
+                    ocupacao[p] += 1
+                    ordem_aceite += 1
+                if registro is not None:
+                    registro.registrar(iteracao, a, p, aceito)
+            proxima[p] = k
+
+        self.retiradas_fila, self.ordem_aceite = iteracao, ordem_aceite
+        self.propostas, self.despejos = propostas, despejos
+        return registro
+
+    def alocados(self, p):
+        # Alunos do projeto p na ordem do ranking do projeto
+        return [a for a in self.instancia.candidatos(p) if self.alocacao[a] == p]
+
+class ReticuladoEstavel:
+    # Reticulado dos emparelhamentos estáveis para o ranking estrito dos projetos, via
+    # rotações (Gusfield & Irving, na forma de alunos/projetos com vagas). Parte do ótimo
+    # dos alunos; uma rotação exposta é um ciclo a_0 -> a_1 -> ... em que a_i desce para
+    # s(a_i), o próximo projeto da sua lista, lotado, que o prefere ao seu pior alocado
+    # a_{i+1}. Eliminá-las uma a uma até o ótimo dos projetos percorre uma cadeia maximal,
+    # que contém cada rotação exatamente uma vez e numera as rotações numa extensão linear
+    # da ordem de precedência. Com essa numeração, eliminar só rotações de número maior que
+    # a última gera cada conjunto fechado (cada emparelhamento estável) exatamente uma vez:
+    # emparelhamentos() enumera em profundidade com memória O(alunos + rotações), sem
+    # guardar o reticulado, e amostrar() sorteia caminhos a partir do ótimo dos alunos.
+    def __init__(self, inst):
+        self.instancia = inst
+        motor = MotorGaleShapley(inst, registrar=False, por_ranking=True)
+        motor.executar()
+        self.otimo_alunos = array('i', motor.alocacao)
+        # Índice no CSR de preferências do projeto atual de cada aluno (-1 = não alocado)
+        self._atual = self._indices_atuais(self.otimo_alunos)
+
+        # Cadeia maximal: rotações expostas eliminadas em lotes (rotações expostas ao mesmo
+        # tempo são disjuntas e continuam expostas após eliminar as outras)
+        self.rotacoes = []
+        self._id = {}
+        atual = array('i', self._atual)
+        while True:
+            expostas = self._expostas(atual)
+            if not expostas:
+                break
+            for rotacao in expostas:
+                self._id[(rotacao[0][0], rotacao[0][1])] = len(self.rotacoes)
+                self.rotacoes.append(rotacao)
+                self._eliminar(atual, rotacao)
+        self.otimo_projetos = self._alocacao(atual)
+
+    def _indices_atuais(self, alocacao):
+        inst = self.instancia
+        atual = array('i', [-1]) * inst.n_alunos
+        pref_inicio, pref_projeto = inst.pref_inicio, inst.pref_projeto
+        for a, p in enumerate(alocacao):
+            if p >= 0:
+                for j in range(pref_inicio[a], pref_inicio[a + 1]):
+                    if pref_projeto[j] == p:
+                        atual[a] = j
+                        break
+        return atual
+
+    def _alocacao(self, atual):
+        pref_projeto = self.instancia.pref_projeto
+        return array('i', (pref_projeto[j] if j >= 0 else -1 for j in atual))
+
+    def _expostas(self, atual):
+        # Rotações expostas no emparelhamento `atual`, cada uma como lista de
+        # (aluno, índice CSR de onde sai, índice CSR para onde vai)
+        inst = self.instancia
+        pref_inicio, pref_projeto, pref_rank, vagas = inst.pref_inicio, inst.pref_projeto, inst.pref_rank, inst.vagas
+        n_projetos = inst.n_projetos
+        ocupacao = array('i', [0]) * n_projetos
+        pior_rank = array('i', [-1]) * n_projetos
+        pior = array('i', [-1]) * n_projetos
+        for a, j in enumerate(atual):
+            if j >= 0:
+                p = pref_projeto[j]
+                ocupacao[p] += 1
+                if pref_rank[j] > pior_rank[p]:
+                    pior_rank[p], pior[p] = pref_rank[j], a
+
+        # s(a) e próximo(a) = pior alocado de s(a). Projetos com vaga livre têm os mesmos
+        # alunos em todos os emparelhamentos estáveis: o aluno não pode descer além de um
+        # deles (formaria par bloqueador), então nesse caso não há s(a).
+        destino = {}
+        proximo = {}
+        for a, j in enumerate(atual):
+            if j < 0:
+                continue
+            p = pref_projeto[j]
+            for k in range(j + 1, pref_inicio[a + 1]):
+                q = pref_projeto[k]
+                if q == p:
+                    continue
+                if ocupacao[q] < vagas[q]:
+                    break
+                if pref_rank[k] < pior_rank[q]:
+                    destino[a] = k
+                    proximo[a] = pior[q]
+                    break
+
+        # Ciclos do grafo funcional a -> próximo(a)
+        rotacoes = []
+        estado = {}  # 1 = no caminho atual, 2 = visitado
+        for inicio in proximo:
+            if inicio in estado:
+                continue
+            caminho = []
+            a = inicio
+            while a in proximo and a not in estado:
+                estado[a] = 1
+                caminho.append(a)
+                a = proximo[a]
+            if estado.get(a) == 1:
+                ciclo = caminho[caminho.index(a):]
+                # Começa pelo menor (aluno, origem) para a identificação ser canônica
+                i0 = min(range(len(ciclo)), key=lambda i: (ciclo[i], atual[ciclo[i]]))
+                ciclo = ciclo[i0:] + ciclo[:i0]
+                rotacoes.append([(b, atual[b], destino[b]) for b in ciclo])
+            for b in caminho:
+                estado[b] = 2
+        return rotacoes
+
+    def _identificar(self, rotacao):
+        a, de, _ = min(rotacao)
+        return self._id[(a, de)]
+
+    @staticmethod
+    def _eliminar(atual, rotacao):
+        for a, _, para in rotacao:
+            atual[a] = para
+
+    @staticmethod
+    def _desfazer(atual, rotacao):
+        for a, de, _ in rotacao:
+            atual[a] = de
+
+    def emparelhamentos(self, limite=None):
+        # Gera as alocações (aluno -> projeto) de todos os emparelhamentos estáveis, do
+        # ótimo dos alunos em diante, até `limite` itens
+        if limite is not None and limite <= 0:
+            return
+        atual = array('i', self._atual)
+        gerados = 1
+        yield array('i', self.otimo_alunos)
+        pilha = [(-1, iter(sorted(self._identificar(r) for r in self._expostas(atual))))]
+        while pilha:
+            ultima, filhos = pilha[-1]
+            r = next(filhos, None)
+            if r is None:
+                pilha.pop()
+                if ultima >= 0:
+                    self._desfazer(atual, self.rotacoes[ultima])
+                continue
+            if limite is not None and gerados >= limite:
+                return
+            self._eliminar(atual, self.rotacoes[r])
+            gerados += 1
+            yield self._alocacao(atual)
+            proximas = sorted(i for i in map(self._identificar, self._expostas(atual)) if i > r)
+            pilha.append((r, iter(proximas)))
+
+    def amostrar(self, n, seed=None):
+        # n emparelhamentos estáveis sorteados: a partir do ótimo dos alunos, elimina uma
+        # rotação exposta ao acaso ou para (cada opção com a mesma chance). Não é uniforme
+        # sobre o reticulado, mas cobre dos dois extremos ao meio sem enumerá-lo.
+        rng = random.Random(seed)
+        amostras = []
+        for _ in range(n):
+            atual = array('i', self._atual)
+            while True:
+                expostas = self._expostas(atual)
+                escolha = rng.randrange(len(expostas) + 1)
+                if escolha == len(expostas):
+                    break
+                self._eliminar(atual, expostas[escolha])
+            amostras.append(self._alocacao(atual))
+        return amostras
+
+# --- Empates nas Notas: Emparelhamento Estável Fraco Grande ---
+# Projetos só distinguem alunos pela nota, então alunos de mesma nota estão empatados. Um
+# par (aluno, projeto) bloqueia só se o projeto tem vaga livre ou um alocado de nota
+# estritamente menor (estabilidade fraca, a mesma de verificar_estabilidade_rapida). O
+# motor padrão desempata pela ordem de chegada; o tamanho do emparelhamento depende desse
+# desempate e achar o maior é NP-difícil. 'leitura' desempata pela ordem de leitura dos
+# alunos (ranking estrito fixo): o resultado não depende da ordem das propostas e é o
+# mesmo do reemparelhamento incremental, do serviço local e da varredura de parâmetros.
+MODOS_EMPATE = ('ordem', 'leitura', 'kiraly', 'exato')
+LIMITE_ALUNOS_EXATO = 2000  # acima disso o modo exato usa só o resultado de Király
+
+class MotorKiraly(MotorGaleShapley):
+    # Aproximação de Király (fator 3/2) para empates de um lado só: o aluno que esgota a
+    # lista é promovido uma única vez e recomeça do início; entre alunos de mesma nota o
+    # projeto prefere o promovido. A chave do heap vira 2 * nota + promovido, que refina a
+    # nota, então o resultado continua fracamente estável. O(preferências * log vagas).
+    def __init__(self, instancia, registrar=True):
+        super().__init__(instancia, registrar)
+        self.promovido = array('b', [0]) * instancia.n_alunos
+        self.promocoes = 0
+
+    def executar(self):
+        inst = self.instancia
+        fila, heaps, alocacao, proxima = self.fila, self.heaps, self.alocacao, self.proxima
+        inicio, pref_projeto, vagas, nota = inst.pref_inicio, inst.pref_projeto, inst.vagas, inst.nota
+        rank = inst.pref_rank if self.por_ranking else None
+        promovido = self.promovido
+        registro = self.registro
+        iteracao, ordem_aceite = self.retiradas_fila, self.ordem_aceite
+        propostas, despejos, promocoes = self.propostas, self.despejos, self.promocoes
+
+        while fila:
+            iteracao += 1
+            a = fila.popleft()
+
+            i = proxima[a]
+            if i >= inicio[a + 1]:
+                # Rejeitado por toda a lista: segunda passada, agora com vantagem nos empates
+                if not promovido[a]:
+                    promovido[a] = 1
+                    promocoes += 1
+                    proxima[a] = inicio[a]
+                    fila.append(a)
+                continue
+            proxima[a] = i + 1
+            propostas += 1
+
+            p = pref_projeto[i]
+            heap = heaps[p]
+            chave = 2 * (nota[a] if rank is None else -rank[i]) + promovido[a]
+            removido = RegistroPropostas.SEM_ALUNO
+
+            if len(heap) < vagas[p]:
+                heapq.heappush(heap, (chave, ordem_aceite, a))
+                ordem_aceite += 1
+                alocacao[a] = p
+                aceito = True
+            elif heap and chave > heap[0][0]:
+                _, _, removido = heapq.heapreplace(heap, (chave, ordem_aceite, a))
+                ordem_aceite += 1
+                despejos += 1
+                alocacao[removido] = -1
+                fila.append(removido)
+                alocacao[a] = p
+                aceito = True
+            else:
+                fila.append(a)
+                aceito = False
+
+            if registro is not None:
+                registro.registrar(iteracao, a, p, aceito, removido)
+
+        self.retiradas_fila, self.ordem_aceite = iteracao, ordem_aceite
+        self.propostas, self.despejos, self.promocoes = propostas, despejos, promocoes
+        self.operacoes_heap = ordem_aceite
+        return registro
+
+    def contadores(self):
+        return {**super().contadores(), 'promocoes': self.promocoes}
+
+def emparelhamento_maximo_exato(inst, tempo_limite=60.0):
+    # Maior emparelhamento fracamente estável por programação inteira (scipy.optimize.milp,
+    # HiGHS). x[e] = 1 se o par e = (aluno, projeto) é usado; para cada par, ou o aluno
+    # está no projeto ou em um melhor, ou o projeto está lotado com alunos de nota >= a
+    # dele:  vagas[p] * sum(x[aluno, q], q até p na lista) + sum(x[b, p], nota[b] >= nota[a], b != a) >= vagas[p].
+    # Devolve a alocação (array aluno -> projeto) ou None se o solver não achar solução
+    # no tempo limite. As restrições de estabilidade crescem com o quadrado dos candidatos
+    # por projeto: só para instâncias pequenas.
+    from scipy.optimize import milp, LinearConstraint, Bounds
+    from scipy.sparse import coo_matrix
+
+    if inst.cand_inicio is None:
+        indexar_candidatos(inst)
+    pref_inicio, pref_projeto, vagas, nota = inst.pref_inicio, inst.pref_projeto, inst.vagas, inst.nota
+    # Pares distintos, na ordem da lista de cada aluno
+    par_aluno, par_projeto, par_de = [], [], {}
+    for a in range(inst.n_alunos):
+        for j in range(pref_inicio[a], pref_inicio[a + 1]):
+            p = pref_projeto[j]
+            if (a, p) not in par_de:
+                par_de[(a, p)] = len(par_aluno)
+                par_aluno.append(a)
+                par_projeto.append(p)
+    n_pares = len(par_aluno)
+    if n_pares == 0:
+        return array('i', [-1]) * inst.n_alunos
+
+    linhas, colunas, valores, inferior, superior = [], [], [], [], []
+
+    def restricao(termos, lb, ub):
+        r = len(inferior)
+        for e, v in termos:
+            linhas.append(r)
+            colunas.append(e)
+            valores.append(v)
+        inferior.append(lb)
+        superior.append(ub)
+
+    por_aluno = [[] for _ in range(inst.n_alunos)]
+    por_projeto = [[] for _ in range(inst.n_projetos)]
+    for e in range(n_pares):
+        por_aluno[par_aluno[e]].append(e)
+        por_projeto[par_projeto[e]].append(e)
+    for pares in por_aluno:
+        if pares:
+            restricao([(e, 1) for e in pares], 0, 1)
+    for p, pares in enumerate(por_projeto):
+        if pares:
+            restricao([(e, 1) for e in pares], 0, vagas[p])
+    for a, pares in enumerate(por_aluno):
+        for t, e in enumerate(pares):
+            p = par_projeto[e]
+            termos = [(f, vagas[p]) for f in pares[:t + 1]]
+            termos += [(f, 1) for f in por_projeto[p] if par_aluno[f] != a and nota[par_aluno[f]] >= nota[a]]
+            restricao(termos, vagas[p], np.inf)
+
+    A = coo_matrix((valores, (linhas, colunas)), shape=(len(inferior), n_pares)).tocsr()
+    res = milp(c=-np.ones(n_pares), constraints=LinearConstraint(A, inferior, superior),
+               integrality=np.ones(n_pares), bounds=Bounds(0, 1),
+               options={'time_limit': tempo_limite} if tempo_limite else None)
+    if res.x is None:
+        return None
+    alocacao = array('i', [-1]) * inst.n_alunos
+    for e in np.flatnonzero(res.x > 0.5):
+        alocacao[par_aluno[e]] = par_projeto[e]
+    return alocacao
+
+def emparelhar_com_empates(inst, modo='kiraly', registrar=True, tempo_limite=60.0):
+    # Emparelhamento fracamente estável tratando notas iguais como empate.
+    #   'ordem': motor padrão (desempate pela ordem de chegada);
+    #   'leitura': motor padrão com desempate pela ordem de leitura (por_ranking=True);
+    #   'kiraly': MotorKiraly (3/2 do máximo, escala para centenas de milhares de alunos);
+    #   'exato': máximo por programação inteira (requer scipy) até LIMITE_ALUNOS_EXATO
+    #            alunos; fora disso, sem scipy ou sem solução no tempo limite, fica o
+    #            resultado de Király.
+    # Devolve (alocacao, motor): o motor (registro e contadores) é o que gerou a alocação,
+    # ou None quando ela veio do solver. Com rankings próprios dos projetos não há empates:
+    # todos os emparelhamentos estáveis têm o mesmo tamanho e os três modos coincidem.
+    if modo not in MODOS_EMPATE:
+        raise ValueError(f"modo de empate desconhecido: {modo!r} (use {', '.join(MODOS_EMPATE)})")
+    if modo in ('ordem', 'leitura'):
+        motor = MotorGaleShapley(inst, registrar=registrar, por_ranking=modo == 'leitura')
+    else:
+        motor = MotorKiraly(inst, registrar=registrar)
+    motor.executar()
+    if modo != 'exato' or inst.ranking_explicito:
+        return motor.alocacao, motor
+    if inst.n_alunos > LIMITE_ALUNOS_EXATO:
+        print(f"Aviso: {inst.n_alunos} alunos excede o limite do modo exato ({LIMITE_ALUNOS_EXATO}); "
+              "usando a aproximação de Király.")
+        return motor.alocacao, motor
+    try:
+        alocacao = emparelhamento_maximo_exato(inst, tempo_limite)
+    except ImportError:
+        print("Aviso: scipy não instalado; usando a aproximação de Király.")
+        return motor.alocacao, motor
+    if alocacao is None or sum(p >= 0 for p in alocacao) < sum(p >= 0 for p in motor.alocacao):
+        print("Aviso: o solver não achou solução melhor no tempo limite; usando a aproximação de Király.")
+        return motor.alocacao, motor
+    return alocacao, None
+
+# --- Decomposição em Componentes Conexos ---
+# O grafo bipartido aluno-projeto das preferências filtradas costuma se partir em
+# submercados independentes (departamentos, faixas de nota mínima). Nenhuma proposta
+# atravessa componentes e a fila FIFO restrita a um componente é a mesma da fila global,
+# então emparelhar cada componente sozinho dá exatamente a alocação do motor global (o
+# mesmo vale para o motor proposto pelos projetos e para o de Király). Cada componente
+# vira uma InstanciaCompacta própria e os componentes são emparelhados em paralelo.
+def componentes_conexos(inst):
+    # Union-find sobre os projetos: cada aluno une os projetos consecutivos da sua lista.
+    # Devolve (comp_aluno, comp_projeto, n_componentes); -1 = aluno sem preferências /
+    # projeto sem candidatos. Componentes numerados pelo primeiro aluno.
+    pref_inicio = inst.visao_numpy('pref_inicio').astype(np.int64)
+    pref_projeto = inst.visao_numpy('pref_projeto').astype(np.int64)
+    n_alunos, n_projetos = inst.n_alunos, inst.n_projetos
+    consecutivo = np.ones(max(len(pref_projeto) - 1, 0), dtype=bool)
+    inicios = pref_inicio[(pref_inicio > 0) & (pref_inicio < len(pref_projeto))]
+    consecutivo[inicios - 1] = False
+    u, v = pref_projeto[:-1][consecutivo], pref_projeto[1:][consecutivo]
+
+    # Union-find vetorizado: a cada rodada as raízes das pontas de cada aresta são unidas
+    # (a maior aponta para a menor) e os caminhos são comprimidos por saltos de ponteiro,
+    # até nenhuma aresta ligar raízes diferentes; O(log projetos) rodadas na prática
+    raizes = np.arange(n_projetos, dtype=np.int64)
+    while True:
+        ru, rv = raizes[u], raizes[v]
+        ligam = ru != rv
+        if not ligam.any():
+            break
+        u, v, ru, rv = u[ligam], v[ligam], ru[ligam], rv[ligam]
+        np.minimum.at(raizes, np.maximum(ru, rv), np.minimum(ru, rv))
+        while True:
+            saltos = raizes[raizes]
+            if np.array_equal(saltos, raizes):
+                break
+            raizes = saltos
+
+    tem_preferencia = np.flatnonzero(pref_inicio[1:] > pref_inicio[:-1])
+    raiz_aluno = raizes[pref_projeto[pref_inicio[tem_preferencia]]]
+    # Numeração pela ordem do primeiro aluno de cada componente
+    primeiro = np.full(n_projetos, n_alunos, dtype=np.int64)
+    np.minimum.at(primeiro, raiz_aluno, tem_preferencia)
+    usadas = np.flatnonzero(primeiro < n_alunos)
+    comp_de_raiz = np.full(n_projetos, -1, dtype=np.int64)
+    comp_de_raiz[usadas[np.argsort(primeiro[usadas], kind='stable')]] = np.arange(len(usadas))
+    comp_aluno = np.full(n_alunos, -1, dtype=np.int64)
+    comp_aluno[tem_preferencia] = comp_de_raiz[raiz_aluno]
+    comp_projeto = comp_de_raiz[raizes]
+    candidatos = np.zeros(n_projetos, dtype=bool)
+    candidatos[pref_projeto] = True
+    comp_projeto[~candidatos] = -1
+    return comp_aluno, comp_projeto, len(usadas)
+
+def _array_intc(valores):
+    return array('i', np.ascontiguousarray(valores, dtype=np.intc).tobytes())
+
+def _linhas_csr(inicio, linhas):
+    # Posições no CSR das linhas selecionadas, concatenadas, e o novo vetor de início
+    contagem = inicio[linhas + 1] - inicio[linhas]
+    novo_inicio = np.zeros(len(linhas) + 1, dtype=np.int64)
+    np.cumsum(contagem, out=novo_inicio[1:])
+    posicoes = np.repeat(inicio[linhas] - novo_inicio[:-1], contagem) + np.arange(novo_inicio[-1])
+    return posicoes, novo_inicio
+
+def subinstancia(inst, alunos, projetos):
+    # InstanciaCompacta só com os alunos e projetos dados (ids crescentes, para manter a
+    # ordem de leitura e, portanto, os desempates). Projetos da lista original fora do
+    # subconjunto viram -1 em orig_projeto.
+    mapa = np.full(inst.n_projetos + 1, -1, dtype=np.int64)  # última posição: -1 -> -1
+    mapa[projetos] = np.arange(len(projetos))
+    pref_inicio = inst.visao_numpy('pref_inicio').astype(np.int64)
+    orig_inicio = inst.visao_numpy('orig_inicio').astype(np.int64)
+    pos_pref, novo_pref_inicio = _linhas_csr(pref_inicio, alunos)
+    pos_orig, novo_orig_inicio = _linhas_csr(orig_inicio, alunos)
+    # Posições nos rankings próprios só são comparadas dentro do mesmo projeto: valem sem renumerar
+    orig_rank = None if inst.orig_rank is None else _array_intc(inst.visao_numpy('orig_rank')[pos_orig])
+    return InstanciaCompacta(
+        [inst.codigos_projetos[p] for p in projetos.tolist()],
+        _array_intc(inst.visao_numpy('vagas')[projetos]),
+        _array_intc(inst.visao_numpy('nota_minima')[projetos]),
+        [inst.codigos_alunos[a] for a in alunos.tolist()],
+        _array_intc(inst.visao_numpy('nota')[alunos]),
+        _array_intc(novo_orig_inicio), _array_intc(mapa[inst.visao_numpy('orig_projeto')[pos_orig]]),
+        _array_intc(novo_pref_inicio), _array_intc(mapa[inst.visao_numpy('pref_projeto')[pos_pref]]),
+        _array_intc(inst.visao_numpy('pref_posicao')[pos_pref]), orig_rank=orig_rank)
+
+_INSTANCIA_COMPONENTES = None
+
+def _iniciar_worker_componentes(inst):
+    global _INSTANCIA_COMPONENTES
+    _INSTANCIA_COMPONENTES = inst
+
+def _emparelhar_grupo(inst, classe, opcoes, registrar, grupo):
+    # Emparelha cada componente (alunos, projetos) do grupo; devolve, por componente, a
+    # alocação local, os contadores e os arrays do registro (ids locais) ou None
+    resultados = []
+    for alunos, projetos in grupo:
+        motor = classe(subinstancia(inst, alunos, projetos), registrar=registrar, **opcoes)
+        motor.executar()
+        registro = motor.registro
+        arrays = None if registro is None else tuple(
+            np.frombuffer(getattr(registro, campo), dtype=getattr(registro, campo).typecode).copy()
+            for campo in ('aluno', 'projeto', 'aceito', 'removido'))
+        resultados.append((np.frombuffer(motor.alocacao, dtype=np.intc).copy(), motor.contadores(), arrays))
+    return resultados
+
+def _emparelhar_grupo_worker(tarefa):
+    return _emparelhar_grupo(_INSTANCIA_COMPONENTES, *tarefa)
+
+class MotorComponentes(_NucleoGaleShapley):
+    # Roda `classe` (MotorGaleShapley, MotorGaleShapleyProjetos ou MotorKiraly, com as
+    # `opcoes` do construtor) em cada componente conexo, em um pool de processos, e junta
+    # alocação, contadores (somados) e registro. Os componentes são distribuídos em grupos
+    # de tamanho parecido (maior primeiro), então o tempo de parede acompanha o maior
+    # componente. O registro intercala as propostas dos componentes pela iteração local,
+    # como se todos avançassem juntos; a alocação é idêntica à do motor global.
+    def __init__(self, instancia, registrar=True, classe=MotorGaleShapley, processos=None, **opcoes):
+        super().__init__(instancia, registrar)
+        self.classe = classe
+        self.processos = processos
+        self.opcoes = opcoes
+        self.componentes = []  # (alunos, projetos) de cada componente, ids globais
+        self._contadores = {}
+
+    def _grupos(self, n_grupos):
+        # Distribuição gulosa (maior componente para o grupo mais leve)
+        pref_inicio = self.instancia.visao_numpy('pref_inicio')
+        cargas = [int((pref_inicio[alunos + 1] - pref_inicio[alunos]).sum()) for alunos, _ in self.componentes]
+        grupos = [[] for _ in range(n_grupos)]
+        heap = [(0, g) for g in range(n_grupos)]
+        for c in sorted(range(len(self.componentes)), key=lambda c: -cargas[c]):
+            carga, g = heapq.heappop(heap)
+            grupos[g].append(c)
+            heapq.heappush(heap, (carga + cargas[c], g))
+        return [g for g in grupos if g]
+
+    def executar(self):
+        inst = self.instancia
+        comp_aluno, comp_projeto, n_componentes = componentes_conexos(inst)
+        ordem_alunos = np.argsort(comp_aluno, kind='stable')
+        ordem_projetos = np.argsort(comp_projeto, kind='stable')
+        limites_alunos = np.searchsorted(comp_aluno[ordem_alunos], np.arange(n_componentes + 1))
+        limites_projetos = np.searchsorted(comp_projeto[ordem_projetos], np.arange(n_componentes + 1))
+        self.componentes = [(ordem_alunos[limites_alunos[c]:limites_alunos[c + 1]],
+                             ordem_projetos[limites_projetos[c]:limites_projetos[c + 1]])
+                            for c in range(n_componentes)]
+
+        processos = max(1, min(self.processos or os.cpu_count() or 1, n_componentes))
+        registrar = self.registro is not None
+        if processos == 1:
+            grupos = [list(range(n_componentes))]
+            resultados = [_emparelhar_grupo(inst, self.classe, self.opcoes, registrar, self.componentes)]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            grupos = self._grupos(processos * 4)
+            tarefas = [(self.classe, self.opcoes, registrar, [self.componentes[c] for c in g]) for g in grupos]
+            with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_worker_componentes,
+                                     initargs=(inst,)) as pool:
+                resultados = list(pool.map(_emparelhar_grupo_worker, tarefas))
+
+        alocacao = np.frombuffer(self.alocacao, dtype=np.intc)
+        por_componente = [None] * n_componentes
+        for grupo, resultado in zip(grupos, resultados):
+            for c, (local, contadores, arrays) in zip(grupo, resultado):
+                alunos, projetos = self.componentes[c]
+                alocacao[alunos] = np.where(local >= 0, projetos[np.maximum(local, 0)], -1)
+                for chave, valor in contadores.items():
+                    self._contadores[chave] = self._contadores.get(chave, 0) + valor
+                por_componente[c] = arrays
+        self.retiradas_fila = self._contadores.get('retiradas_fila', 0)
+        self.propostas = self._contadores.get('propostas', 0)
+        self.ordem_aceite = self.propostas - self._contadores.get('rejeicoes', 0)
+        self.despejos = self._contadores.get('despejos', 0)
+        self.operacoes_heap = self._contadores.get('operacoes_heap', 0)
+        if registrar:
+            self._juntar_registros(por_componente)
+        return self.registro
+
+    def _juntar_registros(self, por_componente):
+        # Ids locais -> globais e intercalação estável pela iteração local (dentro de um
+        # componente a ordem original é preservada)
+        partes = [[] for _ in range(5)]
+        for (alunos, projetos), (aluno, projeto, aceito, removido) in zip(self.componentes, por_componente):
+            partes[0].append(np.arange(len(aluno)))
+            partes[1].append(alunos[aluno])
+            partes[2].append(projetos[projeto])
+            partes[3].append(aceito)
+            partes[4].append(np.where(removido >= 0, alunos[np.maximum(removido, 0)], RegistroPropostas.SEM_ALUNO))
+        if not partes[0]:
+            return
+        local, aluno, projeto, aceito, removido = (np.concatenate(p) for p in partes)
+        ordem = np.argsort(local, kind='stable')
+        registrar = self.registro.registrar
+        for k, (a, p, ok, r) in enumerate(zip(aluno[ordem].tolist(), projeto[ordem].tolist(),
+                                              aceito[ordem].tolist(), removido[ordem].tolist()), 1):
+            registrar(k, a, p, ok, r)
+
+    def contadores(self):
+        maior = max((len(alunos) for alunos, _ in self.componentes), default=0)
+        return {**self._contadores, 'componentes': len(self.componentes), 'maior_componente': maior}
+
+# --- Reemparelhamento Incremental ---
+# Todos os projetos ordenam os alunos pela mesma nota (e a elegibilidade é um corte nessa
+# nota), então com notas distintas o emparelhamento estável é único: basta restaurar a
+# estabilidade a partir do emparelhamento atual para obter o mesmo resultado de uma
+# execução completa. Notas empatadas são o caso comum (notas inteiras pequenas): com
+# por_ranking=True (padrão de ReemparelhamentoIncremental) os empates são desempatados
+# pela ordem de leitura, o ranking volta a ser estrito e o resultado é o da execução
+# completa com o mesmo desempate (executar_gale_shapley / MotorGaleShapley com
+# por_ranking=True, ou --empates leitura). Com por_ranking=False (ordem de chegada) o
+# resultado continua estável, mas alunos de mesma nota podem trocar de lugar em relação à
+# execução completa. Com rankings próprios dos projetos essa premissa não vale e as duas
+# classes recusam a instância.
+class ReemparelhamentoIncremental:
+    # Parte do emparelhamento estável já gravado em Projeto.alunos_alocados /
+    # Aluno.projeto_alocado. As edições (adicionar_aluno, remover_aluno, alterar_nota,
+    # alterar_vagas, alterar_nota_minima) são aplicadas na hora e executar() repara:
+    #   1. vagas abertas são oferecidas ao melhor aluno já posicionado que prefere o projeto
+    #      ao atual (cadeias de vacância);
+    #   2. alunos pendentes (novos, com nota alterada ou despejados) propõem do início da
+    #      lista, como no Gale-Shapley, deslocando o pior alocado quando têm nota maior.
+    # Só os alunos da cadeia afetada propõem ou mudam de projeto.
+    # O emparelhamento inicial precisa ser o do mesmo desempate. Com por_ranking e notas
+    # empatadas ele pode ter vindo da ordem de chegada (executar_gale_shapley padrão), então
+    # é refeito uma vez com executar_gale_shapley(projetos, alunos, por_ranking=True),
+    # gravando o resultado nos objetos.
+    def __init__(self, projetos, alunos, por_ranking=True):
+        if any(p.ranking for p in projetos.values()):
+            raise ValueError("reemparelhamento incremental requer projetos ordenando por nota (sem rankings próprios)")
+        self.projetos = projetos
+        self.alunos = alunos
+        self.por_ranking = por_ranking
+        self._ordem = {}        # aluno -> ordem de leitura (desempate entre notas iguais)
+        self._posicao = {}      # aluno -> índice do projeto atual em preferencias_originais
+        self._entrada = {}      # aluno -> seq da entrada válida no heap do projeto
+        self._seq = 0
+        # (chave, seq, aluno): topo = pior; chave = nota (ou nota e ordem de leitura, ver _chave_heap)
+        self.heaps = {p_code: [] for p_code in projetos}
+        self.ocupacao = dict.fromkeys(projetos, 0)
+        # Projeto -> alunos que o listam (elegíveis ou não), por nota decrescente
+        self.interessados = {p_code: [] for p_code in projetos}
+
+        if por_ranking and len({aluno.nota for aluno in alunos.values()}) < len(alunos):
+            executar_gale_shapley(projetos, alunos, por_ranking=True)
+        for aluno in alunos.values():
+            self._ordem[aluno.codigo] = len(self._ordem)
+        for aluno in sorted(alunos.values(), key=self._chave):
+            for p_code in dict.fromkeys(aluno.preferencias_originais):
+                if p_code in projetos:
+                    self.interessados[p_code].append(aluno)
+        for projeto in projetos.values():
+            for aluno in projeto.alunos_alocados:
+                self._alocar(aluno, projeto.codigo, aluno.preferencias_originais.index(projeto.codigo))
+
+        self.pendentes = {}       # alunos que proporão do início da lista (ordem de chegada)
+        self.vacancias = deque()  # projetos que ganharam vaga livre ou novos elegíveis
+        self._antes = {}          # aluno -> projeto antes das edições (só os que mudaram)
+        self._projetos_tocados = set()
+        self._alunos_tocados = set()
+
+    def _chave(self, aluno):
+        return (-aluno.nota, self._ordem[aluno.codigo])
+
+    def _chave_heap(self, aluno):
+        # Maior = melhor; com por_ranking, entre notas iguais o aluno lido antes vence
+        if self.por_ranking:
+            return (aluno.nota, -self._ordem[aluno.codigo])
+        return aluno.nota
+
+    def _elegivel(self, aluno, p_code):
+        projeto = self.projetos.get(p_code)
+        return projeto is not None and aluno.nota >= projeto.nota_minima
+
+    def _deseja(self, aluno, p_code):
+        # Projeto aparece (elegível) antes do atual na lista do aluno
+        posicao = self._posicao.get(aluno.codigo)
+        i = aluno.preferencias_originais.index(p_code)
+        return (posicao is None or i < posicao) and self._elegivel(aluno, p_code)
+
+    def _registrar_mudanca(self, aluno):
+        if aluno.codigo not in self._antes:
+            atual = aluno.projeto_alocado
+            self._antes[aluno.codigo] = atual.codigo if atual else None
+        self._alunos_tocados.add(aluno.codigo)
+
+    def _alocar(self, aluno, p_code, posicao):
+        self._seq += 1
+        heapq.heappush(self.heaps[p_code], (self._chave_heap(aluno), self._seq, aluno.codigo))
+        self._entrada[aluno.codigo] = self._seq
+        self._posicao[aluno.codigo] = posicao
+        self.ocupacao[p_code] += 1
+        aluno.projeto_alocado = self.projetos[p_code]
+
+    def _desalocar(self, aluno):
+        # Libera a vaga (a entrada no heap fica inválida e é descartada depois)
+        projeto = aluno.projeto_alocado
+        if projeto is None:
+            return None
+        self._registrar_mudanca(aluno)
+        del self._entrada[aluno.codigo]
+        del self._posicao[aluno.codigo]
+        self.ocupacao[projeto.codigo] -= 1
+        aluno.projeto_alocado = None
+        self._projetos_tocados.add(projeto.codigo)
+        return projeto.codigo
+
+    def _pior(self, p_code):
+        heap = self.heaps[p_code]
+        while heap and self._entrada.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _tornar_pendente(self, aluno):
+        p_code = self._desalocar(aluno)
+        if p_code is not None:
+            self.vacancias.append(p_code)
+        self.pendentes[aluno.codigo] = aluno
+        self._alunos_tocados.add(aluno.codigo)
+
+    # --- Edições ---
+    def adicionar_aluno(self, codigo, preferencias_raw, nota):
+        if codigo in self.alunos:
+            raise ValueError(f"Aluno {codigo} já existe")
+        aluno = Aluno(codigo, preferencias_raw, nota)
+        self.alunos[codigo] = aluno
+        self._ordem[codigo] = len(self._ordem)
+        self._inserir_interessado(aluno)
+        self._antes[codigo] = None
+        self._tornar_pendente(aluno)
+        return aluno
+
+    def remover_aluno(self, codigo):
+        aluno = self.alunos.pop(codigo)
+        p_code = self._desalocar(aluno)
+        if p_code is not None:
+            self.vacancias.append(p_code)
+        self._remover_interessado(aluno)
+        self.pendentes.pop(codigo, None)
+        self._antes.pop(codigo, None)
+        self._alunos_tocados.discard(codigo)
+
+    def alterar_nota(self, codigo, nota):
+        aluno = self.alunos[codigo]
+        self._remover_interessado(aluno)
+        self._tornar_pendente(aluno)
+        aluno.nota = int(nota)
+        self._inserir_interessado(aluno)
+
+    def alterar_vagas(self, p_code, vagas):
+        if vagas < 0:
+            raise ValueError(f"vagas negativas para {p_code}: {vagas}")
+        projeto = self.projetos[p_code]
+        projeto.vagas = int(vagas)
+        self._projetos_tocados.add(p_code)
+        # Excedentes saem do pior para o melhor, como no motor (nota, ordem de aceite)
+        while self.ocupacao[p_code] > projeto.vagas:
+            _, _, a_code = self._pior(p_code)
+            self._tornar_pendente(self.alunos[a_code])
+        self.vacancias.append(p_code)
+
+    def alterar_nota_minima(self, p_code, nota_minima):
+        projeto = self.projetos[p_code]
+        projeto.nota_minima = int(nota_minima)
+        self._projetos_tocados.add(p_code)
+        for aluno in self.interessados[p_code]:
+            self._alunos_tocados.add(aluno.codigo)
+            if aluno.projeto_alocado is projeto and aluno.nota < projeto.nota_minima:
+                self._tornar_pendente(aluno)
+        self.vacancias.append(p_code)
+
+    def aplicar(self, edicoes):
+        # Lote de edições como tuplas (nome_do_metodo, *argumentos)
+        for nome, *args in edicoes:
+            getattr(self, nome)(*args)
+        return self.executar()
+
+    def _inserir_interessado(self, aluno):
+        for p_code in dict.fromkeys(aluno.preferencias_originais):
+            if p_code in self.projetos:
+                bisect.insort(self.interessados[p_code], aluno, key=self._chave)
+                self._projetos_tocados.add(p_code)
+
+    def _remover_interessado(self, aluno):
+        for p_code in dict.fromkeys(aluno.preferencias_originais):
+            if p_code in self.projetos:
+                self.interessados[p_code].remove(aluno)
+                self._projetos_tocados.add(p_code)
+
+    # --- Reparo ---
+    def executar(self):
+        # Restaura a estabilidade e devolve {aluno: (projeto_antes, projeto_depois)} dos
+        # alunos cujo projeto mudou
+        self._preencher_vacancias()
+        self._propor_pendentes()
+        self._atualizar_objetos()
+
+        mudancas = {}
+        for a_code, antes in self._antes.items():
+            atual = self.alunos[a_code].projeto_alocado
+            depois = atual.codigo if atual else None
+            if antes != depois:
+                mudancas[a_code] = (antes, depois)
+        self._antes = {}
+        return mudancas
+
+    def _preencher_vacancias(self):
+        # Cada vaga livre vai para o aluno de maior nota (não pendente) que prefere o
+        # projeto ao atual; a vaga que ele deixa entra na fila
+        while self.vacancias:
+            p_code = self.vacancias.popleft()
+            projeto = self.projetos[p_code]
+            while self.ocupacao[p_code] < projeto.vagas:
+                escolhido = None
+                for aluno in self.interessados[p_code]:
+                    if aluno.codigo not in self.pendentes and self._deseja(aluno, p_code):
+                        escolhido = aluno
+                        break
+                if escolhido is None:
+                    break
+                anterior = self._desalocar(escolhido)
+                if anterior is not None:
+                    self.vacancias.append(anterior)
+                self._registrar_mudanca(escolhido)
+                self._alocar(escolhido, p_code, escolhido.preferencias_originais.index(p_code))
+                self._projetos_tocados.add(p_code)
+
+    def _propor_pendentes(self):
+        # Gale-Shapley retomado: pendentes começam do início da lista, deslocados seguem
+        # da posição seguinte ao projeto que perderam
+        fila = deque((aluno, 0) for aluno in self.pendentes.values())
+        self.pendentes = {}
+        while fila:
+            aluno, i = fila.popleft()
+            prefs = aluno.preferencias_originais
+            while i < len(prefs):
+                p_code = prefs[i]
+                i += 1
+                if not self._elegivel(aluno, p_code):
+                    continue
+                projeto = self.projetos[p_code]
+                if self.ocupacao[p_code] < projeto.vagas:
+                    self._registrar_mudanca(aluno)
+                    self._alocar(aluno, p_code, i - 1)
+                    self._projetos_tocados.add(p_code)
+                    break
+                pior = self._pior(p_code)
+                if pior is not None and self._chave_heap(aluno) > pior[0]:
+                    removido = self.alunos[pior[2]]
+                    posicao = self._posicao[removido.codigo]
+                    self._desalocar(removido)
+                    fila.append((removido, posicao + 1))
+                    self._registrar_mudanca(aluno)
+                    self._alocar(aluno, p_code, i - 1)
+                    self._projetos_tocados.add(p_code)
+                    break
+
+    def _atualizar_objetos(self):
+        # Sincroniza preferências filtradas/restantes, alocados e candidatos dos objetos tocados
+        for a_code in self._alunos_tocados:
+            aluno = self.alunos.get(a_code)
+            if aluno is None:
+                continue
+            aluno.preferencias_filtradas = [p for p in aluno.preferencias_originais if self._elegivel(aluno, p)]
+            posicao = self._posicao.get(a_code)
+            restantes = aluno.preferencias_originais[posicao + 1:] if posicao is not None else []
+            aluno.preferencias = [p for p in restantes if self._elegivel(aluno, p)]
+        for p_code in self._projetos_tocados:
+            projeto = self.projetos[p_code]
+            entrada = self._entrada
+            projeto.alunos_alocados = [self.alunos[a] for _, seq, a in sorted(self.heaps[p_code])
+                                       if entrada.get(a) == seq]
+            projeto.candidatos = [a for a in self.interessados[p_code] if a.nota >= projeto.nota_minima]
+        self._alunos_tocados = set()
+        self._projetos_tocados = set()
+
+class ReemparelhamentoCompacto:
+    # Versão do reemparelhamento incremental sobre a InstanciaCompacta, para consultas
+    # repetidas contra a mesma coorte (servidor, varreduras de parâmetros). Parte do
+    # emparelhamento de um MotorGaleShapley já executado e trabalha sobre a lista original
+    # (orig_*), com a elegibilidade avaliada na hora, então vagas, notas mínimas e notas
+    # podem mudar sem refiltrar. O reparo é o mesmo de ReemparelhamentoIncremental:
+    # vagas livres vão para o melhor interessado que prefere o projeto ao atual (índice
+    # projeto -> interessados por nota decrescente) e alunos pendentes propõem como no
+    # Gale-Shapley. simular() aplica edições, consulta o resultado e desfaz tudo por um
+    # log de desfazer, voltando exatamente ao estado anterior.
+    # Com por_ranking=True notas iguais são desempatadas pela ordem de leitura, o mesmo
+    # ranking estrito de MotorGaleShapley(por_ranking=True): o emparelhamento estável é
+    # único, então o estado após qualquer sequência de edições é exatamente o de uma
+    # execução completa sobre a instância editada, independente do caminho.
+    SEM_POSICAO = 2**31 - 1
+
+    def __init__(self, instancia, motor=None, por_ranking=False):
+        if instancia.ranking_explicito:
+            raise ValueError("reemparelhamento incremental requer projetos ordenando por nota (sem rankings próprios)")
+        if motor is None:
+            motor = MotorGaleShapley(instancia, registrar=False, por_ranking=por_ranking)
+            motor.executar()
+        self.instancia = instancia
+        self.por_ranking = por_ranking
+        self.vagas = array('i', instancia.vagas)
+        self.nota_minima = array('i', instancia.nota_minima)
+        self.nota = array('i', instancia.nota)
+        self.alocacao = array('i', motor.alocacao)
+        self.ocupacao = array('i', (len(h) for h in motor.heaps))
+        # (chave, seq, aluno): topo = pior; chave = nota (ou nota e ordem de leitura, ver _chave)
+        self.heaps = [list(h) for h in motor.heaps]
+        if por_ranking:
+            self.heaps = [[(self._chave(a), seq, a) for _, seq, a in h] for h in self.heaps]
+            for heap in self.heaps:
+                heapq.heapify(heap)
+        self.entrada = array('q', [-1]) * instancia.n_alunos  # seq da entrada válida no heap
+        for heap in self.heaps:
+            for _, seq, a in heap:
+                self.entrada[a] = seq
+        self._seq = motor.ordem_aceite
+        # Posição (na lista original) do projeto atual de cada aluno
+        self.posicao = array('i', [self.SEM_POSICAO]) * instancia.n_alunos
+        pref_posicao = instancia.pref_posicao
+        for a, p in enumerate(self.alocacao):
+            if p >= 0:
+                self.posicao[a] = pref_posicao[motor.proxima[a] - 1]
+        self._indexar_interessados()
+
+        self.pendentes = {}       # aluno -> posição de onde volta a propor (ordem de chegada)
+        self.vacancias = deque()  # projetos com vaga livre ou novos elegíveis
+        self._antes = {}          # aluno -> projeto antes das edições (só os que mudaram)
+        self._fora_de_ordem = set()  # alunos com nota alterada (posição no índice desatualizada)
+        self._log = None
+
+    def _indexar_interessados(self):
+        # Projeto -> alunos que o listam na lista original (elegíveis ou não, primeira
+        # ocorrência), por nota decrescente e empates na ordem de leitura, com a posição do
+        # projeto na lista do aluno: cada teste "prefere p ao atual" custa O(1)
+        inst = self.instancia
+        n_projetos = inst.n_projetos
+        orig_inicio = inst.visao_numpy('orig_inicio').astype(np.int64)
+        orig_projeto = inst.visao_numpy('orig_projeto').astype(np.int64)
+        aluno_de = np.repeat(np.arange(inst.n_alunos, dtype=np.int64), np.diff(orig_inicio))
+        valido = np.flatnonzero(orig_projeto >= 0)
+        _, primeira = np.unique(aluno_de[valido] * n_projetos + orig_projeto[valido], return_index=True)
+        j = valido[primeira]
+        aluno, projeto = aluno_de[j], orig_projeto[j]
+        ordem = np.lexsort((aluno, -inst.visao_numpy('nota')[aluno], projeto))
+        inicio = np.zeros(n_projetos + 1, dtype=np.int64)
+        np.cumsum(np.bincount(projeto, minlength=n_projetos), out=inicio[1:])
+        self.int_inicio = _array_intc(inicio)
+        self.int_aluno = _array_intc(aluno[ordem])
+        self.int_posicao = _array_intc((j - orig_inicio[aluno])[ordem])
+
+    # --- Log de desfazer ---
+    def _gravar(self, vetor, i, valor):
+        if self._log is not None:
+            self._log.append((vetor, i, vetor[i]))
+        vetor[i] = valor
+
+    def _heap(self, p):
+        # Heap do projeto p; dentro de simular() a primeira alteração guarda uma cópia
+        if self._log is not None and p not in self._heaps_salvos:
+            self._heaps_salvos[p] = list(self.heaps[p])
+        return self.heaps[p]
+
+    def simular(self, edicoes, consulta=None):
+        # Aplica as edições (nome_do_metodo, *argumentos), repara, chama consulta(self) e
+        # desfaz. Devolve (mudancas, resultado da consulta).
+        if self._log is not None:
+            raise RuntimeError("simular() não pode ser aninhado")
+        self._log, self._heaps_salvos = [], {}
+        seq, fora_de_ordem = self._seq, set(self._fora_de_ordem)
+        try:
+            mudancas = self.aplicar(edicoes)
+            resultado = consulta(self) if consulta is not None else None
+        finally:
+            for vetor, i, valor in reversed(self._log):
+                vetor[i] = valor
+            for p, heap in self._heaps_salvos.items():
+                self.heaps[p] = heap
+            self._seq, self._fora_de_ordem = seq, fora_de_ordem
+            self.pendentes, self.vacancias, self._antes = {}, deque(), {}
+            self._log = self._heaps_salvos = None
+        return mudancas, resultado
+
+    # --- Estado ---
+    def _elegivel(self, a, p):
+        return p >= 0 and self.nota[a] >= self.nota_minima[p]
+
+    def _chave(self, a):
+        # Chave do aluno nos heaps (maior = melhor); com por_ranking, entre notas iguais
+        # o aluno lido antes vence
+        if self.por_ranking:
+            n = self.instancia.n_alunos
+            return self.nota[a] * n + (n - 1 - a)
+        return self.nota[a]
+
+    def _posicao_em(self, a, p):
+        orig_projeto = self.instancia.orig_projeto
+        inicio = self.instancia.orig_inicio[a]
+        for j in range(inicio, self.instancia.orig_inicio[a + 1]):
+            if orig_projeto[j] == p:
+                return j - inicio
+        return None
+
+    def _registrar_mudanca(self, a):
+        if a not in self._antes:
+            self._antes[a] = self.alocacao[a]
+
+    def _alocar(self, a, p, posicao):
+        self._registrar_mudanca(a)
+        self._seq += 1
+        heapq.heappush(self._heap(p), (self._chave(a), self._seq, a))
+        self._gravar(self.entrada, a, self._seq)
+        self._gravar(self.posicao, a, posicao)
+        self._gravar(self.ocupacao, p, self.ocupacao[p] + 1)
+        self._gravar(self.alocacao, a, p)
+
+    def _desalocar(self, a):
+        # Libera a vaga (a entrada no heap fica inválida e é descartada depois)
+        p = self.alocacao[a]
+        if p < 0:
+            return -1
+        self._registrar_mudanca(a)
+        self._gravar(self.entrada, a, -1)
+        self._gravar(self.posicao, a, self.SEM_POSICAO)
+        self._gravar(self.ocupacao, p, self.ocupacao[p] - 1)
+        self._gravar(self.alocacao, a, -1)
+        return p
+
+    def _pior(self, p):
+        heap = self.heaps[p]
+        while heap and self.entrada[heap[0][2]] != heap[0][1]:
+            heapq.heappop(self._heap(p))
+            heap = self.heaps[p]
+        return heap[0] if heap else None
+
+    def _tornar_pendente(self, a):
+        p = self._desalocar(a)
+        if p >= 0:
+            self.vacancias.append(p)
+        self.pendentes[a] = 0
+
+    # --- Edições ---
+    def alterar_vagas(self, p, vagas):
+        if vagas < 0:
+            raise ValueError(f"vagas negativas para o projeto {p}: {vagas}")
+        self._gravar(self.vagas, p, int(vagas))
+        # Excedentes saem do pior para o melhor, como no motor (nota, ordem de aceite)
+        while self.ocupacao[p] > self.vagas[p]:
+            self._tornar_pendente(self._pior(p)[2])
+        self.vacancias.append(p)
+
+    def alterar_nota_minima(self, p, nota_minima):
+        self._gravar(self.nota_minima, p, int(nota_minima))
+        for _, seq, a in list(self.heaps[p]):
+            if self.entrada[a] == seq and self.nota[a] < nota_minima:
+                self._tornar_pendente(a)
+        self.vacancias.append(p)
+
+    def alterar_nota(self, a, nota):
+        self._tornar_pendente(a)
+        self._gravar(self.nota, a, int(nota))
+        self._fora_de_ordem.add(a)
+
+    def aplicar(self, edicoes):
+        # Lote de edições como tuplas (nome_do_metodo, *argumentos), ids inteiros
+        for nome, *args in edicoes:
+            getattr(self, nome)(*args)
+        return self.executar()
+
+    # --- Reparo ---
+    def executar(self):
+        # Restaura a estabilidade e devolve {aluno: (projeto_antes, projeto_depois)} dos
+        # alunos cujo projeto mudou (ids inteiros, -1 = não alocado)
+        self._preencher_vacancias()
+        self._propor_pendentes()
+        mudancas = {a: (antes, self.alocacao[a]) for a, antes in self._antes.items()
+                    if antes != self.alocacao[a]}
+        self._antes = {}
+        return mudancas
+
+    def _melhor_interessado(self, p):
+        # Interessado de maior nota (não pendente, elegível) que prefere p ao projeto atual
+        nota, posicao, pendentes, fora_de_ordem = self.nota, self.posicao, self.pendentes, self._fora_de_ordem
+        nota_minima = self.nota_minima[p]
+        escolhido = None
+        for k in range(self.int_inicio[p], self.int_inicio[p + 1]):
+            a = self.int_aluno[k]
+            if nota[a] < nota_minima:
+                if a not in fora_de_ordem:
+                    break  # daqui em diante todos têm nota menor
+                continue
+            if a not in pendentes and a not in fora_de_ordem and self.int_posicao[k] < posicao[a]:
+                escolhido = (a, self.int_posicao[k])
+                break
+        # Alunos com nota alterada estão fora de ordem no índice: comparados à parte
+        for a in fora_de_ordem:
+            if a in pendentes or nota[a] < nota_minima:
+                continue
+            i = self._posicao_em(a, p)
+            if i is not None and i < posicao[a] and (
+                    escolhido is None or (-nota[a], a) < (-nota[escolhido[0]], escolhido[0])):
+                escolhido = (a, i)
+        return escolhido
+
+    def _preencher_vacancias(self):
+        # Cada vaga livre vai para o melhor interessado que prefere o projeto ao atual; a
+        # vaga que ele deixa entra na fila
+        while self.vacancias:
+            p = self.vacancias.popleft()
+            while self.ocupacao[p] < self.vagas[p]:
+                escolhido = self._melhor_interessado(p)
+                if escolhido is None:
+                    break
+                a, i = escolhido
+                anterior = self._desalocar(a)
+                if anterior >= 0:
+                    self.vacancias.append(anterior)
+                self._alocar(a, p, i)
+
+    def _propor_pendentes(self):
+        # Gale-Shapley retomado: pendentes começam do início da lista, deslocados seguem
+        # da posição seguinte ao projeto que perderam
+        fila = deque(self.pendentes.items())
+        self.pendentes = {}
+        orig_inicio, orig_projeto = self.instancia.orig_inicio, self.instancia.orig_projeto
+        while fila:
+            a, i = fila.popleft()
+            inicio, fim = orig_inicio[a], orig_inicio[a + 1]
+            while inicio + i < fim:
+                p = orig_projeto[inicio + i]
+                i += 1
+                if not self._elegivel(a, p):
+                    continue
+                if self.ocupacao[p] < self.vagas[p]:
+                    self._alocar(a, p, i - 1)
+                    break
+                pior = self._pior(p)
+                if pior is not None and self._chave(a) > pior[0]:
+                    removido = pior[2]
+                    posicao = self.posicao[removido]
+                    self._desalocar(removido)
+                    fila.append((removido, posicao + 1))
+                    self._alocar(a, p, i - 1)
+                    break
+
+    def instancia_atual(self):
+        # Instância com vagas, notas e notas mínimas atuais, filtrada (sem mensagens), para
+        # a verificação de estabilidade e as métricas
+        inst = self.instancia
+        atual = InstanciaCompacta(inst.codigos_projetos, self.vagas, self.nota_minima, inst.codigos_alunos,
+                                  self.nota, inst.orig_inicio, inst.orig_projeto,
+                                  indice_projetos=inst.indice_projetos, indice_alunos=inst._indice_alunos)
+        atual.pref_inicio, atual.pref_projeto, atual.pref_posicao, _, _ = _filtrar_instancia_numpy(atual)
+        return atual
+
+    def verificar(self):
+        return verificar_estabilidade_rapida(self.instancia_atual(), self.alocacao)
+
+# --- Gale-Shapley (versão original, baseada em listas) ---
+# Mantida apenas como referência para comparação nos benchmarks (scripts/benchmark_gale_shapley.py):
+# fila.pop(0) é O(n) e cada proposta a um projeto cheio reordena a lista de alocados.
+def executar_gale_shapley_legado(projetos, alunos):
     # Fila apenas com alunos que têm preferências válidas
     fila = [a.codigo for a in alunos.values() if a.preferencias]
     
@@ -158,250 +2179,974 @@ def executar_gale_shapley(projetos, alunos):
     return snapshots
 
 # --- Verificação de Estabilidade (Corrigida) ---
-def verificar_estabilidade(projetos, alunos):
-    blocking_pairs = []
-    
-    for aluno in alunos.values():
+# Códigos de saída da verificação (usados como status do processo em execuções em lote)
+ESTAVEL, INSTAVEL = 0, 1
+# Motivo de cada par bloqueador
+MOTIVO_VAGA_LIVRE, MOTIVO_NOTA = 0, 1
+SEM_CORTE = 2**31 - 1  # projeto sem alocados: nenhuma nota supera o corte
+# Com rankings próprios dos projetos a "nota" comparada é -pref_rank (maior = melhor no
+# ranking do projeto) e MOTIVO_NOTA passa a significar "o projeto prefere o aluno".
+
+def calcular_cortes(inst, alocacao):
+    # Uma única passada pela alocação: ocupação e pior nota (corte) de cada projeto
+    ocupacao = array('i', [0]) * inst.n_projetos
+    corte = array('i', [SEM_CORTE]) * inst.n_projetos
+    nota = inst.nota
+    if inst.ranking_explicito and inst.pref_rank is None:
+        indexar_candidatos(inst)
+    rank = inst.pref_rank if inst.ranking_explicito else None
+    inicio, pref_projeto = inst.pref_inicio, inst.pref_projeto
+    for a, p in enumerate(alocacao):
+        if p >= 0:
+            ocupacao[p] += 1
+            if rank is None:
+                chave = nota[a]
+            else:
+                # Posição do aluno no ranking do projeto em que está (fora da lista: não conta)
+                chave = next((-rank[j] for j in range(inicio[a], inicio[a + 1]) if pref_projeto[j] == p), SEM_CORTE)
+            if chave < corte[p]:
+                corte[p] = chave
+    return ocupacao, corte
+
+def _numpy_disponivel():
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ModuleNotFoundError:
+        return False
+
+def _pares_bloqueadores_numpy(inst, alocacao):
+    import numpy as np
+    inicio = inst.visao_numpy('pref_inicio')
+    pref_projeto = inst.visao_numpy('pref_projeto')
+    nota = inst.visao_numpy('nota')
+    vagas = inst.visao_numpy('vagas')
+    aloc = np.asarray(alocacao, dtype=np.intc)
+
+    ocupacao = np.bincount(aloc[aloc >= 0], minlength=inst.n_projetos)
+    vaga_livre = ocupacao < vagas
+
+    # Uma passada vetorizada sobre todos os pares (aluno, preferência) do CSR
+    aluno_de = np.repeat(np.arange(inst.n_alunos, dtype=np.intc), np.diff(inicio))
+    j = np.arange(len(pref_projeto), dtype=np.intc)
+    # Só contam as preferências antes do projeto atual do aluno
+    limite = inicio[1:].copy()
+    e_atual = pref_projeto == aloc[aluno_de]
+    np.minimum.at(limite, aluno_de[e_atual], j[e_atual])
+    antes = j < limite[aluno_de]
+
+    corte = np.full(inst.n_projetos, SEM_CORTE, dtype=np.intc)
+    if inst.ranking_explicito:
+        # Chave de cada par = -posição no ranking do projeto; o corte vem da entrada do
+        # projeto atual de cada aluno (limite), então tudo continua O(preferências)
+        if inst.pref_rank is None:
+            indexar_candidatos(inst)
+        chave = -inst.visao_numpy('pref_rank')
+        na_lista = np.flatnonzero(limite < inicio[1:])
+        np.minimum.at(corte, aloc[na_lista], chave[limite[na_lista]])
+    else:
+        chave = nota[aluno_de]
+        np.minimum.at(corte, aloc[aloc >= 0], nota[aloc >= 0])
+
+    livre = vaga_livre[pref_projeto]
+    bloqueia = antes & (livre | (chave > corte[pref_projeto]))
+
+    pares = np.empty(int(bloqueia.sum()), dtype=[('aluno', np.int32), ('projeto', np.int32), ('motivo', np.int8)])
+    pares['aluno'] = aluno_de[bloqueia]
+    pares['projeto'] = pref_projeto[bloqueia]
+    pares['motivo'] = np.where(livre[bloqueia], MOTIVO_VAGA_LIVRE, MOTIVO_NOTA)
+    return pares
+
+def _pares_bloqueadores_python(inst, alocacao):
+    ocupacao, corte = calcular_cortes(inst, alocacao)
+    pares = []
+    inicio, pref_projeto, vagas, nota = inst.pref_inicio, inst.pref_projeto, inst.vagas, inst.nota
+    rank = inst.pref_rank if inst.ranking_explicito else None
+    for a in range(inst.n_alunos):
         # Usamos as preferências FILTRADAS, pois o aluno só pode bloquear
         # com projetos para os quais ele foi considerado elegível.
-        prefs_lista = getattr(aluno, 'preferencias_filtradas', [])
+        for j in range(inicio[a], inicio[a + 1]):
+            p = pref_projeto[j]
 
-        for pref_proj_code in prefs_lista:
-            proj = projetos.get(pref_proj_code)
-            if not proj: continue
-
-            # REGRA DE OURO: Se o aluno não tem nota, ignora (não é bloqueio)
-            if aluno.nota < proj.nota_minima:
-                continue
-            
             # Se chegamos no projeto atual do aluno, paramos de verificar (pois as próximas são piores)
-            if aluno.projeto_alocado and aluno.projeto_alocado.codigo == pref_proj_code:
+            if p == alocacao[a]:
                 break
 
             # --- Verificação de Bloqueio ---
-            # 1. Projeto tem vaga livre?
-            if len(proj.alunos_alocados) < proj.vagas:
-                blocking_pairs.append((aluno.codigo, pref_proj_code))
-                # print(f"Bloqueio: {aluno.codigo} quer {pref_proj_code} (Vaga Livre)")
-            
-            # 2. Projeto está cheio, mas tem alguém pior que eu?
-            else:
-                pior = min(proj.alunos_alocados, key=lambda x: x.nota)
-                if aluno.nota > pior.nota:
-                    blocking_pairs.append((aluno.codigo, pref_proj_code))
-                    # print(f"Bloqueio: {aluno.codigo} (Nota {aluno.nota}) ganharia de {pior.codigo} (Nota {pior.nota}) em {pref_proj_code}")
+            # 1. Projeto tem vaga livre? 2. Projeto está cheio, mas tem alguém pior que eu?
+            if ocupacao[p] < vagas[p]:
+                pares.append((a, p, MOTIVO_VAGA_LIVRE))
+            elif (nota[a] if rank is None else -rank[j]) > corte[p]:
+                pares.append((a, p, MOTIVO_NOTA))
+    return pares
 
-    return len(blocking_pairs) == 0, blocking_pairs
+def verificar_estabilidade_rapida(inst, alocacao, usar_numpy=None):
+    # Verificação O(alunos + preferências) com os cortes de cada projeto pré-calculados.
+    # Devolve (status, pares): status é ESTAVEL/INSTAVEL e pares são os bloqueadores
+    # (aluno, projeto, motivo) em ids inteiros: um array estruturado NumPy quando
+    # disponível (ou usar_numpy=True) e uma lista de tuplas no caminho em Python puro.
+    if usar_numpy is None:
+        usar_numpy = _numpy_disponivel()
+    pares = _pares_bloqueadores_numpy(inst, alocacao) if usar_numpy else _pares_bloqueadores_python(inst, alocacao)
+    return (ESTAVEL if len(pares) == 0 else INSTAVEL), pares
+
+def verificar_estabilidade_compacta(inst, alocacao, usar_numpy=None):
+    status, pares = verificar_estabilidade_rapida(inst, alocacao, usar_numpy)
+    blocking_pairs = [(inst.codigos_alunos[int(par[0])], inst.codigos_projetos[int(par[1])]) for par in pares]
+    return status == ESTAVEL, blocking_pairs
+
+def verificar_estabilidade(projetos, alunos):
+    # Versão sobre os objetos Projeto/Aluno: converte para a representação compacta
+    inst = construir_instancia(projetos, alunos)
+    alocacao = array('i', (inst.indice_projetos[a.projeto_alocado.codigo] if a.projeto_alocado else -1
+                           for a in alunos.values()))
+    return verificar_estabilidade_compacta(inst, alocacao)
 
 # --- Visualização Radial (Circular) ---
-def gerar_visualizacoes(projetos, alunos, snapshots):
-    if not os.path.exists('graficos'):
-        os.makedirs('graficos')
+# Contexto compartilhado pelos processos de renderização (definido no initializer do pool)
+_CONTEXTO_RENDER = None
 
-    print("Gerando visualizações com layout Radial (Circular)...")
+def _preparar_contexto_render(inst, registro, pasta):
+    n_alunos = max(1, inst.n_alunos)
+    n_projetos = max(1, inst.n_projetos)
 
-    # --- Configuração do Layout Radial ---
-    G = nx.Graph()
-    lista_alunos = list(alunos.keys())
-    lista_projetos = list(projetos.keys())
-    G.add_nodes_from(lista_alunos)
-    G.add_nodes_from(lista_projetos)
+    # Círculo de Projetos (Interno - Raio 10) e de Alunos (Externo - Raio 25)
+    raio_proj, raio_aluno = 10, 25
+    ang_proj = 2 * np.pi * np.arange(inst.n_projetos) / n_projetos
+    ang_aluno = 2 * np.pi * np.arange(inst.n_alunos) / n_alunos
+    pos_proj = np.column_stack([raio_proj * np.cos(ang_proj), raio_proj * np.sin(ang_proj)])
+    pos_aluno = np.column_stack([raio_aluno * np.cos(ang_aluno), raio_aluno * np.sin(ang_aluno)])
 
-    pos = {}
-    
-    # Círculo de Projetos (Interno - Raio 10)
-    raio_proj = 10
-    for i, p in enumerate(lista_projetos):
-        angulo = (2 * np.pi * i) / len(lista_projetos)
-        pos[p] = (raio_proj * np.cos(angulo), raio_proj * np.sin(angulo))
-        
-    # Círculo de Alunos (Externo - Raio 25)
-    raio_aluno = 25
-    for i, a in enumerate(lista_alunos):
-        angulo = (2 * np.pi * i) / len(lista_alunos)
-        pos[a] = (raio_aluno * np.cos(angulo), raio_aluno * np.sin(angulo))
-
-    # --- Seleção de Snapshots (até 10) ---
-    total_snaps = len(snapshots)
-    if total_snaps == 0:
+    return {
+        'pasta': pasta,
+        'registro': registro,
+        'codigos_alunos': inst.codigos_alunos,
+        'codigos_projetos': inst.codigos_projetos,
+        'pos_aluno': pos_aluno,
+        'pos_proj': pos_proj,
+        # Ajuste dinâmico de figura e tamanhos para reduzir sobreposição
+        'figsize': (12, 12) if (n_alunos + n_projetos) < 200 else (18, 18),
+        'aluno_node_size': int(max(30, 4000 / n_alunos)),
+        'proj_node_size': int(max(200, 6000 / n_projetos)),
+        'aluno_font': 6 if n_alunos > 60 else 8,
+        'proj_font': 9 if n_projetos < 50 else 8,
+    }
+
+def _iniciar_worker_render(contexto):
+    global _CONTEXTO_RENDER
+    _CONTEXTO_RENDER = contexto
+
+def _montar_fundo(ctx):
+    # Parte estática (nós, rótulos, legenda) desenhada uma única vez por processo;
+    # cada quadro só redesenha as arestas e o título por cima do fundo salvo.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+
+    fig = Figure(figsize=ctx['figsize'], dpi=150)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    pos_aluno, pos_proj = ctx['pos_aluno'], ctx['pos_proj']
+
+    # Desenha nós com cores distintas
+    ax.scatter(pos_aluno[:, 0], pos_aluno[:, 1], s=ctx['aluno_node_size'], c='#6fa8dc', alpha=0.9, zorder=2)
+    ax.scatter(pos_proj[:, 0], pos_proj[:, 1], s=ctx['proj_node_size'], c='#93c47d', alpha=0.95, zorder=2)
+
+    # Rótulos levemente deslocados para reduzir sobreposição (alunos para fora, projetos para dentro)
+    for p_code, (x, y) in zip(ctx['codigos_projetos'], pos_proj):
+        ax.text(x * 0.92, y * 0.92, p_code, fontsize=ctx['proj_font'], fontweight='bold',
+                ha='center', va='center', zorder=3)
+    for a_code, (x, y) in zip(ctx['codigos_alunos'], pos_aluno):
+        ax.text(x * 1.06, y * 1.06, a_code, fontsize=ctx['aluno_font'], ha='center', va='center', zorder=3)
+
+    # Legenda melhorada
+    legend_elements = [
+        Line2D([0], [0], color='#2e8b57', lw=2, label='Emparelhado (Estável)'),
+        Line2D([0], [0], color='#1f4e79', lw=2, label='Proposta Aceita (Ativa)'),
+        Line2D([0], [0], color='#b22222', lw=2, linestyle='--', label='Proposta Rejeitada'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor='#6fa8dc', markersize=8, label='Alunos (Externo)'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor='#93c47d', markersize=10, label='Projetos (Interno)')
+    ]
+    ax.legend(handles=legend_elements, loc='upper right', fontsize=9)
+
+    limite = 25 * 1.12
+    ax.set_xlim(-limite, limite)
+    ax.set_ylim(-limite, limite)
+    ax.axis('off')
+    fig.tight_layout(rect=(0, 0, 1, 0.96))
+
+    # Artistas dinâmicos: ficam fora do fundo (animated) e são desenhados a cada quadro
+    verdes = LineCollection([], colors='#2e8b57', alpha=0.35, linewidths=1, animated=True)
+    atual = LineCollection([], linewidths=3, animated=True)
+    ax.add_collection(verdes)
+    ax.add_collection(atual)
+    titulo = fig.suptitle('', fontsize=14, fontweight='bold', animated=True)
+
+    canvas.draw()
+    fundo = canvas.copy_from_bbox(fig.bbox)
+    return fig, canvas, ax, fundo, verdes, atual, titulo
+
+def _gerar_quadros(lote, salvar_png=True, capturar=False):
+    # Renderiza um trecho contíguo de quadros [(idx_img, k), ...]: o estado do primeiro
+    # é reconstruído pelo registro e os seguintes só aplicam as arestas que mudaram.
+    # Gera (caminho do PNG ou None, quadro RGB ou None), um quadro por vez.
+    from PIL import Image
+
+    ctx = _CONTEXTO_RENDER
+    registro = ctx['registro']
+    pos_aluno, pos_proj = ctx['pos_aluno'], ctx['pos_proj']
+    fig, canvas, ax, fundo, verdes, atual, titulo = _montar_fundo(ctx)
+
+    def segmento(a, p):
+        return (tuple(pos_aluno[a]), tuple(pos_proj[p]))
+
+    estado, segmentos, fim_anterior = None, {}, 0
+    for idx_img, k in lote:
+        if estado is None:
+            estado = registro.estado_em(k + 1)
+            segmentos = {a: segmento(a, p) for a, p in enumerate(estado) if p >= 0}
+        else:
+            for a in registro.avancar(estado, fim_anterior, k + 1):
+                if estado[a] >= 0:
+                    segmentos[a] = segmento(a, estado[a])
+                else:
+                    segmentos.pop(a, None)
+        fim_anterior = k + 1
+
+        a, p, aceito = registro.aluno[k], registro.projeto[k], registro.aceito[k]
+        # Título Informativo
+        acao_txt = "ACEITO" if aceito else "REJEITADO"
+        titulo.set_text(f"Iteração {k + 1}: {ctx['codigos_alunos'][a]} tenta "
+                        f"{ctx['codigos_projetos'][p]} -> {acao_txt}")
+        titulo.set_color('green' if aceito else 'red')
+
+        # Arestas estáveis (exceto a aresta atual, desenhada com destaque)
+        verdes.set_segments([s for aluno, s in segmentos.items() if not (aceito and aluno == a)])
+        atual.set_segments([segmento(a, p)])
+        atual.set_color('#1f4e79' if aceito else '#b22222')
+        atual.set_linestyle('solid' if aceito else 'dashed')
+
+        canvas.restore_region(fundo)
+        ax.draw_artist(verdes)
+        ax.draw_artist(atual)
+        fig.draw_artist(titulo)
+
+        caminho = None
+        if salvar_png:
+            largura, altura = canvas.get_width_height()
+            imagem = Image.frombuffer('RGBA', (largura, altura), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+            caminho = os.path.join(ctx['pasta'], f"snapshot_{idx_img + 1}.png")
+            imagem.save(caminho, compress_level=1)  # zlib rápido: a codificação domina o tempo por quadro
+        # Quadro direto do buffer do canvas (sem passar por PNG); cópia porque o buffer é reutilizado
+        quadro = np.asarray(canvas.buffer_rgba())[:, :, :3].copy() if capturar else None
+        yield caminho, quadro
+
+def _renderizar_lote(args):
+    # Tarefa dos processos do pool: o lote inteiro volta de uma vez para o processo principal
+    lote, salvar_png, capturar = args
+    return list(_gerar_quadros(lote, salvar_png, capturar))
+
+# Com animação, lotes pequenos limitam quantos quadros ficam em memória esperando o GIF
+MAX_QUADROS_LOTE_ANIMACAO = 4
+
+def renderizar_snapshots(inst, registro, pasta='graficos', n_snapshots=10, processos=None,
+                         animacao=None, salvar_png=True):
+    # Renderiza até n_snapshots quadros espaçados ao longo das iterações, divididos em
+    # trechos contíguos entre `processos` processos (padrão: um por núcleo). Se `animacao`
+    # (EscritorAnimacao) for dada, cada quadro é anexado a ela assim que fica pronto.
+    os.makedirs(pasta, exist_ok=True)
+    if salvar_png:
+        for nome in os.listdir(pasta):
+            # Remove quadros de execuções anteriores para não misturá-los com os novos
+            if nome.startswith('snapshot_') and nome.endswith('.png'):
+                os.remove(os.path.join(pasta, nome))
+
+    total_snaps = len(registro)
+    if total_snaps == 0 or n_snapshots <= 0:
         print("Nenhum snapshot gerado; pulando visualizações.")
+        return []
+
+    n_images = min(n_snapshots, total_snaps)
+    indices = np.linspace(0, total_snaps - 1, n_images, dtype=int)
+    indices = sorted(set(int(i) for i in indices))
+    quadros = list(enumerate(indices))
+
+    if processos is None:
+        processos = os.cpu_count() or 1
+    processos = max(1, min(processos, len(quadros)))
+    tamanho = -(-len(quadros) // processos)
+    if animacao is not None and processos > 1:
+        tamanho = min(tamanho, MAX_QUADROS_LOTE_ANIMACAO)
+    lotes = [quadros[i:i + tamanho] for i in range(0, len(quadros), tamanho)]
+    capturar = animacao is not None
+
+    arquivos = []
+    def consumir(resultados):
+        for caminho, quadro in resultados:
+            if caminho:
+                arquivos.append(caminho)
+            if quadro is not None:
+                animacao.adicionar(quadro)
+
+    contexto = _preparar_contexto_render(inst, registro, pasta)
+    if len(lotes) == 1:
+        # Em processo: streaming de verdade, um quadro em memória por vez
+        _iniciar_worker_render(contexto)
+        consumir(_gerar_quadros(lotes[0], salvar_png, capturar))
     else:
-        n_images = min(10, total_snaps)
-        indices = np.linspace(0, total_snaps - 1, n_images, dtype=int)
-        indices = sorted(set(int(i) for i in indices))
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_worker_render,
+                                 initargs=(contexto,)) as pool:
+            # Janela de no máximo `processos` lotes em andamento, consumidos em ordem
+            pendentes = deque()
+            for lote in lotes:
+                pendentes.append(pool.submit(_renderizar_lote, (lote, salvar_png, capturar)))
+                if len(pendentes) >= processos:
+                    consumir(pendentes.popleft().result())
+            while pendentes:
+                consumir(pendentes.popleft().result())
+    return arquivos
 
-        for idx_img, idx_snap in enumerate(indices):
-            snap = snapshots[idx_snap]
-        
-        # Ajuste dinâmico de figura e tamanhos para reduzir sobreposição
-        n_alunos = max(1, len(lista_alunos))
-        n_projetos = max(1, len(lista_projetos))
-        figsize = (12, 12) if (n_alunos + n_projetos) < 200 else (18, 18)
-        plt.figure(figsize=figsize, dpi=150)
+# --- Animação (GIF/MP4) em streaming ---
+class EscritorAnimacao:
+    # Anexa quadros RGB incrementalmente via writers do imageio. O GIF usa o writer
+    # 'GIF-PIL', que grava cada quadro no arquivo assim que o recebe (o writer padrão de
+    # GIF do imageio acumula todos até o close), então a memória fica em um quadro
+    # independentemente do número de passos. O MP4 é opcional e depende do imageio-ffmpeg.
+    def __init__(self, caminho_gif=None, caminho_mp4=None, duracao=0.8):
+        self.escritores = []
+        self.caminhos = []
+        self.n_quadros = 0
+        if caminho_gif:
+            self.escritores.append(imageio.get_writer(caminho_gif, format='GIF-PIL', mode='I',
+                                                      duration=duracao, loop=0))
+            self.caminhos.append(caminho_gif)
+        if caminho_mp4:
+            try:
+                self.escritores.append(imageio.get_writer(caminho_mp4, format='FFMPEG', mode='I',
+                                                          fps=1.0 / duracao))
+                self.caminhos.append(caminho_mp4)
+            except Exception as e:
+                print(f"Aviso: não foi possível gerar MP4 (instale imageio-ffmpeg): {e}")
 
-        # Título Informativo
-        acao_txt = "ACEITO" if snap['resultado'] == 'aceito' else "REJEITADO"
-        cor_titulo = 'green' if snap['resultado'] == 'aceito' else 'red'
-        plt.suptitle(f"Iteração {snap['iteracao']}: {snap['aluno']} tenta {snap['projeto']} -> {acao_txt}", 
-                     fontsize=14, color=cor_titulo, fontweight='bold')
-
-        # Node sizes e fontes adaptativas
-        aluno_node_size = int(max(30, 4000 / n_alunos))
-        proj_node_size = int(max(200, 6000 / n_projetos))
-        aluno_font = 6 if n_alunos > 60 else 8
-        proj_font = 9 if n_projetos < 50 else 8
-
-        # Cria posições levemente deslocadas para labels para reduzir sobreposição
-        label_pos = {}
-        for node, (x, y) in pos.items():
-            if node in lista_alunos:
-                # desloca labels um pouco para fora
-                label_pos[node] = (x * 1.06, y * 1.06)
-            else:
-                # desloca labels um pouco para dentro
-                label_pos[node] = (x * 0.92, y * 0.92)
+    def adicionar(self, quadro):
+        for escritor in self.escritores:
+            escritor.append_data(quadro)
+        self.n_quadros += 1
 
-        # Desenha nós com cores distintas
-        nx.draw_networkx_nodes(G, pos, nodelist=lista_alunos, node_size=aluno_node_size, node_color='#6fa8dc', label='Alunos', alpha=0.9)
-        nx.draw_networkx_nodes(G, pos, nodelist=lista_projetos, node_size=proj_node_size, node_color='#93c47d', label='Projetos', alpha=0.95)
+    def fechar(self):
+        for escritor in self.escritores:
+            escritor.close()
+        self.escritores = []
 
-        # Rótulos usando posições ajustadas
-        nx.draw_networkx_labels(G, label_pos, labels={p: p for p in lista_projetos}, font_size=proj_font, font_weight='bold')
-        nx.draw_networkx_labels(G, label_pos, labels={a: a for a in lista_alunos}, font_size=aluno_font)
+    def __enter__(self):
+        return self
 
-        # 2. Desenha Arestas (Emparelhamentos Estáveis) - COR VERDE
-        conexoes = snap['conexoes_final']
-        edges_verdes = list(conexoes.keys())
+    def __exit__(self, *exc):
+        self.fechar()
 
-        # Remove a aresta atual da lista de verdes para desenhá-la com destaque
-        aresta_atual = (snap['aluno'], snap['projeto'])
-        if aresta_atual in edges_verdes and snap['resultado'] == 'aceito':
-            edges_verdes.remove(aresta_atual)
+# --- Tabelas do Relatório (colunares) ---
+# A tabela final é montada como colunas NumPy em uma passada vetorizada sobre os CSRs
+# (sem laço por aluno) e a matriz de emparelhamento sai em formato longo esparso
+# (uma linha por par alocado) em vez de uma grade densa Projetos x Alunos.
+FORMATOS_TABELA = ('csv', 'parquet', 'xlsx')
+COLUNAS_RESULTADO = ['Aluno', 'Projeto', 'Nota Aluno', 'Rank Escolha', 'Rank no Projeto', 'Ganho/Perda']
 
-        # Desenha arestas estáveis com largura fina e baixa opacidade
-        if edges_verdes:
-            nx.draw_networkx_edges(G, pos, edgelist=edges_verdes, edge_color='#2e8b57', alpha=0.35, width=1)
+def _primeira_ocorrencia(inicio, valores, alvo):
+    # Para cada aluno, índice (no CSR) da primeira posição em que valores == alvo[aluno],
+    # ou -1 se não houver
+    n = len(inicio) - 1
+    aluno_de = np.repeat(np.arange(n, dtype=np.int64), np.diff(inicio))
+    j = np.flatnonzero(valores == alvo[aluno_de])
+    primeira = np.full(n, -1, dtype=np.int64)
+    # j é crescente: a atribuição reversa faz a primeira ocorrência prevalecer
+    primeira[aluno_de[j][::-1]] = j[::-1]
+    return primeira
 
-        # 3. Desenha Ação Atual com destaque
-        if snap['resultado'] == 'aceito':
-            nx.draw_networkx_edges(G, pos, edgelist=[aresta_atual], edge_color='#1f4e79', width=3)
-        else:
-            nx.draw_networkx_edges(G, pos, edgelist=[aresta_atual], edge_color='#b22222', width=3, style='dashed')
-
-        # Legenda melhorada
-        from matplotlib.lines import Line2D
-        legend_elements = [
-            Line2D([0], [0], color='#2e8b57', lw=2, label='Emparelhado (Estável)'),
-            Line2D([0], [0], color='#1f4e79', lw=2, label='Proposta Aceita (Ativa)'),
-            Line2D([0], [0], color='#b22222', lw=2, linestyle='--', label='Proposta Rejeitada'),
-            Line2D([0], [0], marker='o', color='w', markerfacecolor='#6fa8dc', markersize=8, label='Alunos (Externo)'),
-            Line2D([0], [0], marker='o', color='w', markerfacecolor='#93c47d', markersize=10, label='Projetos (Interno)')
-        ]
-        plt.legend(handles=legend_elements, loc='upper right', fontsize=9)
-
-        plt.axis('off')
-        plt.tight_layout()
-        plt.savefig(f"graficos/snapshot_{idx_img+1}.png", dpi=150)
-        plt.close()
+def _normalizar_rank(rank, total):
+    # Score entre 0 e 1 da posição (1 = melhor); listas de tamanho <= 1 valem 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total <= 1, 1.0, 1.0 - ((rank - 1) / (total - 1)))
 
-    print("Snapshots radiais salvos na pasta 'graficos'.")
-    
-    # --- Gerar GIF a partir dos snapshots (se houver) ---
+def _rotulos_rank(rank, vazio):
+    # 1 -> '1ª'; posições < 1 recebem o rótulo `vazio`
+    rotulos = np.char.add(rank.astype(str), 'ª').astype(object)
+    rotulos[rank < 1] = vazio
+    return rotulos
+
+def tabela_resultados(inst, alocacao):
+    # Colunas da tabela final ('Aluno', 'Projeto', 'Nota Aluno', 'Rank Escolha',
+    # 'Rank no Projeto', 'Ganho/Perda') e os arrays numéricos usados nos gráficos.
+    if inst.cand_inicio is None:
+        indexar_candidatos(inst)
+    aloc = np.asarray(alocacao, dtype=np.int64)
+    alocado = aloc >= 0
+    orig_inicio = inst.visao_numpy('orig_inicio')
+    pref_inicio = inst.visao_numpy('pref_inicio')
+    cand_inicio = inst.visao_numpy('cand_inicio')
+    nota = inst.visao_numpy('nota')
+
+    # Rank do projeto na lista original do aluno e do aluno na lista do projeto (0 = N/A)
+    j = _primeira_ocorrencia(orig_inicio, inst.visao_numpy('orig_projeto'), aloc)
+    rank_escolha = np.where(alocado & (j >= 0), j - orig_inicio[:-1] + 1, 0)
+    j = _primeira_ocorrencia(pref_inicio, inst.visao_numpy('pref_projeto'), aloc)
+    m = alocado & (j >= 0)  # pref_rank pode estar vazio: só indexa onde há posição
+    rank_projeto = np.zeros(len(aloc), dtype=np.int64)
+    rank_projeto[m] = inst.visao_numpy('pref_rank')[j[m]] + 1
+
+    # Ganho/Perda: scores normalizados do aluno e do projeto (ver README)
+    total_aluno = np.maximum(np.diff(orig_inicio), 1)
+    total_proj = np.maximum(np.diff(cand_inicio), 1)[np.where(alocado, aloc, 0)]
+    aluno_score = _normalizar_rank(rank_escolha, total_aluno)
+    proj_score = _normalizar_rank(rank_projeto, total_proj)
+    valido = (rank_escolha > 0) & (rank_projeto > 0)
+    ganho = valido & (aluno_score >= proj_score)
+    ganho_perda = np.where(ganho, 'Ganho', np.where(valido | ~alocado, 'Perda', 'N/A')).astype(object)
+
+    codigos_projetos = np.asarray(list(inst.codigos_projetos) + ['-'], dtype=object)
+    return {
+        'Aluno': np.asarray(inst.codigos_alunos, dtype=object),
+        'Projeto': codigos_projetos[aloc],  # -1 indexa o '-' final
+        'Nota Aluno': nota,
+        'Rank Escolha': np.where(alocado, _rotulos_rank(rank_escolha, 'N/A'), 'Não Alocado'),
+        'Rank no Projeto': _rotulos_rank(rank_projeto, 'N/A'),
+        'Ganho/Perda': ganho_perda,
+    }, {'alocacao': aloc, 'rank_escolha': rank_escolha, 'ganho': ganho, 'valido': valido}
+
+def matriz_emparelhamento_longa(inst, alocacao):
+    # Matriz Projeto x Aluno em formato longo: só os pares alocados, ordenados por códigos
+    aloc = np.asarray(alocacao, dtype=np.int64)
+    a = np.flatnonzero(aloc >= 0)
+    df = pd.DataFrame({'Projeto': np.asarray(inst.codigos_projetos, dtype=object)[aloc[a]],
+                       'Aluno': np.asarray(inst.codigos_alunos, dtype=object)[a]})
+    return df.sort_values(['Projeto', 'Aluno'], ignore_index=True)
+
+def _motor_xlsx():
+    # xlsxwriter grava bem mais rápido que o openpyxl quando está instalado
     try:
-        snapshot_files = sorted([f for f in os.listdir('graficos') if f.startswith('snapshot_') and f.endswith('.png')],
-                                key=lambda x: int(x.split('_')[1].split('.')[0]))
-        if snapshot_files:
-            from PIL import Image
-            images = []
-            for fname in snapshot_files:
-                img = Image.open(os.path.join('graficos', fname))
-                images.append(img)
-            
-            # Salva como GIF (PIL trata redimensionamento automaticamente)
-            if images:
-                images[0].save(os.path.join('graficos', 'emparelhamento_animacao.gif'), 
-                              save_all=True, append_images=images[1:], duration=800, loop=0)
-                print("GIF de animação salvo em 'graficos/emparelhamento_animacao.gif'.")
-    except Exception as e:
-        print(f"Aviso: não foi possível gerar GIF de animação: {e}")
-
-    # --- Gerar Matriz de Emparelhamento (Proje x Aluno) ---
-    alunos_list = sorted(alunos.keys())
-    projetos_list = sorted(projetos.keys())
-    matriz = pd.DataFrame('', index=projetos_list, columns=alunos_list)
-    for a in alunos.values():
-        if a.projeto_alocado:
-            matriz.at[a.projeto_alocado.codigo, a.codigo] = 'Alocado'
-
-    matriz.to_excel('graficos/matriz_emparelhamento.xlsx')
-    print("Matriz de emparelhamento salva em 'graficos/matriz_emparelhamento.xlsx'.")
-
-    # --- 2. Matriz de Satisfação e Tabela Final (com Rank no Projeto) ---
-    # Primeiro, constrói ranking por projeto (lista de candidatos que tinham o projeto nas preferências filtradas)
-    ranking_projetos = {}
-    for p_code, proj in projetos.items():
-        candidatos = [a for a in alunos.values() if p_code in getattr(a, 'preferencias_filtradas', [])]
-        # Ordena por nota decrescente (maior nota = preferência maior do projeto)
-        candidatos.sort(key=lambda x: x.nota, reverse=True)
-        ranking_projetos[p_code] = [c.codigo for c in candidatos]
-
-    dados_finais = []
-    rank_satisfacao = {'1ª Opção': 0, '2ª Opção': 0, '3ª Opção': 0, 'Não Alocado': 0}
-
-    for a in alunos.values():
-        if a.projeto_alocado:
-            proj = a.projeto_alocado
-            # Rank do projeto na lista do aluno (posição da escolha do aluno)
-            try:
-                rank_aluno_escolha = a.preferencias_originais.index(proj.codigo) + 1
-                rank_aluno_escolha_str = f"{rank_aluno_escolha}ª"
-                if rank_aluno_escolha == 1: rank_satisfacao['1ª Opção'] += 1
-                elif rank_aluno_escolha == 2: rank_satisfacao['2ª Opção'] += 1
-                elif rank_aluno_escolha == 3: rank_satisfacao['3ª Opção'] += 1
-            except ValueError:
-                rank_aluno_escolha = None
-                rank_aluno_escolha_str = "N/A"
-
-            # Rank do aluno na lista do projeto
-            try:
-                lista_proj = ranking_projetos.get(proj.codigo, [])
-                rank_aluno_no_projeto = lista_proj.index(a.codigo) + 1
-                rank_aluno_no_projeto_str = f"{rank_aluno_no_projeto}ª"
-            except ValueError:
-                rank_aluno_no_projeto = None
-                rank_aluno_no_projeto_str = "N/A"
-
-            # Nova regra Ganho/Perda: comparar posições relativas normalizadas
-            # Calculamos scores normalizados entre 0 e 1 para aluno e projeto
-            def normalized_score(rank, total_list_length):
-                try:
-                    if total_list_length <= 1:
-                        return 1.0
-                    return 1.0 - ((rank - 1) / (total_list_length - 1))
-                except Exception:
-                    return None
-
-            # total possível para aluno = número de preferências originais (se >0)
-            total_aluno = len(a.preferencias_originais) if a.preferencias_originais else 1
-            total_proj = len(ranking_projetos.get(proj.codigo, [])) if ranking_projetos.get(proj.codigo) else 1
-
-            aluno_score = normalized_score(rank_aluno_escolha, total_aluno) if rank_aluno_escolha is not None else None
-            proj_score = normalized_score(rank_aluno_no_projeto, total_proj) if rank_aluno_no_projeto is not None else None
-
-            # Regra: se aluno_score >= proj_score => 'Ganho', caso contrário 'Perda'
-            if aluno_score is None or proj_score is None:
-                ganho_perda = 'N/A'
+        import xlsxwriter  # noqa: F401
+        return 'xlsxwriter'
+    except ModuleNotFoundError:
+        return 'openpyxl'
+
+def salvar_tabela(df, caminho_base, formato='csv'):
+    # Grava `df` em caminho_base + extensão do formato. Parquet depende do pyarrow (ou
+    # fastparquet); sem ele, cai para CSV. Devolve o caminho efetivamente gravado.
+    if formato not in FORMATOS_TABELA:
+        raise ValueError(f"Formato de tabela desconhecido: {formato!r} (use {', '.join(FORMATOS_TABELA)})")
+    if formato == 'parquet':
+        try:
+            df.to_parquet(caminho_base + '.parquet', index=False)
+            return caminho_base + '.parquet'
+        except ImportError:
+            print("Aviso: Parquet indisponível (instale pyarrow); gravando CSV.")
+            formato = 'csv'
+    if formato == 'xlsx':
+        df.to_excel(caminho_base + '.xlsx', index=False, engine=_motor_xlsx())
+        return caminho_base + '.xlsx'
+    df.to_csv(caminho_base + '.csv', index=False, encoding='utf-8')
+    return caminho_base + '.csv'
+
+# --- Execução em Lote de Cenários ---
+# Cada cenário é um arquivo de entrada com ajustes de parâmetros (MAX_PREFERENCES,
+# escala de vagas, política de nota mínima). O lote roda leitura -> filtragem ->
+# emparelhamento -> verificação em um pool de processos, sem visualizações, e junta as
+# métricas de todos os cenários em uma única tabela colunar.
+PARAMETROS_CENARIO = ('max_preferencias', 'escala_vagas', 'delta_nota_minima', 'nota_minima')
+
+def carregar_cenarios(origem, ajustes=None):
+    # `origem`: diretório (um cenário por arquivo .txt) ou manifesto JSON, uma lista de
+    # objetos {"entrada": ..., "nome": ..., <parâmetros>} ou {"cenarios": [...]} com
+    # caminhos relativos ao manifesto. `ajustes` (parâmetro -> lista de valores) gera o
+    # produto cartesiano dos valores para cada cenário.
+    if os.path.isdir(origem):
+        base = [{'entrada': os.path.join(origem, nome)}
+                for nome in sorted(os.listdir(origem)) if nome.endswith('.txt')]
+    else:
+        with open(origem, 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+        if isinstance(manifesto, dict):
+            manifesto = manifesto['cenarios']
+        pasta = os.path.dirname(os.path.abspath(origem))
+        base = [dict(c, entrada=os.path.join(pasta, c['entrada'])) for c in manifesto]
+
+    cenarios = []
+    for cenario in base:
+        cenario.setdefault('nome', os.path.splitext(os.path.basename(cenario['entrada']))[0])
+        combinacoes = [{}]
+        for parametro, valores in (ajustes or {}).items():
+            combinacoes = [dict(c, **{parametro: v}) for c in combinacoes for v in valores]
+        for combinacao in combinacoes:
+            sufixo = ','.join(f"{k}={v}" for k, v in combinacao.items())
+            nome = f"{cenario['nome']}[{sufixo}]" if sufixo else cenario['nome']
+            cenarios.append(dict(cenario, nome=nome, **combinacao))
+    for cenario in cenarios:
+        desconhecidos = set(cenario) - {'nome', 'entrada', *PARAMETROS_CENARIO}
+        if desconhecidos:
+            raise ValueError(f"Cenário {cenario['nome']}: parâmetros desconhecidos {sorted(desconhecidos)}")
+        max_prefs = cenario.get('max_preferencias')
+        if max_prefs is not None and not 1 <= max_prefs <= LIMITE_PREFERENCES:
+            raise ValueError(f"Cenário {cenario['nome']}: max_preferencias deve estar entre 1 e {LIMITE_PREFERENCES}")
+    return cenarios
+
+def aplicar_ajustes(inst, cenario):
+    # Ajustes de vagas e nota mínima sobre a instância lida (antes da filtragem)
+    escala = cenario.get('escala_vagas')
+    if escala is not None:
+        for p, v in enumerate(inst.vagas):
+            inst.vagas[p] = max(0, round(v * escala))
+    if cenario.get('nota_minima') is not None:
+        for p in range(inst.n_projetos):
+            inst.nota_minima[p] = cenario['nota_minima']
+    delta = cenario.get('delta_nota_minima')
+    if delta:
+        for p, n_min in enumerate(inst.nota_minima):
+            inst.nota_minima[p] = max(0, n_min + delta)
+
+def executar_cenario(cenario):
+    # Pipeline sem visualizações para um cenário; devolve um dicionário de métricas
+    global MAX_PREFERENCES
+    inicio = time.perf_counter()
+    max_original = MAX_PREFERENCES
+    MAX_PREFERENCES = cenario.get('max_preferencias') or max_original
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            inst = carregar_instancia(cenario['entrada'])
+            aplicar_ajustes(inst, cenario)
+            filtrar_instancia(inst)
+        t_carga = time.perf_counter()
+        motor = MotorGaleShapley(inst, registrar=False)
+        motor.executar()
+        t_match = time.perf_counter()
+        status, pares = verificar_estabilidade_rapida(inst, motor.alocacao)
+        t_fim = time.perf_counter()
+    finally:
+        MAX_PREFERENCES = max_original
+
+    aloc = np.asarray(motor.alocacao, dtype=np.int64)
+    orig_inicio = inst.visao_numpy('orig_inicio')
+    j = _primeira_ocorrencia(orig_inicio, inst.visao_numpy('orig_projeto'), aloc)
+    rank = np.where((aloc >= 0) & (j >= 0), j - orig_inicio[:-1] + 1, 0)
+    alocados = int((aloc >= 0).sum())
+    total_vagas = int(inst.visao_numpy('vagas').sum())
+
+    metricas = {'nome': cenario['nome'], 'entrada': cenario['entrada']}
+    metricas.update({p: cenario.get(p) for p in PARAMETROS_CENARIO})
+    metricas.update({
+        'n_alunos': inst.n_alunos,
+        'n_projetos': inst.n_projetos,
+        'alocados': alocados,
+        'taxa_alocacao': alocados / inst.n_alunos if inst.n_alunos else 0.0,
+        'vagas': total_vagas,
+        'taxa_ocupacao': alocados / total_vagas if total_vagas else 0.0,
+        'iteracoes': motor.propostas,
+        'estavel': status == ESTAVEL,
+        'pares_bloqueadores': len(pares),
+        'tempo_carga_s': t_carga - inicio,
+        'tempo_emparelhamento_s': t_match - t_carga,
+        'tempo_verificacao_s': t_fim - t_match,
+        'tempo_total_s': t_fim - inicio,
+    })
+    # Distribuição de rank: alunos alocados na k-ésima opção da lista original
+    for k, quantidade in enumerate(np.bincount(rank, minlength=2)[1:], 1):
+        metricas[f'rank_{k}'] = int(quantidade)
+    return metricas
+
+def executar_lote(cenarios, processos=None):
+    # Um cenário por tarefa em um pool de processos; cenários são independentes, então a
+    # vazão cresce com o número de núcleos. A tabela sai na ordem dos cenários.
+    if processos is None:
+        processos = os.cpu_count() or 1
+    processos = max(1, min(processos, len(cenarios)))
+    if processos == 1:
+        resultados = [executar_cenario(c) for c in cenarios]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            resultados = list(pool.map(executar_cenario, cenarios))
+
+    df = pd.DataFrame(resultados)
+    colunas_rank = sorted((c for c in df.columns if c.startswith('rank_')), key=lambda c: int(c[5:]))
+    df[colunas_rank] = df[colunas_rank].fillna(0).astype(np.int64)
+    return df[[c for c in df.columns if not c.startswith('rank_')] + colunas_rank]
+
+# --- Varredura de Parâmetros com Partida a Quente ---
+# Varre vagas e notas mínimas sobre uma mesma coorte sem refazer cada ponto do zero: um
+# único ReemparelhamentoCompacto passa de ponto em ponto aplicando só as diferenças
+# (projetos cujas vagas ou nota mínima mudaram) e reparando a partir do emparelhamento
+# estável anterior. Os pontos são ordenados em serpentina: o parâmetro com menos valores
+# distintos fica no nível externo, do mais fechado para o mais aberto (mais vagas, nota
+# mínima menor), e os internos alternam a direção, então passos consecutivos diferem num
+# único valor do parâmetro mais fino e a maioria só abre o mercado um pouco: na proposta
+# pelos alunos isso só gera propostas adicionais (cadeias de vacância), sem refazer quem
+# não foi afetado. Notas iguais são desempatadas pela ordem de leitura (por_ranking), o que
+# torna o emparelhamento de cada ponto único: é exatamente o de MotorGaleShapley com
+# por_ranking=True sobre a instância do ponto, qualquer que seja a ordem da varredura
+# (com notas distintas, o mesmo do motor padrão).
+PARAMETROS_VARREDURA = ('escala_vagas', 'delta_vagas', 'nota_minima', 'delta_nota_minima')
+# +1: valores maiores abrem o mercado (mais vagas); -1: valores menores abrem (nota mínima)
+_DIRECAO_VARREDURA = {'escala_vagas': 1, 'delta_vagas': 1, 'nota_minima': -1, 'delta_nota_minima': -1}
+
+def grade_varredura(**valores):
+    # Produto cartesiano dos valores de cada parâmetro: grade_varredura(delta_vagas=range(3),
+    # delta_nota_minima=[-1, 0]) -> [{'delta_vagas': 0, 'delta_nota_minima': -1}, ...]
+    desconhecidos = set(valores) - set(PARAMETROS_VARREDURA)
+    if desconhecidos:
+        raise ValueError(f"parâmetros de varredura desconhecidos: {sorted(desconhecidos)}")
+    pontos = [{}]
+    for parametro in PARAMETROS_VARREDURA:
+        if parametro in valores:
+            pontos = [dict(p, **{parametro: v}) for p in pontos for v in valores[parametro]]
+    return pontos
+
+def ordenar_pontos(pontos):
+    # Índices dos pontos na ordem de execução (serpentina). Parâmetro ausente = valor base,
+    # que vem antes de qualquer valor na direção de abertura. Os parâmetros com menos valores
+    # distintos ficam nos níveis externos (empate: ordem de PARAMETROS_VARREDURA)
+    parametros = [p for p in PARAMETROS_VARREDURA if any(ponto.get(p) is not None for ponto in pontos)]
+    parametros.sort(key=lambda p: len({ponto.get(p) for ponto in pontos}))
+
+    def chave(i):
+        return tuple(float('-inf') if pontos[i].get(p) is None else _DIRECAO_VARREDURA[p] * pontos[i][p]
+                     for p in parametros)
+
+    def serpentina(indices, nivel, crescente):
+        if nivel == len(parametros):
+            return indices
+        indices = sorted(indices, key=lambda i: chave(i)[nivel], reverse=not crescente)
+        ordem, direcao = [], True
+        for _, grupo in itertools.groupby(indices, key=lambda i: chave(i)[nivel]):
+            ordem += serpentina(list(grupo), nivel + 1, direcao)
+            direcao = not direcao
+        return ordem
+
+    return serpentina(list(range(len(pontos))), 0, True)
+
+def parametros_ponto(vagas, nota_minima, ponto, projetos=None):
+    # Vagas e notas mínimas de um ponto a partir dos valores base (arrays NumPy), com as
+    # mesmas regras de aplicar_ajustes; `projetos` (ids) restringe o ajuste a um subconjunto
+    vagas_alvo, nota_alvo = vagas.astype(np.int64), nota_minima.astype(np.int64)
+    sel = slice(None) if projetos is None else projetos
+    if ponto.get('escala_vagas') is not None:
+        vagas_alvo[sel] = np.maximum(0, np.round(vagas_alvo[sel] * ponto['escala_vagas']))
+    if ponto.get('delta_vagas'):
+        vagas_alvo[sel] = np.maximum(0, vagas_alvo[sel] + ponto['delta_vagas'])
+    if ponto.get('nota_minima') is not None:
+        nota_alvo[sel] = ponto['nota_minima']
+    if ponto.get('delta_nota_minima'):
+        nota_alvo[sel] = np.maximum(0, nota_alvo[sel] + ponto['delta_nota_minima'])
+    return vagas_alvo, nota_alvo
+
+def executar_varredura(inst, pontos, projetos=None, ordenar=True, verificar=False, progresso=None):
+    # Métricas de cada ponto (mesmas colunas de executar_cenario, na ordem de `pontos`):
+    # alocação, ocupação, distribuição de rank (rank_k = alunos na k-ésima opção da lista
+    # original), alunos que mudaram de projeto em relação ao ponto anterior da execução e
+    # tempo do passo. `inst` é a instância filtrada (valores base); projetos = códigos a
+    # ajustar (padrão: todos). verificar=True confere a estabilidade de cada ponto
+    # (O(preferências) por ponto). progresso(k, total) é chamado após cada ponto.
+    ids = None if projetos is None else np.array([inst.indice_projetos[p] for p in projetos], dtype=np.int64)
+    ordem = ordenar_pontos(pontos) if ordenar else list(range(len(pontos)))
+    reparo = ReemparelhamentoCompacto(inst, por_ranking=True)
+    vagas_base, nota_base = inst.visao_numpy('vagas'), inst.visao_numpy('nota_minima')
+    vagas_atual = np.frombuffer(reparo.vagas, dtype=np.intc)
+    nota_atual = np.frombuffer(reparo.nota_minima, dtype=np.intc)
+    posicao = np.frombuffer(reparo.posicao, dtype=np.intc)
+    n_alunos = inst.n_alunos
+
+    linhas = [None] * len(pontos)
+    for k, i in enumerate(ordem):
+        inicio = time.perf_counter()
+        vagas_alvo, nota_alvo = parametros_ponto(vagas_base, nota_base, pontos[i], ids)
+        edicoes = [('alterar_nota_minima', int(p), int(nota_alvo[p]))
+                   for p in np.flatnonzero(nota_alvo != nota_atual)]
+        edicoes += [('alterar_vagas', int(p), int(vagas_alvo[p]))
+                    for p in np.flatnonzero(vagas_alvo != vagas_atual)]
+        mudancas = reparo.aplicar(edicoes)
+        alocado = posicao != ReemparelhamentoCompacto.SEM_POSICAO
+        alocados = int(np.count_nonzero(alocado))
+        total_vagas = int(vagas_atual.sum())
+        linha = {p: pontos[i].get(p) for p in PARAMETROS_VARREDURA}
+        linha.update({
+            'ordem_execucao': k,
+            'alocados': alocados,
+            'taxa_alocacao': alocados / n_alunos if n_alunos else 0.0,
+            'vagas': total_vagas,
+            'taxa_ocupacao': alocados / total_vagas if total_vagas else 0.0,
+            'projetos_alterados': len(edicoes),
+            'mudancas': len(mudancas),
+        })
+        if verificar:
+            status, pares = reparo.verificar()
+            linha.update({'estavel': status == ESTAVEL, 'pares_bloqueadores': len(pares)})
+        linha['tempo_s'] = time.perf_counter() - inicio
+        for r, quantidade in enumerate(np.bincount(posicao[alocado], minlength=1), 1):
+            linha[f'rank_{r}'] = int(quantidade)
+        linhas[i] = linha
+        if progresso is not None:
+            progresso(k + 1, len(pontos))
+
+    df = pd.DataFrame(linhas)
+    colunas_rank = sorted((c for c in df.columns if c.startswith('rank_')), key=lambda c: int(c[5:]))
+    df[colunas_rank] = df[colunas_rank].fillna(0).astype(np.int64)
+    return df[[c for c in df.columns if not c.startswith('rank_')] + colunas_rank]
+
+# --- Visualização Agregada (instâncias grandes) ---
+# Acima de LIMITE_NOS_RADIAL nós (alunos + projetos) o layout radial fica lento e ilegível.
+# No lugar dos snapshots, três visões agregadas calculadas direto dos arrays do registro
+# de propostas (sem reconstruir estados quadro a quadro):
+#   - ocupacao_projetos.png: mapa de calor da taxa de ocupação dos projetos mais
+#     disputados ao longo das iterações;
+#   - subgrafo_amostrado.png: propostas aceitas/rejeitadas em torno de alguns projetos;
+#   - densidade_arestas.png: arestas finais do layout radial somadas em uma grade.
+LIMITE_NOS_RADIAL = 2000
+MAX_PROJETOS_GRAFICO = 50  # barras no gráfico de ganho/perda por projeto
+
+def _arrays_registro(registro):
+    projeto = np.frombuffer(registro.projeto, dtype=np.intc) if len(registro) else np.zeros(0, np.intc)
+    aluno = np.frombuffer(registro.aluno, dtype=np.intc) if len(registro) else np.zeros(0, np.intc)
+    aceito = np.frombuffer(registro.aceito, dtype=np.int8) if len(registro) else np.zeros(0, np.int8)
+    removido = np.frombuffer(registro.removido, dtype=np.intc) if len(registro) else np.zeros(0, np.intc)
+    return aluno, projeto, aceito, removido
+
+def _projetos_mais_disputados(inst, projeto, n):
+    propostas = np.bincount(projeto, minlength=inst.n_projetos)
+    return np.argsort(-propostas, kind='stable')[:min(n, inst.n_projetos)]
+
+def ocupacao_por_iteracao(inst, registro, n_projetos=100, n_colunas=200):
+    # Taxa de ocupação (alocados / vagas) de n_projetos projetos ao fim de cada uma de
+    # n_colunas faixas de propostas. Cada aceite soma +1 no projeto e -1 no projeto que o
+    # aluno deixou (proposta pelos projetos), cada despejo -1 (proposta pelos alunos); a
+    # ocupação é a soma acumulada dessas variações ao longo das faixas.
+    aluno, projeto, aceito, removido = _arrays_registro(registro)
+    selecionados = _projetos_mais_disputados(inst, projeto, n_projetos)
+    linha = np.full(inst.n_projetos + 1, -1, dtype=np.int64)  # última posição: sem projeto
+    linha[selecionados] = np.arange(len(selecionados))
+    n_colunas = max(1, min(n_colunas, len(projeto)))
+    faixa = np.arange(len(projeto), dtype=np.int64) * n_colunas // max(1, len(projeto))
+
+    aceites = np.flatnonzero(aceito)
+    despejos = np.flatnonzero(removido != RegistroPropostas.SEM_ALUNO)
+    # Projeto anterior de cada aluno aceito: evento anterior do mesmo aluno (aceite em outro
+    # projeto ou despejo, que o deixa sem projeto)
+    ev_aluno = np.concatenate([aluno[aceites], removido[despejos]])
+    ev_indice = np.concatenate([aceites, despejos])
+    ev_projeto = np.concatenate([projeto[aceites], np.full(len(despejos), -1, dtype=projeto.dtype)])
+    ordem = np.lexsort((ev_indice, ev_aluno))
+    anterior = np.full(len(ordem), -1, dtype=np.int64)
+    mesmo = ev_aluno[ordem[1:]] == ev_aluno[ordem[:-1]]
+    anterior[ordem[1:][mesmo]] = ev_projeto[ordem[:-1][mesmo]]
+    saiu = anterior[:len(aceites)] >= 0
+
+    indices = np.concatenate([aceites, despejos, aceites[saiu]])
+    projetos_ev = np.concatenate([projeto[aceites], projeto[despejos], anterior[:len(aceites)][saiu]])
+    pesos = np.concatenate([np.ones(len(aceites)), -np.ones(len(despejos)), -np.ones(int(saiu.sum()))])
+    l = linha[projetos_ev]
+    sel = l >= 0
+    grade = np.bincount(l[sel] * n_colunas + faixa[indices[sel]], weights=pesos[sel],
+                        minlength=len(selecionados) * n_colunas).reshape(len(selecionados), n_colunas)
+    ocupacao = np.cumsum(grade, axis=1)
+    vagas = inst.visao_numpy('vagas')[selecionados].astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taxa = np.where(vagas[:, None] > 0, ocupacao / vagas[:, None], np.nan)
+    # Linhas em ordem de quando cada projeto lotou (os que nunca lotam no fim)
+    lotou = np.where((taxa >= 1).any(axis=1), np.argmax(taxa >= 1, axis=1), n_colunas)
+    ordem = np.argsort(lotou, kind='stable')
+    # Iterações contadas por proposta, como no relatório (registro.iteracao guarda as
+    # retiradas da fila, que pulam os alunos sem opções restantes)
+    limites = np.maximum(1, (np.arange(1, n_colunas + 1) * len(registro)) // n_colunas)
+    return taxa[ordem], selecionados[ordem], limites
+
+def amostrar_subgrafo(inst, registro, alocacao, projetos=None, n_projetos=5, max_alunos=150):
+    # Propostas envolvendo alguns projetos (códigos em `projetos` ou os mais disputados).
+    # Devolve (projetos, alunos, arestas finais [(a, p)], rejeições [(a, p)]); alunos
+    # alocados nesses projetos têm prioridade, depois os rejeitados de maior nota.
+    aluno, projeto, aceito, _ = _arrays_registro(registro)
+    if projetos:
+        escolhidos = np.array([inst.indice_projetos[c] for c in projetos], dtype=np.int64)
+    else:
+        escolhidos = _projetos_mais_disputados(inst, projeto, n_projetos)
+    aloc = np.asarray(alocacao, dtype=np.int64)
+    no_subgrafo = np.zeros(inst.n_projetos, dtype=bool)
+    no_subgrafo[escolhidos] = True
+
+    alocados = np.flatnonzero((aloc >= 0) & no_subgrafo[np.maximum(aloc, 0)])
+    mascara = no_subgrafo[projeto] & (aceito == 0)
+    rejeitados = np.setdiff1d(np.unique(aluno[mascara]), alocados)
+    nota = inst.visao_numpy('nota')
+    rejeitados = rejeitados[np.argsort(-nota[rejeitados], kind='stable')]
+    alunos = np.concatenate([alocados, rejeitados])[:max_alunos]
+
+    incluido = np.zeros(inst.n_alunos, dtype=bool)
+    incluido[alunos] = True
+    # Alunos agrupados pelo projeto (alocação final ou primeira rejeição), por nota decrescente
+    posicao = np.full(inst.n_projetos, len(escolhidos), dtype=np.int64)
+    posicao[escolhidos] = np.arange(len(escolhidos))
+    grupo = np.full(inst.n_alunos, len(escolhidos), dtype=np.int64)
+    sel = mascara & incluido[aluno]
+    primeira = np.unique(aluno[sel], return_index=True)
+    grupo[primeira[0]] = posicao[projeto[sel][primeira[1]]]
+    alocado_aqui = (aloc[alunos] >= 0) & no_subgrafo[np.maximum(aloc[alunos], 0)]
+    grupo[alunos[alocado_aqui]] = posicao[aloc[alunos[alocado_aqui]]]
+    alunos = alunos[np.lexsort((-nota[alunos], grupo[alunos]))]
+    finais = [(int(a), int(aloc[a])) for a in alunos if aloc[a] >= 0 and no_subgrafo[aloc[a]]]
+    rejeicoes = sorted(set(zip(aluno[sel].tolist(), projeto[sel].tolist())))
+    return escolhidos, alunos, finais, rejeicoes
+
+def densidade_arestas(inst, alocacao, resolucao=512, pontos_por_aresta=32):
+    # Arestas finais do layout radial rasterizadas: pontos amostrados ao longo de cada
+    # segmento aluno -> projeto somados em uma grade resolucao x resolucao
+    ctx = _preparar_contexto_render(inst, None, None)
+    aloc = np.asarray(alocacao, dtype=np.int64)
+    a = np.flatnonzero(aloc >= 0)
+    origem, destino = ctx['pos_aluno'][a], ctx['pos_proj'][aloc[a]]
+    limite = 25 * 1.12
+    grade = np.zeros((resolucao, resolucao))
+    t = np.linspace(0, 1, pontos_por_aresta)
+    # Em blocos para limitar a memória dos pontos intermediários
+    for i in range(0, len(a), 65536):
+        o, d = origem[i:i + 65536], destino[i:i + 65536]
+        x = (o[:, 0, None] + (d[:, 0, None] - o[:, 0, None]) * t).ravel()
+        y = (o[:, 1, None] + (d[:, 1, None] - o[:, 1, None]) * t).ravel()
+        h, _, _ = np.histogram2d(y, x, bins=resolucao, range=[[-limite, limite], [-limite, limite]])
+        grade += h
+    return grade, limite
+
+def gerar_visualizacao_agregada(inst, registro, alocacao, pasta='graficos', projetos_amostra=None):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import LogNorm
+
+    print(f"Instância grande ({inst.n_alunos} alunos, {inst.n_projetos} projetos): gerando visões agregadas...")
+
+    # --- Mapa de calor de ocupação ---
+    taxa, selecionados, limites = ocupacao_por_iteracao(inst, registro)
+    fig = Figure(figsize=(14, 8), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    imagem = ax.imshow(taxa, aspect='auto', cmap='viridis', vmin=0, vmax=1, interpolation='nearest')
+    n_colunas = taxa.shape[1]
+    marcas = np.linspace(0, n_colunas - 1, min(8, n_colunas)).astype(int)
+    ax.set_xticks(marcas, [str(limites[m]) for m in marcas])
+    passo = max(1, len(selecionados) // 25)
+    ax.set_yticks(np.arange(0, len(selecionados), passo),
+                  [inst.codigos_projetos[p] for p in selecionados[::passo]], fontsize=7)
+    ax.set_xlabel('Iteração (propostas)')
+    ax.set_ylabel(f'Projetos ({len(selecionados)} mais disputados, pela ordem em que lotaram)')
+    ax.set_title('Taxa de Ocupação dos Projetos ao Longo das Iterações')
+    fig.colorbar(imagem, ax=ax, label='alocados / vagas')
+    fig.tight_layout()
+    fig.savefig(os.path.join(pasta, 'ocupacao_projetos.png'))
+
+    # --- Subgrafo amostrado (projetos à esquerda, alunos à direita) ---
+    escolhidos, alunos, finais, rejeicoes = amostrar_subgrafo(inst, registro, alocacao, projetos_amostra)
+    y_proj = {int(p): i for i, p in enumerate(escolhidos)}
+    escala = max(1, len(alunos) - 1) / max(1, len(escolhidos) - 1)
+    y_aluno = {int(a): i / escala for i, a in enumerate(alunos)}
+    fig = Figure(figsize=(12, max(6, len(alunos) * 0.08)), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    from matplotlib.collections import LineCollection
+    ax.add_collection(LineCollection([((0, y_proj[p]), (1, y_aluno[a])) for a, p in rejeicoes],
+                                     colors='#b22222', linestyles='dashed', linewidths=0.5, alpha=0.4))
+    ax.add_collection(LineCollection([((0, y_proj[p]), (1, y_aluno[a])) for a, p in finais],
+                                     colors='#2e8b57', linewidths=1.2))
+    ax.scatter(np.zeros(len(escolhidos)), list(y_proj.values()), s=200, c='#93c47d', zorder=3)
+    ax.scatter(np.ones(len(alunos)), list(y_aluno.values()), s=12, c='#6fa8dc', zorder=3)
+    for p, y in y_proj.items():
+        ax.text(-0.03, y, inst.codigos_projetos[p], ha='right', va='center', fontsize=9, fontweight='bold')
+    if len(alunos) <= 60:
+        for a, y in y_aluno.items():
+            ax.text(1.03, y, f"{inst.codigos_alunos[a]} ({inst.nota[a]})", ha='left', va='center', fontsize=7)
+    ax.set_xlim(-0.3, 1.3)
+    ax.invert_yaxis()
+    ax.axis('off')
+    ax.set_title(f'Subgrafo Amostrado: {len(escolhidos)} projetos, {len(alunos)} alunos '
+                 '(verde = alocação final, vermelho = proposta rejeitada)')
+    fig.tight_layout()
+    fig.savefig(os.path.join(pasta, 'subgrafo_amostrado.png'))
+
+    # --- Densidade de arestas ---
+    grade, limite = densidade_arestas(inst, alocacao)
+    fig = Figure(figsize=(10, 10), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    if grade.any():
+        ax.imshow(grade, origin='lower', extent=(-limite, limite, -limite, limite), cmap='magma',
+                  norm=LogNorm(vmin=1, vmax=grade.max()), interpolation='nearest')
+    ax.set_facecolor('black')
+    ax.axis('off')
+    ax.set_title('Densidade das Arestas Finais (layout radial: projetos no centro, alunos fora)')
+    fig.tight_layout()
+    fig.savefig(os.path.join(pasta, 'densidade_arestas.png'))
+    print(f"Visões agregadas salvas em '{pasta}' (ocupacao_projetos, subgrafo_amostrado, densidade_arestas).")
+
+def gerar_snapshots(inst, registro, pasta='graficos', n_snapshots=10, processos=None,
+                    n_quadros_animacao=None, mp4=False):
+    print("Gerando visualizações com layout Radial (Circular)...")
+    # --- Snapshots + animação (GIF e, opcionalmente, MP4) ---
+    # Os PNGs são gravados primeiro, fora da animação: uma falha do writer (GIF-PIL,
+    # ffmpeg) não pode apagá-los, e um erro de renderização falha a tarefa. Com o mesmo
+    # número de quadros a animação é montada a partir dos PNGs gravados, um por vez;
+    # animações mais longas (milhares de passos) são renderizadas sem salvar PNGs.
+    if n_quadros_animacao is None:
+        n_quadros_animacao = n_snapshots
+    arquivos = renderizar_snapshots(inst, registro, pasta, n_snapshots, processos)
+    if not arquivos:
+        return
+    print(f"Snapshots radiais salvos na pasta '{pasta}'.")
+
+    caminho_gif = os.path.join(pasta, 'emparelhamento_animacao.gif')
+    caminho_mp4 = os.path.join(pasta, 'emparelhamento_animacao.mp4') if mp4 else None
+    try:
+        with EscritorAnimacao(caminho_gif, caminho_mp4) as animacao:
+            if n_quadros_animacao == n_snapshots:
+                for caminho in arquivos:
+                    animacao.adicionar(imageio.imread(caminho)[..., :3])
             else:
-                ganho_perda = 'Ganho' if aluno_score >= proj_score else 'Perda'
+                renderizar_snapshots(inst, registro, pasta, n_quadros_animacao, processos,
+                                     animacao, salvar_png=False)
+        for caminho in animacao.caminhos:
+            print(f"Animação salva em '{caminho}' ({animacao.n_quadros} quadros).")
+    except Exception as e:
+        print(f"Aviso: não foi possível gerar a animação: {e}")
+
+def gerar_graficos_propostas(inst, registro, alocacao, pasta='graficos', n_snapshots=10, processos=None,
+                             n_quadros_animacao=None, mp4=False, limite_nos=LIMITE_NOS_RADIAL,
+                             projetos_amostra=None):
+    # Gráficos que dependem do registro de propostas: snapshots radiais e animação ou,
+    # acima de limite_nos nós, as visões agregadas
+    os.makedirs(pasta, exist_ok=True)
+    if registro is None:
+        print("Sem registro de propostas (alocação do solver): snapshots e visões agregadas omitidos.")
+    elif inst.n_alunos + inst.n_projetos > limite_nos:
+        gerar_visualizacao_agregada(inst, registro, alocacao, pasta, projetos_amostra)
+    else:
+        gerar_snapshots(inst, registro, pasta, n_snapshots, processos, n_quadros_animacao, mp4)
+
+def gerar_tabelas(inst, alocacao, pasta='graficos', formato_tabelas='csv'):
+    # formato_tabelas: 'csv' (padrão), 'parquet' ou 'xlsx' para resultado_final e a matriz.
+    os.makedirs(pasta, exist_ok=True)
+    # --- Gerar Matriz de Emparelhamento (formato longo: Projeto, Aluno) ---
+    caminho = salvar_tabela(matriz_emparelhamento_longa(inst, alocacao),
+                            os.path.join(pasta, 'matriz_emparelhamento'), formato_tabelas)
+    print(f"Matriz de emparelhamento salva em '{caminho}'.")
+
+    # --- Tabela Final (com Rank no Projeto) ---
+    colunas, _ = tabela_resultados(inst, alocacao)
+    df_final = pd.DataFrame(colunas, columns=COLUNAS_RESULTADO)
+    caminho = salvar_tabela(df_final, os.path.join(pasta, 'resultado_final'), formato_tabelas)
+    print(f"Tabela final salva em '{caminho}'.")
+
+def gerar_graficos_resumo(inst, alocacao, pasta='graficos'):
+    os.makedirs(pasta, exist_ok=True)
+    lista_projetos = inst.codigos_projetos
+    _, valores = tabela_resultados(inst, alocacao)
+    por_rank = np.bincount(valores['rank_escolha'], minlength=4)
+    rank_satisfacao = {'1ª Opção': int(por_rank[1]), '2ª Opção': int(por_rank[2]),
+                       '3ª Opção': int(por_rank[3]),
+                       'Não Alocado': int((valores['alocacao'] < 0).sum())}
 
-            dados_finais.append([a.codigo, proj.codigo, a.nota, rank_aluno_escolha_str, rank_aluno_no_projeto_str, ganho_perda])
-        else:
-            dados_finais.append([a.codigo, "-", a.nota, "Não Alocado", "N/A", 'Perda'])
-            rank_satisfacao['Não Alocado'] += 1
-            
-    df_final = pd.DataFrame(dados_finais, columns=['Aluno', 'Projeto', 'Nota Aluno', 'Rank Escolha', 'Rank no Projeto', 'Ganho/Perda'])
-    df_final.to_excel("graficos/resultado_final.xlsx", index=False)
-    
     # --- 3. Gráfico de Satisfação ---
     plt.figure(figsize=(8, 6))
     plt.bar(rank_satisfacao.keys(), rank_satisfacao.values(), color=['gold', 'silver', 'brown', 'gray'])
@@ -410,22 +3155,21 @@ def gerar_visualizacoes(projetos, alunos, snapshots):
     plt.ylabel("Quantidade de Alunos")
     for i, v in enumerate(rank_satisfacao.values()):
         plt.text(i, v + 1, str(v), ha='center')
-    plt.savefig("graficos/indice_satisfacao.png")
+    plt.savefig(os.path.join(pasta, "indice_satisfacao.png"))
     plt.close()
     
     # --- 4. Gráfico de Ganho/Perda por Projeto ---
-    ganho_perda_proj = {}
-    for p_code in projetos.keys():
-        ganho_perda_proj[p_code] = {'Ganho': 0, 'Perda': 0}
-    
-    for row in dados_finais:
-        aluno_cod, proj_cod, nota, rank_esc, rank_proj, ganho_perda = row
-        if proj_cod != "-" and ganho_perda in ['Ganho', 'Perda']:
-            ganho_perda_proj[proj_cod][ganho_perda] += 1
-    
-    # Filtra projetos com alocações
-    proj_com_alocacao = {p: gp for p, gp in ganho_perda_proj.items() if gp['Ganho'] + gp['Perda'] > 0}
-    
+    aloc, ganho, valido = valores['alocacao'], valores['ganho'], valores['valido']
+    ganhos_proj = np.bincount(aloc[ganho], minlength=inst.n_projetos)
+    perdas_proj = np.bincount(aloc[valido & ~ganho], minlength=inst.n_projetos)
+    com_alocacao = np.flatnonzero(ganhos_proj + perdas_proj)
+    if len(com_alocacao) > MAX_PROJETOS_GRAFICO:
+        # Instâncias grandes: só os projetos com mais alunos, na ordem original
+        total = (ganhos_proj + perdas_proj)[com_alocacao]
+        com_alocacao = np.sort(com_alocacao[np.argsort(-total, kind='stable')[:MAX_PROJETOS_GRAFICO]])
+    proj_com_alocacao = {lista_projetos[p]: {'Ganho': int(ganhos_proj[p]), 'Perda': int(perdas_proj[p])}
+                         for p in com_alocacao}
+
     if proj_com_alocacao:
         projetos_nomes = list(proj_com_alocacao.keys())
         ganhos = [proj_com_alocacao[p]['Ganho'] for p in projetos_nomes]
@@ -443,46 +3187,500 @@ def gerar_visualizacoes(projetos, alunos, snapshots):
         plt.xticks(x, projetos_nomes, rotation=45, ha='right')
         plt.legend()
         plt.tight_layout()
-        plt.savefig("graficos/ganho_perda_por_projeto.png", dpi=150)
+        plt.savefig(os.path.join(pasta, "ganho_perda_por_projeto.png"), dpi=150)
         plt.close()
     
-    print("Gráfico de satisfação, ganho/perda por projeto e tabela Excel salvos.")
+    print("Gráfico de satisfação e ganho/perda por projeto salvos.")
 
-# --- Execução Principal ---
-if __name__ == "__main__":
-    arquivo_entrada = 'entradaProj2.txt'
-    
-    if not os.path.exists(arquivo_entrada):
-        print(f"ERRO: Crie o arquivo '{arquivo_entrada}' com os dados primeiro!")
-    else:
-        print("--- 1. Carregando ---")
-        projs, alus = carregar_dados(arquivo_entrada)
-        
-        print("--- 2. Filtrando ---")
-        filtrar_preferencias(projs, alus)
-        
-        print("--- 3. Executando Gale-Shapley ---")
-        historico = executar_gale_shapley(projs, alus)
-        print(f"Total de iterações: {len(historico)}")
-        
-        print("--- 4. Gerando Visualizações ---")
-        gerar_visualizacoes(projs, alus, historico)
-        
-        # --- 5. Verificar Estabilidade ---
-        print("--- 5. Verificando Estabilidade ---")
-        é_estavel, blocking_pairs = verificar_estabilidade(projs, alus)
-        print(f"Emparelhamento é estável: {é_estavel}")
-        if not é_estavel:
-            print(f"Pares bloqueadores encontrados: {len(blocking_pairs)}")
-        
-        # --- 6. Gerar Relatório Resumido ---
-        print("--- 6. Gerando Relatório Resumido ---")
-        total_alunos = len(alus)
-        alocados = len([a for a in alus.values() if a.projeto_alocado])
-        total_vagas = sum(p.vagas for p in projs.values())
-        vagas_preenchidas = sum(len(p.alunos_alocados) for p in projs.values())
-        
-        relatorio = f"""RELATÓRIO DE EMPARELHAMENTO - GALE-SHAPLEY
+def gerar_visualizacoes(inst, alocacao, registro, n_snapshots=10, processos=None,
+                        n_quadros_animacao=None, mp4=False, formato_tabelas='csv',
+                        pasta='graficos', graficos=True, tabelas=True, limite_nos=LIMITE_NOS_RADIAL,
+                        projetos_amostra=None):
+    # Todas as saídas em sequência, no próprio processo (a CLI roda as mesmas etapas em
+    # segundo plano, ver TarefasSegundoPlano).
+    # graficos=False pula snapshots, animação e gráficos (e dispensa o registro);
+    # tabelas=False pula resultado_final e matriz_emparelhamento.
+    if graficos:
+        gerar_graficos_propostas(inst, registro, alocacao, pasta, n_snapshots, processos,
+                                 n_quadros_animacao, mp4, limite_nos, projetos_amostra)
+    if tabelas:
+        gerar_tabelas(inst, alocacao, pasta, formato_tabelas)
+    if graficos:
+        gerar_graficos_resumo(inst, alocacao, pasta)
+
+def gerar_pdf(pasta='graficos', leve=False):
+    # relatorio_completo.pdf (ou relatorio_leve.pdf) com o resumo e os gráficos já gravados
+    # em `pasta`, a partir das miniaturas em cache (scripts/generate_report_pdf.py; requer
+    # reportlab)
+    scripts = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts')
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    import generate_report_pdf
+    caminho = generate_report_pdf.generate(pasta, light=leve)
+    print(f"PDF salvo em '{caminho}'.")
+
+# --- Tarefas em Segundo Plano ---
+def _executar_tarefa(funcao, args, kwargs):
+    # Roda no processo do pool: devolve (erro, duração, mensagens) em vez de propagar a
+    # exceção, para que a falha de uma tarefa não derrube as outras
+    mensagens = io.StringIO()
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        with contextlib.redirect_stdout(mensagens):
+            funcao(*args, **kwargs)
+    except BaseException as e:  # inclui o SystemExit de dependência ausente
+        erro = f"{type(e).__name__}: {e}"
+    return erro, time.perf_counter() - inicio, mensagens.getvalue()
+
+class TarefasSegundoPlano:
+    # Saídas demoradas (tabelas, gráficos, animação, PDF) executadas em um pool de processos
+    # depois que a alocação e o relatório já foram gravados. Uma tarefa pode esperar outras
+    # (`depois`): só é enviada quando todas terminam com sucesso; se alguma falhou ou nunca
+    # foi enviada, a tarefa é marcada como falha sem executar. O progresso é impresso a cada
+    # tarefa concluída; falhas ficam em `resultados` e não interrompem as demais. Em Ctrl+C,
+    # as tarefas ainda não iniciadas são canceladas e o pool é encerrado. processos=0 roda
+    # tudo em sequência no próprio processo.
+    def __init__(self, processos=None):
+        self.processos = processos
+        self._tarefas = []  # (nome, funcao, args, kwargs, depois)
+        self.resultados = {}
+
+    def __len__(self):
+        return len(self._tarefas)
+
+    def __contains__(self, nome):
+        return any(t[0] == nome for t in self._tarefas)
+
+    def _bloqueio(self, tarefa):
+        # Motivo para não executar a tarefa (dependência desconhecida ou que falhou), ou None
+        for dep in tarefa[4]:
+            if dep not in self:
+                return f"dependência '{dep}' não foi enviada"
+            if dep in self.resultados and not self.resultados[dep]['ok']:
+                return f"dependência '{dep}' falhou"
+        return None
+
+    def enviar(self, nome, funcao, *args, depois=(), **kwargs):
+        self._tarefas.append((nome, funcao, args, kwargs, tuple(depois)))
+
+    def _concluir(self, nome, erro, duracao, mensagens):
+        self.resultados[nome] = {'ok': erro is None, 'tempo_s': duracao, 'erro': erro}
+        for linha in mensagens.splitlines():
+            print(f"  {linha}")
+        estado = f"concluída em {duracao:.1f} s" if erro is None else f"FALHOU ({erro})"
+        print(f"[{len(self.resultados)}/{len(self._tarefas)}] {nome}: {estado}")
+
+    def aguardar(self):
+        if not self._tarefas:
+            return self.resultados
+        nomes = ', '.join(t[0] for t in self._tarefas)
+        if self.processos == 0:
+            print(f"Executando {len(self._tarefas)} tarefas em sequência ({nomes})...")
+            for tarefa in self._tarefas:
+                nome, funcao, args, kwargs, depois = tarefa
+                erro = self._bloqueio(tarefa)
+                if erro is None and not all(d in self.resultados for d in depois):
+                    erro = "dependência enviada depois da tarefa"
+                if erro is not None:
+                    self._concluir(nome, erro, 0.0, '')
+                else:
+                    self._concluir(nome, *_executar_tarefa(funcao, args, kwargs))
+            return self.resultados
+
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        n_processos = min(len(self._tarefas), self.processos or os.cpu_count() or 1)
+        print(f"Executando {len(self._tarefas)} tarefas em segundo plano com {n_processos} processos ({nomes})...")
+        pendentes = list(self._tarefas)
+        em_execucao = {}
+        pool = ProcessPoolExecutor(max_workers=n_processos)
+        try:
+            while pendentes or em_execucao:
+                for tarefa in list(pendentes):
+                    nome, funcao, args, kwargs, depois = tarefa
+                    erro = self._bloqueio(tarefa)
+                    if erro is not None:
+                        pendentes.remove(tarefa)
+                        self._concluir(nome, erro, 0.0, '')
+                    elif all(d in self.resultados for d in depois):
+                        pendentes.remove(tarefa)
+                        em_execucao[pool.submit(_executar_tarefa, funcao, args, kwargs)] = nome
+                if not em_execucao:
+                    # Nada em execução e nada liberado: as pendentes se esperam em ciclo
+                    for nome, *_ in pendentes:
+                        self._concluir(nome, "dependência circular", 0.0, '')
+                    pendentes = []
+                    continue
+                prontas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in prontas:
+                    nome = em_execucao.pop(futuro)
+                    try:
+                        self._concluir(nome, *futuro.result())
+                    except Exception as e:  # processo do pool morreu (ex.: falta de memória)
+                        self._concluir(nome, f"{type(e).__name__}: {e}", 0.0, '')
+        except KeyboardInterrupt:
+            print(f"Interrompido: cancelando {len(pendentes) + len(em_execucao)} tarefas em segundo plano...")
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        pool.shutdown(wait=True)
+        return self.resultados
+
+# --- Serviço Local de Emparelhamento ---
+# Processo de longa duração para consultas repetidas contra uma coorte: a instância é
+# carregada e filtrada uma vez e o emparelhamento fica quente em um ReemparelhamentoCompacto.
+# Notas iguais são desempatadas pela ordem de leitura (por_ranking): cada resposta é a mesma
+# de uma execução completa da instância editada com --empates leitura.
+# HTTP em 127.0.0.1 (JSON), só com a biblioteca padrão; uma única thread de motor atende
+# uma fila de consultas em lotes (consultas idênticas no mesmo lote são calculadas uma vez).
+#   GET  /saude      -> tamanho da coorte e estatísticas do serviço
+#   POST /emparelhar {"alunos": [...]} ou {"todos": true} -> alocação atual
+#   POST /verificar  {"alocacao": {"A1": "P2", ...}} (opcional, sobre a atual) -> estabilidade,
+#                    vagas excedidas e alunos em projetos fora da lista ou abaixo da nota mínima
+#   POST /cenario    {"vagas": {"P10": 3}, "delta_vagas": {"P10": 1}, "nota_minima": {...},
+#                     "nota": {"A42": 7}, "alunos": ["A42"], "verificar": true}
+#                    -> quem muda de projeto e onde ficam os alunos pedidos; nada é gravado
+PORTA_SERVICO = 8765
+ROTAS_SERVICO = ('emparelhar', 'verificar', 'cenario')
+
+class ErroConsulta(ValueError):
+    # Consulta malformada (código inexistente, campo inválido): resposta 400
+    pass
+
+class ServicoEmparelhamento:
+    def __init__(self, instancia):
+        self.instancia = instancia
+        self.reparo = ReemparelhamentoCompacto(instancia, por_ranking=True)
+        self.estatisticas = {'consultas': 0, 'lotes': 0, 'maior_lote': 0, 'coalescidas': 0}
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._atender, name='motor', daemon=True)
+        self._thread.start()
+
+    def consultar(self, rota, corpo):
+        # Chamado pelas threads do servidor: enfileira e espera a thread do motor
+        from concurrent.futures import Future
+        futuro = Future()
+        self._fila.put((rota, corpo, futuro))
+        return futuro.result()
+
+    def encerrar(self):
+        self._fila.put(None)
+        self._thread.join()
+
+    def _atender(self):
+        while True:
+            lote = [self._fila.get()]
+            while True:
+                try:
+                    lote.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            fim = lote[-1] is None
+            lote = [item for item in lote if item is not None]
+            respostas = {}
+            for rota, corpo, futuro in lote:
+                chave = (rota, json.dumps(corpo, sort_keys=True))
+                if chave not in respostas:
+                    try:
+                        respostas[chave] = (True, self.responder(rota, corpo))
+                    except Exception as e:
+                        respostas[chave] = (False, e)
+                else:
+                    self.estatisticas['coalescidas'] += 1
+                ok, valor = respostas[chave]
+                if ok:
+                    futuro.set_result(valor)
+                else:
+                    futuro.set_exception(valor)
+            if lote:
+                self.estatisticas['consultas'] += len(lote)
+                self.estatisticas['lotes'] += 1
+                self.estatisticas['maior_lote'] = max(self.estatisticas['maior_lote'], len(lote))
+            if fim:
+                return
+
+    # --- Consultas (só na thread do motor) ---
+    def _aluno(self, codigo):
+        try:
+            return self.instancia.indice_alunos[codigo]
+        except (KeyError, TypeError):
+            raise ErroConsulta(f"aluno desconhecido: {codigo}") from None
+
+    def _projeto(self, codigo):
+        try:
+            return self.instancia.indice_projetos[codigo]
+        except (KeyError, TypeError):
+            raise ErroConsulta(f"projeto desconhecido: {codigo}") from None
+
+    def _codigo_projeto(self, p):
+        return self.instancia.codigos_projetos[p] if p >= 0 else None
+
+    def _resumo(self, alocacao, corpo):
+        alocados = int(np.count_nonzero(np.frombuffer(alocacao, dtype=np.intc) >= 0))
+        if corpo.get('todos'):
+            alunos = range(self.instancia.n_alunos)
+        else:
+            pedidos = corpo.get('alunos', [])
+            if not isinstance(pedidos, list):
+                raise ErroConsulta("'alunos' deve ser uma lista de códigos")
+            alunos = [self._aluno(a) for a in pedidos]
+        return {'alocados': alocados,
+                'taxa_alocacao': alocados / self.instancia.n_alunos if self.instancia.n_alunos else 0.0,
+                'alunos': {self.instancia.codigos_alunos[a]: self._codigo_projeto(alocacao[a]) for a in alunos}}
+
+    def _estabilidade(self, inst, alocacao):
+        status, pares = verificar_estabilidade_rapida(inst, alocacao)
+        return {'estavel': status == ESTAVEL,
+                'pares_bloqueadores': [[inst.codigos_alunos[int(par[0])], inst.codigos_projetos[int(par[1])]]
+                                       for par in pares]}
+
+    def _edicoes(self, corpo):
+        try:
+            edicoes = [('alterar_vagas', self._projeto(p), int(v)) for p, v in corpo.get('vagas', {}).items()]
+            edicoes += [('alterar_vagas', self._projeto(p), max(0, self.reparo.vagas[self._projeto(p)] + int(d)))
+                        for p, d in corpo.get('delta_vagas', {}).items()]
+            edicoes += [('alterar_nota_minima', self._projeto(p), int(n))
+                        for p, n in corpo.get('nota_minima', {}).items()]
+            edicoes += [('alterar_nota', self._aluno(a), int(n)) for a, n in corpo.get('nota', {}).items()]
+        except ErroConsulta:
+            raise
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ErroConsulta(f"cenário inválido: {e}") from None
+        negativas = [self.instancia.codigos_projetos[p] for nome, p, v in edicoes
+                     if nome == 'alterar_vagas' and v < 0]
+        if negativas:
+            raise ErroConsulta(f"cenário inválido: vagas negativas em {', '.join(negativas)}")
+        return edicoes
+
+    def responder(self, rota, corpo):
+        if not isinstance(corpo, dict):
+            raise ErroConsulta("o corpo da consulta deve ser um objeto JSON")
+        reparo = self.reparo
+        if rota == 'emparelhar':
+            return self._resumo(reparo.alocacao, corpo)
+        if rota == 'verificar':
+            alocacao = array('i', reparo.alocacao)
+            pedida = corpo.get('alocacao', {})
+            if not isinstance(pedida, dict):
+                raise ErroConsulta("'alocacao' deve ser um objeto {aluno: projeto ou null}")
+            for a, p in pedida.items():
+                alocacao[self._aluno(a)] = self._projeto(p) if p is not None else -1
+            atual = reparo.instancia_atual()
+            resposta = self._estabilidade(atual, alocacao)
+            # A verificação de estabilidade supõe uma alocação válida: confere vagas e se cada
+            # alocado tem o projeto entre as preferências elegíveis (lista filtrada atual)
+            aloc = np.frombuffer(alocacao, dtype=np.intc)
+            ocupacao = np.bincount(aloc[aloc >= 0], minlength=atual.n_projetos)
+            pref_inicio = atual.visao_numpy('pref_inicio')
+            aluno_de = np.repeat(np.arange(atual.n_alunos), np.diff(pref_inicio))
+            elegivel = np.zeros(atual.n_alunos, dtype=bool)
+            elegivel[aluno_de[atual.visao_numpy('pref_projeto') == aloc[aluno_de]]] = True
+            codigos_alunos, codigos_projetos = atual.codigos_alunos, atual.codigos_projetos
+            resposta['vagas_excedidas'] = [codigos_projetos[p]
+                                           for p in np.flatnonzero(ocupacao > atual.visao_numpy('vagas'))]
+            resposta['inelegiveis'] = [[codigos_alunos[a], codigos_projetos[aloc[a]]]
+                                       for a in np.flatnonzero((aloc >= 0) & ~elegivel)]
+            return resposta
+        if rota == 'cenario':
+            def consulta(estado):
+                resposta = self._resumo(estado.alocacao, corpo)
+                if corpo.get('verificar'):
+                    resposta.update(self._estabilidade(estado.instancia_atual(), estado.alocacao))
+                return resposta
+            mudancas, resposta = reparo.simular(self._edicoes(corpo), consulta)
+            resposta['mudancas'] = {self.instancia.codigos_alunos[a]: [self._codigo_projeto(antes),
+                                                                       self._codigo_projeto(depois)]
+                                    for a, (antes, depois) in mudancas.items()}
+            return resposta
+        raise ErroConsulta(f"rota desconhecida: {rota}")
+
+def servir(instancia, porta=PORTA_SERVICO, host='127.0.0.1'):
+    # Servidor HTTP (uma thread por conexão, keep-alive) na frente do ServicoEmparelhamento;
+    # roda até Ctrl+C
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    servico = ServicoEmparelhamento(instancia)
+
+    class Manipulador(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Cabeçalho e corpo saem em writes separados: sem isso, Nagle + ACK atrasado do
+        # cliente somam ~40 ms a cada resposta
+        disable_nagle_algorithm = True
+
+        def _responder(self, codigo, dados):
+            corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+            self.send_response(codigo)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/saude':
+                self._responder(200, {'n_alunos': instancia.n_alunos, 'n_projetos': instancia.n_projetos,
+                                      **servico.estatisticas})
+            else:
+                self._responder(404, {'erro': f"rota desconhecida: {self.path}"})
+
+        def do_POST(self):
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            bruto = self.rfile.read(tamanho) if tamanho else b''
+            rota = self.path.strip('/')
+            if rota not in ROTAS_SERVICO:
+                self._responder(404, {'erro': f"rota desconhecida: {self.path}"})
+                return
+            try:
+                self._responder(200, servico.consultar(rota, json.loads(bruto or b'{}')))
+            except ValueError as e:  # ErroConsulta ou JSON inválido
+                self._responder(400, {'erro': str(e)})
+            except Exception as e:
+                self._responder(500, {'erro': f"{type(e).__name__}: {e}"})
+
+        def log_message(self, formato, *args):
+            pass
+
+    class Servidor(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128  # padrão 5: conexões simultâneas além disso esperam 1 s (SYN)
+
+    servidor = Servidor((host, porta), Manipulador)
+    print(f"Servindo {instancia.n_alunos} alunos e {instancia.n_projetos} projetos em "
+          f"http://{host}:{servidor.server_address[1]} (Ctrl+C encerra).", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("Encerrando o serviço...")
+    finally:
+        servidor.server_close()
+        servico.encerrar()
+
+# --- Instrumentação ---
+# Perfil de cada etapa do pipeline: tempo de parede, pico de RSS do processo ao fim da
+# etapa e, com tracemalloc ligado, a variação de memória alocada pelo Python e o pico
+# dentro da etapa. Os contadores do motor (propostas, rejeições, despejos, operações no
+# heap) entram em `contadores`. Tudo sai em JSON e no relatório resumido.
+def _pico_rss_bytes():
+    try:
+        import resource
+    except ModuleNotFoundError:  # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+class Instrumentacao:
+    def __init__(self, usar_tracemalloc=True):
+        self.etapas = []
+        self.contadores = {}
+        self.usar_tracemalloc = usar_tracemalloc
+        if usar_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def etapa(self, nome):
+        if self.usar_tracemalloc:
+            tracemalloc.reset_peak()
+            antes, _ = tracemalloc.get_traced_memory()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            medida = {'etapa': nome, 'tempo_s': time.perf_counter() - inicio,
+                      'pico_rss_bytes': _pico_rss_bytes()}
+            if self.usar_tracemalloc:
+                depois, pico = tracemalloc.get_traced_memory()
+                medida['tracemalloc_delta_bytes'] = depois - antes
+                medida['tracemalloc_pico_bytes'] = pico - antes
+            self.etapas.append(medida)
+
+    def como_dict(self):
+        return {'etapas': self.etapas, 'contadores': self.contadores,
+                'tempo_total_s': sum(e['tempo_s'] for e in self.etapas),
+                'tracemalloc': self.usar_tracemalloc}
+
+    def salvar_json(self, caminho, **extras):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({**self.como_dict(), **extras}, f, indent=2, ensure_ascii=False)
+
+    def texto(self):
+        # Seção do relatório resumido
+        def mib(v):
+            return f"{v / 2**20:.1f} MiB" if v is not None else "-"
+        linhas = []
+        for e in self.etapas:
+            linha = f"  {e['etapa']:<16} {e['tempo_s']:>9.3f} s   pico RSS {mib(e['pico_rss_bytes']):>10}"
+            if 'tracemalloc_delta_bytes' in e:
+                linha += (f"   alocado {mib(e['tracemalloc_delta_bytes']):>10}"
+                          f"   pico {mib(e['tracemalloc_pico_bytes']):>10}")
+            linhas.append(linha)
+        linhas.extend(f"  {nome}: {valor}" for nome, valor in self.contadores.items())
+        return '\n'.join(linhas)
+
+# --- Relatório Resumido ---
+NOTA_PROPOSTA = {
+    'alunos': """  A implementação utiliza a versão "proposta pelo aluno" do algoritmo Gale-Shapley,
+  onde alunos fazem propostas e projetos aceitam/rejeitam. Isso garante que:
+  - O emparelhamento é estável para os projetos (nenhum projeto quer trocar seus alunos)
+  - Alguns alunos não alocados podem preferir projetos alocados
+  A variante proposta pelos projetos (--proposta projetos) dá o ótimo dos projetos e
+  ReticuladoEstavel enumera os emparelhamentos estáveis entre os dois extremos.""",
+    'projetos': """  A implementação utiliza a versão "proposta pelo projeto" do algoritmo Gale-Shapley,
+  onde projetos oferecem vagas pelo seu ranking e alunos aceitam/trocam. Isso garante que:
+  - O emparelhamento é estável e o melhor possível para os projetos
+  - Cada aluno fica com o pior projeto que obtém entre os emparelhamentos estáveis""",
+}
+
+def _secao_filtragem(inst, n_projetos=5):
+    _, motivo = elegibilidade(inst)
+    por_motivo = np.bincount(motivo.view(np.uint8), minlength=3)
+    por_projeto = remocoes_por_projeto(inst, motivo)
+    mais = [p for p in np.argsort(-por_projeto, kind='stable')[:n_projetos] if por_projeto[p] > 0]
+    return f"""FILTRAGEM (preferências removidas):
+  Projeto Inexistente: {por_motivo[REMOCAO_PROJETO_INEXISTENTE]}
+  Nota Abaixo do Mínimo: {por_motivo[REMOCAO_NOTA_MINIMA]}
+  Projetos com Mais Recusas por Nota: {', '.join(f"{inst.codigos_projetos[p]} ({por_projeto[p]})" for p in mais) or '-'}
+
+"""
+
+def _secao_ranking(inst):
+    if not inst.ranking_explicito:
+        return ''
+    orig_rank = inst.visao_numpy('orig_rank')
+    listados = orig_rank >= 0
+    projetos = np.unique(inst.visao_numpy('orig_projeto')[listados])
+    return f"""RANKINGS PRÓPRIOS DOS PROJETOS:
+  Projetos com Ranking: {len(projetos)}
+  Preferências Cobertas por um Ranking: {int(listados.sum())} de {len(orig_rank)}
+  (alunos fora do ranking de um projeto vêm depois dos listados, por nota)
+
+"""
+
+def _secao_empates(empates):
+    if not empates:
+        return ''
+    return f"""EMPATES (notas iguais, modo {empates['modo']}):
+  Alunos Alocados (motor padrão): {empates['alocados_padrao']}
+  Alunos Alocados (com empates): {empates['alocados']}
+  Alunos a Mais: {empates['extras']:+d}
+
+"""
+
+def gerar_relatorio_resumo(inst, alocacao, n_iteracoes, é_estavel, n_pares, perfil=None, proposta='alunos',
+                           empates=None):
+    total_alunos = inst.n_alunos
+    alocados = sum(1 for p in alocacao if p >= 0)
+    total_vagas = sum(inst.vagas)
+    vagas_preenchidas = alocados
+    projetos_com_alocacao = len(set(p for p in alocacao if p >= 0))
+    # Alunos alocados na k-ésima opção da lista original
+    por_opcao = [0] * 3
+    for a, p in enumerate(alocacao):
+        if p >= 0:
+            originais = inst.preferencias_originais(a)
+            for k in range(min(3, len(originais))):
+                if originais[k] == p:
+                    por_opcao[k] += 1
+
+    return f"""RELATÓRIO DE EMPARELHAMENTO - GALE-SHAPLEY
 {'='*60}
 
 RESUMO EXECUTIVO:
@@ -494,40 +3692,290 @@ RESUMO EXECUTIVO:
   Vagas Preenchidas: {vagas_preenchidas}
   Taxa de Ocupação de Vagas: {(vagas_preenchidas/total_vagas)*100:.1f}%
   
-  Total de Iterações: {len(historico)}
+  Total de Iterações (propostas): {n_iteracoes}
   Emparelhamento Estável: {é_estavel}
-  Pares Bloqueadores Encontrados: {len(blocking_pairs)}
+  Pares Bloqueadores Encontrados: {n_pares}
 
 ESTATÍSTICAS:
-  Projetos com Alocações: {len([p for p in projs.values() if len(p.alunos_alocados) > 0])}
-  Alunos com 1ª Opção: {sum(1 for a in alus.values() if a.projeto_alocado and (a.preferencias_originais and a.projeto_alocado.codigo == a.preferencias_originais[0]))}
-  Alunos com 2ª Opção: {sum(1 for a in alus.values() if a.projeto_alocado and (len(a.preferencias_originais) > 1 and a.projeto_alocado.codigo == a.preferencias_originais[1]))}
-  Alunos com 3ª Opção: {sum(1 for a in alus.values() if a.projeto_alocado and (len(a.preferencias_originais) > 2 and a.projeto_alocado.codigo == a.preferencias_originais[2]))}
+  Projetos com Alocações: {projetos_com_alocacao}
+  Alunos com 1ª Opção: {por_opcao[0]}
+  Alunos com 2ª Opção: {por_opcao[1]}
+  Alunos com 3ª Opção: {por_opcao[2]}
 
-NOTA SOBRE ESTABILIDADE:
-  A implementação utiliza a versão "proposta pelo aluno" do algoritmo Gale-Shapley,
-  onde alunos fazem propostas e projetos aceitam/rejeitam. Isso garante que:
-  - O emparelhamento é estável para os projetos (nenhum projeto quer trocar seus alunos)
-  - Alguns alunos não alocados podem preferir projetos alocados
+{_secao_filtragem(inst)}{_secao_ranking(inst)}{_secao_empates(empates)}NOTA SOBRE ESTABILIDADE:
+{NOTA_PROPOSTA[proposta]}
   
   Pares bloqueadores encontrados representam alunos que não foram alocados
   mas que poderiam ter sido, indicando há margem de otimização.
 
+DESEMPENHO (tempo, pico de RSS e memória alocada por etapa; contadores do motor):
+{perfil.texto() if perfil is not None else "  (não medido)"}
+
 ARQUIVOS GERADOS:
   - snapshot_*.png: Snapshots das iterações (até 10)
   - emparelhamento_animacao.gif: Animação do processo
-  - resultado_final.xlsx: Tabela completa de resultados
-  - matriz_emparelhamento.xlsx: Matriz Projeto x Aluno
+  - resultado_final.csv: Tabela completa de resultados
+  - matriz_emparelhamento.csv: Pares (Projeto, Aluno) alocados
   - indice_satisfacao.png: Gráfico de satisfação geral
   - ganho_perda_por_projeto.png: Gráfico de ganho/perda por projeto
   - relatorio_resumo.txt: Este arquivo
+  - perfil_execucao.json: Perfil de desempenho por etapa
 
 {'='*60}
 Relatório gerado automaticamente pelo algoritmo Gale-Shapley.
 """
-        
-        with open('graficos/relatorio_resumo.txt', 'w', encoding='utf-8') as f:
-            f.write(relatorio)
-        print("Relatório resumido salvo em 'graficos/relatorio_resumo.txt'.")
-        
-        print("\n--- Concluído! Verifique a pasta 'graficos'. ---")
\ No newline at end of file
+
+def salvar_alocacao_csv(inst, alocacao, caminho):
+    # Saída mínima do modo só-emparelhamento (módulo csv, sem pandas)
+    import csv
+    with open(caminho, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(['Aluno', 'Projeto'])
+        codigos_projetos = inst.codigos_projetos
+        for a_code, p in zip(inst.codigos_alunos, alocacao):
+            escritor.writerow([a_code, codigos_projetos[p] if p >= 0 else ''])
+
+# --- Execução Principal ---
+def _argumentos(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Emparelhamento estável de alunos em projetos (Gale-Shapley).")
+    parser.add_argument('entrada', nargs='?', default='entradaProj2.txt', help="arquivo de entrada (padrão: %(default)s)")
+    parser.add_argument('--saida', default='graficos', help="pasta das saídas (padrão: %(default)s)")
+    parser.add_argument('--no-plots', action='store_true', help="não gera snapshots, animação nem gráficos")
+    parser.add_argument('--no-xlsx', action='store_true',
+                        help="não grava as tabelas resultado_final e matriz_emparelhamento")
+    parser.add_argument('--only-match', action='store_true',
+                        help="só carrega, filtra e emparelha; grava a alocação e encerra")
+    parser.add_argument('--format', choices=('texto', 'json'), default='texto',
+                        help="json: resultado em JSON na saída padrão (mensagens vão para stderr)")
+    parser.add_argument('--formato-tabelas', choices=FORMATOS_TABELA, default='csv')
+    parser.add_argument('--max-preferencias', type=int, default=MAX_PREFERENCES, metavar='N',
+                        help="preferências lidas por aluno; as excedentes são truncadas "
+                             "(padrão: %%(default)s, máximo: %d)" % LIMITE_PREFERENCES)
+    parser.add_argument('--proposta', choices=('alunos', 'projetos'), default='alunos',
+                        help="lado que propõe no Gale-Shapley: alunos (ótimo dos alunos) ou "
+                             "projetos (ótimo dos projetos) (padrão: %(default)s)")
+    parser.add_argument('--empates', choices=MODOS_EMPATE, default='ordem',
+                        help="notas iguais como empate: ordem (desempate pela chegada, padrão), "
+                             "leitura (desempate pela ordem de leitura, o mesmo do serviço --servir), "
+                             "kiraly (aproximação 3/2 do maior emparelhamento fracamente estável) "
+                             "ou exato (programação inteira, requer scipy; até %d alunos)" % LIMITE_ALUNOS_EXATO)
+    parser.add_argument('--componentes', type=int, nargs='?', const=0, metavar='N',
+                        help="separa os submercados independentes (componentes conexos do grafo de "
+                             "preferências) e emparelha cada um em paralelo em N processos "
+                             "(sem N: um por núcleo); mesma alocação do motor global")
+    parser.add_argument('--limite-nos', type=int, default=LIMITE_NOS_RADIAL,
+                        help="acima de N nós (alunos + projetos) gera visões agregadas no lugar dos "
+                             "snapshots radiais (padrão: %(default)s)")
+    parser.add_argument('--projetos-amostra', metavar='P1,P2,...',
+                        help="projetos do subgrafo amostrado (padrão: os mais disputados)")
+    parser.add_argument('--pdf', nargs='?', const='completo', choices=('completo', 'leve'),
+                        help="gera também o relatório em PDF depois dos gráficos: relatorio_completo.pdf "
+                             "ou, com 'leve', relatorio_leve.pdf (requer reportlab)")
+    parser.add_argument('--tarefas', type=int, metavar='N',
+                        help="processos para tabelas, gráficos e PDF, gerados em segundo plano depois "
+                             "da alocação e do relatório (padrão: um por tarefa; 0 = em sequência)")
+    parser.add_argument('--servir', type=int, nargs='?', const=PORTA_SERVICO, metavar='PORTA',
+                        help="carrega a instância uma vez e atende consultas de emparelhamento, "
+                             "verificação e cenários em http://127.0.0.1:PORTA (padrão: %(const)s)")
+    parser.add_argument('--sem-cache', action='store_true', help="ignora o cache binário da instância")
+    parser.add_argument('--perfil', help="JSON com tempo, memória e contadores por etapa "
+                                         "(padrão: <saida>/perfil_execucao.json)")
+    parser.add_argument('--cprofile', metavar='ARQUIVO',
+                        help="grava o dump do cProfile da execução (abrir com pstats/snakeviz)")
+    parser.add_argument('--sem-tracemalloc', action='store_true',
+                        help="não mede alocações com tracemalloc (reduz o overhead em entradas grandes)")
+    args = parser.parse_args(argv)
+    if args.empates != 'ordem' and args.proposta != 'alunos':
+        parser.error("--empates só se aplica à proposta pelos alunos")
+    if args.componentes is not None and args.empates == 'exato':
+        parser.error("--componentes não se aplica a --empates exato")
+    if not 1 <= args.max_preferencias <= LIMITE_PREFERENCES:
+        parser.error(f"--max-preferencias deve estar entre 1 e {LIMITE_PREFERENCES}")
+    return args
+
+def executar_cli(argv=None):
+    # Devolve o status de saída: ESTAVEL/INSTAVEL após a verificação (0 no modo só-emparelhamento)
+    global MAX_PREFERENCES
+    args = _argumentos(argv)
+    if not os.path.exists(args.entrada):
+        print(f"ERRO: Crie o arquivo '{args.entrada}' com os dados primeiro!")
+        return 2
+    max_original = MAX_PREFERENCES
+    MAX_PREFERENCES = args.max_preferencias
+    try:
+        return _executar_cli(args)
+    finally:
+        MAX_PREFERENCES = max_original
+
+def _executar_cli(args):
+    if args.servir is not None:
+        if args.sem_cache:
+            inst = carregar_instancia(args.entrada)
+            filtrar_instancia(inst)
+        else:
+            inst = carregar_instancia_com_cache(args.entrada)
+        try:
+            servir(inst, args.servir)
+        except ValueError as e:
+            print(f"ERRO: {e}")
+            return 2
+        return ESTAVEL
+    if args.format == 'json':
+        # stdout fica só com o documento JSON, publicado assim que o resultado está pronto
+        # (antes das tarefas em segundo plano)
+        saida = sys.stdout
+
+        def publicar(resultado):
+            json.dump(resultado, saida, ensure_ascii=False)
+            saida.write('\n')
+            saida.flush()
+
+        with contextlib.redirect_stdout(sys.stderr):
+            return _executar_pipeline(args, publicar)[1]
+    return _executar_pipeline(args)[1]
+
+def _executar_pipeline(args, publicar=None):
+    # publicar(resultado) é chamado uma vez, com a alocação, a estabilidade e o perfil até o
+    # relatório, antes das saídas em segundo plano
+    os.makedirs(args.saida, exist_ok=True)
+    perfil = Instrumentacao(usar_tracemalloc=not (args.sem_tracemalloc or args.only_match))
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    print("--- 1-2. Carregando e Filtrando ---")
+    with perfil.etapa('carga_filtragem'):
+        if args.sem_cache:
+            inst = carregar_instancia(args.entrada)
+            filtrar_instancia(inst)
+        else:
+            inst = carregar_instancia_com_cache(args.entrada)
+
+    print("--- 3. Executando Gale-Shapley ---")
+    # O registro de propostas só é necessário para os snapshots
+    registrar = not (args.only_match or args.no_plots)
+    with perfil.etapa('gale_shapley'):
+        if args.empates == 'exato':
+            alocacao, motor = emparelhar_com_empates(inst, args.empates, registrar=registrar)
+        else:
+            opcoes = {'por_ranking': True} if args.empates == 'leitura' else {}
+            if args.empates == 'kiraly':
+                classe = MotorKiraly
+            else:
+                classe = MotorGaleShapleyProjetos if args.proposta == 'projetos' else MotorGaleShapley
+            if args.componentes is not None:
+                motor = MotorComponentes(inst, registrar=registrar, classe=classe,
+                                         processos=args.componentes or None, **opcoes)
+            else:
+                motor = classe(inst, registrar=registrar, **opcoes)
+            motor.executar()
+            alocacao = motor.alocacao
+            if args.componentes is not None:
+                print(f"Componentes conexos: {len(motor.componentes)} "
+                      f"(maior: {motor.contadores()['maior_componente']} alunos).")
+    # No modo exato a alocação pode vir do solver, sem motor (nem registro de propostas)
+    historico = motor.registro if motor is not None else None
+    contadores = motor.contadores() if motor is not None else {}
+    n_iteracoes = motor.propostas if motor is not None else 0
+    perfil.contadores.update(contadores)
+    print(f"Total de iterações: {n_iteracoes}")
+
+    empates = None
+    if args.empates != 'ordem':
+        # Referência: quantos alunos o motor padrão aloca na mesma instância
+        with perfil.etapa('referencia_empates'):
+            referencia = MotorGaleShapley(inst, registrar=False)
+            referencia.executar()
+        alocados_padrao = sum(1 for p in referencia.alocacao if p >= 0)
+        alocados = sum(1 for p in alocacao if p >= 0)
+        empates = {'modo': args.empates, 'alocados_padrao': alocados_padrao,
+                   'alocados': alocados, 'extras': alocados - alocados_padrao}
+        print(f"Empates ({args.empates}): {alocados} alunos alocados, "
+              f"{alocados - alocados_padrao:+d} em relação ao motor padrão ({alocados_padrao}).")
+
+    resultado = {
+        'entrada': args.entrada,
+        'n_alunos': inst.n_alunos,
+        'n_projetos': inst.n_projetos,
+        'proposta': args.proposta,
+        'empates': empates,
+        'alocacao': {a_code: (inst.codigos_projetos[p] if p >= 0 else None)
+                     for a_code, p in zip(inst.codigos_alunos, alocacao)},
+        'contadores': contadores,
+    }
+    status = ESTAVEL
+    # A alocação vai para o disco antes de qualquer outra saída
+    if args.format == 'texto' or not args.only_match:
+        caminho = os.path.join(args.saida, 'alocacao.csv')
+        salvar_alocacao_csv(inst, alocacao, caminho)
+        print(f"Alocação salva em '{caminho}'.")
+    if not args.only_match:
+        # --- 4. Verificar Estabilidade ---
+        print("--- 4. Verificando Estabilidade ---")
+        with perfil.etapa('estabilidade'):
+            é_estavel, blocking_pairs = verificar_estabilidade_compacta(inst, alocacao)
+        print(f"Emparelhamento é estável: {é_estavel}")
+        if not é_estavel:
+            print(f"Pares bloqueadores encontrados: {len(blocking_pairs)}")
+        status = ESTAVEL if é_estavel else INSTAVEL
+        resultado['estavel'] = é_estavel
+        resultado['pares_bloqueadores'] = [list(par) for par in blocking_pairs]
+
+        # --- 5. Gerar Relatório Resumido ---
+        print("--- 5. Gerando Relatório Resumido ---")
+        caminho_relatorio = os.path.join(args.saida, 'relatorio_resumo.txt')
+        # O relatório traz as etapas até a verificação; o JSON inclui também a do relatório
+        with perfil.etapa('relatorio'):
+            relatorio = gerar_relatorio_resumo(inst, alocacao, n_iteracoes, é_estavel,
+                                               len(blocking_pairs), perfil, args.proposta, empates)
+            with open(caminho_relatorio, 'w', encoding='utf-8') as f:
+                f.write(relatorio)
+        print(f"Relatório resumido salvo em '{caminho_relatorio}'.")
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        print(f"Perfil cProfile salvo em '{args.cprofile}'.")
+    caminho_perfil = args.perfil or os.path.join(args.saida, 'perfil_execucao.json')
+    salvar_perfil = args.perfil or not args.only_match
+    resultado['perfil'] = perfil.como_dict()
+    if salvar_perfil:
+        perfil.salvar_json(caminho_perfil)
+        print(f"Perfil de desempenho salvo em '{caminho_perfil}'.")
+    if publicar is not None:
+        publicar(resultado)
+
+    if not args.only_match:
+        # --- 6. Saídas em segundo plano: uma falha aqui não afeta o que já foi gravado ---
+        tarefas = TarefasSegundoPlano(args.tarefas)
+        if not args.no_xlsx:
+            tarefas.enviar('tabelas', gerar_tabelas, inst, alocacao, args.saida, args.formato_tabelas)
+        if not args.no_plots:
+            tarefas.enviar('graficos', gerar_graficos_resumo, inst, alocacao, args.saida)
+            tarefas.enviar('propostas', gerar_graficos_propostas, inst, historico, alocacao, args.saida,
+                           limite_nos=args.limite_nos,
+                           projetos_amostra=args.projetos_amostra.split(',') if args.projetos_amostra else None)
+        if args.pdf:
+            tarefas.enviar('pdf', gerar_pdf, args.saida, args.pdf == 'leve',
+                           depois=[nome for nome in ('graficos', 'propostas') if nome in tarefas])
+        if len(tarefas):
+            print("--- 6. Gerando Tabelas e Visualizações ---")
+            print(f"Resultados já disponíveis em '{args.saida}'.")
+            with perfil.etapa('segundo_plano'):
+                tarefas.aguardar()
+            falhas = [nome for nome, r in tarefas.resultados.items() if not r['ok']]
+            if falhas:
+                print(f"Aviso: {len(falhas)} tarefa(s) falharam ({', '.join(falhas)}); "
+                      f"alocação e relatório não foram afetados.")
+            if salvar_perfil:
+                perfil.salvar_json(caminho_perfil, tarefas=tarefas.resultados)
+
+    print(f"\n--- Concluído! Verifique a pasta '{args.saida}'. ---")
+    return resultado, status
+
+if __name__ == "__main__":
+    # Status de saída para uso em lotes: 0 = estável, 1 = pares bloqueadores encontrados
+    sys.exit(executar_cli())
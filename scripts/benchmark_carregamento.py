@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Benchmark de vazão (MB/s) dos leitores do arquivo de entrada.
+
+Gera arquivos sintéticos no formato de `entradaProj2.txt` e compara:
+  - carregar_dados_legado: f.read() + dois re.findall (versão original)
+  - carregar_dados: leitura em streaming para objetos Projeto/Aluno
+  - carregar_instancia: leitura em streaming direto para a InstanciaCompacta
+  - carregar_instancia (mmap)
+e, em seguida, a filtragem das preferências: filtrar_preferencias (objetos) contra
+filtrar_instancia (máscara de elegibilidade colunar com NumPy e laço em Python).
+
+As notas vão de 0 a 10, então a coluna de alunos lidos também mostra os registros
+com nota de dois dígitos que a versão original descarta.
+
+Uso:
+  python scripts/benchmark_carregamento.py
+  python scripts/benchmark_carregamento.py --tamanhos 100000 1000000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+import io
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+
+# Carregado aqui para o custo do import não entrar no tempo da filtragem com NumPy
+import numpy  # noqa: E402, F401
+
+
+def escrever_entrada(caminho, n_alunos, seed=42):
+    rng = random.Random(seed)
+    n_projetos = max(1, n_alunos // 4)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write('// instância sintética\n')
+        for i in range(1, n_projetos + 1):
+            f.write(f"(P{i}, {rng.randint(1, 3)}, {rng.randint(3, 5)})\n")
+        f.write('\n// alunos\n')
+        for i in range(1, n_alunos + 1):
+            prefs = ', '.join(f"P{rng.randint(1, n_projetos)}" for _ in range(main.MAX_PREFERENCES))
+            f.write(f"(A{i}):({prefs}) ({rng.randint(0, 10)})\n")
+
+
+def medir(funcao, caminho, **kwargs):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao(caminho, **kwargs)
+    duracao = time.perf_counter() - inicio
+    n_alunos = resultado.n_alunos if isinstance(resultado, main.InstanciaCompacta) else len(resultado[1])
+    return duracao, n_alunos
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    leitores = [
+        ('regex (legado)', main.carregar_dados_legado, {}),
+        ('streaming -> objetos', main.carregar_dados, {}),
+        ('streaming -> compacta', main.carregar_instancia, {}),
+        ('streaming -> compacta (mmap)', main.carregar_instancia, {'usar_mmap': True}),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.tamanhos:
+            caminho = os.path.join(tmp, f"entrada_{n}.txt")
+            escrever_entrada(caminho, n, args.seed)
+            mb = os.path.getsize(caminho) / 1e6
+            print(f"\n{n} alunos ({mb:.1f} MB)")
+            print(f"  {'leitor':<30} {'tempo (s)':>10} {'MB/s':>8} {'alunos lidos':>13}")
+            for nome, funcao, kwargs in leitores:
+                duracao, lidos = medir(funcao, caminho, **kwargs)
+                print(f"  {nome:<30} {duracao:>10.3f} {mb / duracao:>8.1f} {lidos:>13}")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                projetos, alunos = main.carregar_dados(caminho)
+                inst = main.carregar_instancia(caminho)
+            filtros = [
+                ('filtrar_preferencias (objetos)', lambda: main.filtrar_preferencias(projetos, alunos)),
+                ('filtrar_instancia (NumPy)', lambda: main.filtrar_instancia(inst, usar_numpy=True)),
+                ('filtrar_instancia (Python)', lambda: main.filtrar_instancia(inst, usar_numpy=False)),
+            ]
+            print(f"  {'filtragem':<30} {'tempo (s)':>10}")
+            for nome, funcao in filtros:
+                inicio = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    funcao()
+                print(f"  {nome:<30} {time.perf_counter() - inicio:>10.3f}")
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark da decomposição em componentes conexos: motor global contra
+`MotorComponentes` (um submercado por componente, emparelhados em paralelo).
+
+Gera coortes sintéticas divididas em `--departamentos` submercados (cada aluno só
+escolhe projetos do próprio departamento; alunos embaralhados entre departamentos,
+semente fixa), mede a busca dos componentes, o motor global e a versão decomposta com
+1..N processos e confere se as alocações são idênticas. O tempo da versão decomposta
+inclui a busca dos componentes e a montagem das subinstâncias.
+
+Uso:
+  python scripts/benchmark_componentes.py
+  python scripts/benchmark_componentes.py --tamanhos 100000 1000000 --departamentos 50 --processos 1 4 8
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+import io
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+# Importado aqui para o custo do import não entrar no tempo da busca de componentes
+import numpy as np  # noqa: E402
+
+
+def gerar_instancia_departamentos(n_alunos, n_departamentos, seed=42):
+    # Mesmas proporções de gerar_instancia_sintetica (benchmark_gale_shapley), por departamento
+    rng = random.Random(seed)
+    projetos, alunos = {}, []
+    por_departamento = max(1, n_alunos // n_departamentos)
+    n_projetos = max(1, por_departamento // 4)
+    for d in range(n_departamentos):
+        for i in range(n_projetos):
+            p_code = f"P{d}_{i}"
+            projetos[p_code] = main.Projeto(p_code, rng.randint(1, 3), rng.randint(3, 5))
+        for i in range(por_departamento):
+            prefs = ', '.join(f"P{d}_{rng.randrange(n_projetos)}" for _ in range(main.MAX_PREFERENCES))
+            alunos.append(main.Aluno(f"A{d}_{i}", prefs, rng.randint(3, 5)))
+    rng.shuffle(alunos)
+    alunos = {a.codigo: a for a in alunos}
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.filtrar_preferencias(projetos, alunos)
+    return main.construir_instancia(projetos, alunos)
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def rodar(motor):
+    motor.executar()
+    return motor
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--departamentos', type=int, default=20)
+    parser.add_argument('--processos', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    processos = sorted(set(args.processos))
+
+    print(f"{'alunos':>10} {'comp.':>6} {'maior':>8} {'busca (s)':>10} {'global (s)':>11} "
+          + ' '.join(f"{f'{p} proc. (s)':>12}" for p in processos) + "  idêntico")
+    for n in args.tamanhos:
+        inst = gerar_instancia_departamentos(n, args.departamentos, args.seed)
+        t_busca, (comp_aluno, _, n_comp) = cronometrar(lambda: main.componentes_conexos(inst))
+        maior = int(np.bincount(comp_aluno[comp_aluno >= 0]).max()) if n_comp else 0
+        t_global, referencia = cronometrar(lambda: rodar(main.MotorGaleShapley(inst, registrar=False)))
+        tempos, identico = [], True
+        for p in processos:
+            t, motor = cronometrar(lambda: rodar(main.MotorComponentes(inst, registrar=False, processos=p)))
+            tempos.append(t)
+            identico &= motor.alocacao == referencia.alocacao
+        print(f"{n:>10} {n_comp:>6} {maior:>8} {t_busca:>10.3f} {t_global:>11.3f} "
+              + ' '.join(f"{t:>12.3f}" for t in tempos) + f"  {identico}")
+
+
+if __name__ == '__main__':
+    main_benchmark()
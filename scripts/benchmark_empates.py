@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Benchmark dos modos de empate: motor padrão (desempate pela ordem de chegada),
+aproximação de Király e o máximo exato por programação inteira (scipy).
+
+Para cada tamanho gera uma instância sintética (semente fixa, notas 3-5, portanto cheia
+de empates), mede o tempo de cada modo e quantos alunos ele aloca a mais que o motor
+padrão. O modo exato só roda até `--max-exato` alunos.
+
+Uso:
+  python scripts/benchmark_empates.py
+  python scripts/benchmark_empates.py --tamanhos 1000 100000 --max-exato 2000
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+from benchmark_gale_shapley import gerar_instancia_sintetica  # noqa: E402
+
+
+def medir(inst, modo, tempo_limite):
+    inicio = time.perf_counter()
+    if modo == 'exato':
+        alocacao = main.emparelhamento_maximo_exato(inst, tempo_limite)
+    else:
+        alocacao, _ = main.emparelhar_com_empates(inst, modo, registrar=False)
+    duracao = time.perf_counter() - inicio
+    estavel, _ = main.verificar_estabilidade_rapida(inst, alocacao)
+    return duracao, sum(1 for p in alocacao if p >= 0), estavel == main.ESTAVEL
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--max-exato', type=int, default=1_000,
+                        help='maior número de alunos em que o modo exato também é medido')
+    parser.add_argument('--tempo-limite', type=float, default=60.0, help='limite do solver (s)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'alunos':>10} {'modo':>7} {'tempo (s)':>10} {'alocados':>9} {'a mais':>7}  estável")
+    for n in args.tamanhos:
+        projetos, alunos = gerar_instancia_sintetica(n, args.seed)
+        inst = main.construir_instancia(projetos, alunos)
+        modos = ['ordem', 'kiraly'] + (['exato'] if n <= args.max_exato else [])
+        referencia = None
+        for modo in modos:
+            duracao, alocados, estavel = medir(inst, modo, args.tempo_limite)
+            if referencia is None:
+                referencia = alocados
+            print(f"{n:>10} {modo:>7} {duracao:>10.3f} {alocados:>9} {alocados - referencia:>+7}  {estavel}")
+
+
+if __name__ == '__main__':
+    main_benchmark()
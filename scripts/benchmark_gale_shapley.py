@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark de escalabilidade do Gale-Shapley: motor com heap/deque
+(`executar_gale_shapley`) contra a versão original baseada em listas
+(`executar_gale_shapley_legado`).
+
+Gera instâncias sintéticas (semente fixa) com 10k/100k/1M alunos, mede o tempo
+de cada motor e confere se os emparelhamentos são idênticos. A versão original
+é quadrática (pop(0), sort por proposta e cópia do estado a cada iteração),
+por isso só roda até `--max-legado` alunos.
+
+Uso:
+  python scripts/benchmark_gale_shapley.py
+  python scripts/benchmark_gale_shapley.py --tamanhos 10000 100000 --max-legado 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+import io
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+
+
+def gerar_instancia_sintetica(n_alunos, seed=42):
+    # Mesma proporção da entrada do enunciado: ~4 alunos por projeto, 1-3 vagas,
+    # nota mínima 3-5, notas 3-5 e 3 preferências por aluno.
+    rng = random.Random(seed)
+    n_projetos = max(1, n_alunos // 4)
+    projetos = {}
+    for i in range(1, n_projetos + 1):
+        p_code = f"P{i}"
+        projetos[p_code] = main.Projeto(p_code, rng.randint(1, 3), rng.randint(3, 5))
+    alunos = {}
+    for i in range(1, n_alunos + 1):
+        a_code = f"A{i}"
+        prefs = ', '.join(f"P{rng.randint(1, n_projetos)}" for _ in range(main.MAX_PREFERENCES))
+        alunos[a_code] = main.Aluno(a_code, prefs, rng.randint(3, 5))
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.filtrar_preferencias(projetos, alunos)
+    return projetos, alunos
+
+
+def medir(motor, n_alunos, seed, **kwargs):
+    projetos, alunos = gerar_instancia_sintetica(n_alunos, seed)
+    inicio = time.perf_counter()
+    motor(projetos, alunos, **kwargs)
+    duracao = time.perf_counter() - inicio
+    alocacao = {a.codigo: (a.projeto_alocado.codigo if a.projeto_alocado else None) for a in alunos.values()}
+    return duracao, alocacao
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--max-legado', type=int, default=10_000,
+                        help='maior número de alunos em que a versão original também é medida')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'alunos':>10} {'heap (s)':>10} {'legado (s)':>11} {'speedup':>8}  idêntico")
+    for n in args.tamanhos:
+        t_novo, aloc_novo = medir(main.executar_gale_shapley, n, args.seed)
+        if n <= args.max_legado:
+            t_leg, aloc_leg = medir(main.executar_gale_shapley_legado, n, args.seed)
+            print(f"{n:>10} {t_novo:>10.3f} {t_leg:>11.3f} {t_leg / t_novo:>7.1f}x  {aloc_novo == aloc_leg}")
+        else:
+            print(f"{n:>10} {t_novo:>10.3f} {'-':>11} {'-':>8}  -")
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Benchmark do reemparelhamento incremental (`ReemparelhamentoIncremental`) contra
+uma nova execução completa (`filtrar_preferencias` + `executar_gale_shapley`).
+
+Gera uma instância sintética (semente fixa) com notas distintas e outra com notas
+inteiras de 0 a 10 (muitos empates), roda o emparelhamento completo e aplica lotes de
+edições aleatórias (alunos novos e removidos, notas corrigidas, vagas e notas mínimas
+alteradas). Para cada lote mede a latência do reparo incremental e de uma execução
+completa sobre o mesmo estado e confere se os emparelhamentos são idênticos. As duas
+execuções desempatam notas iguais pela ordem de leitura (por_ranking=True).
+
+Uso:
+  python scripts/benchmark_incremental.py
+  python scripts/benchmark_incremental.py --tamanhos 100000 --lotes 1 10 100 1000 --notas empatadas
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+import io
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+
+
+NOTA_MAXIMA_EMPATES = 10
+
+
+def gerar_instancia(n_alunos, rng, empates=False):
+    # ~4 alunos por projeto, 1-3 vagas e 3 preferências por aluno; notas distintas
+    # (0..2n) ou, com empates, inteiras de 0 a NOTA_MAXIMA_EMPATES
+    n_projetos = max(1, n_alunos // 4)
+    nota_maxima = NOTA_MAXIMA_EMPATES if empates else n_alunos
+    projetos = {}
+    for i in range(1, n_projetos + 1):
+        p_code = f"P{i}"
+        projetos[p_code] = main.Projeto(p_code, rng.randint(1, 3), rng.randint(0, nota_maxima))
+    if empates:
+        notas = [rng.randint(0, NOTA_MAXIMA_EMPATES) for _ in range(n_alunos)]
+    else:
+        notas = rng.sample(range(2 * n_alunos), n_alunos)
+    alunos = {}
+    for i in range(1, n_alunos + 1):
+        a_code = f"A{i}"
+        prefs = ', '.join(f"P{rng.randint(1, n_projetos)}" for _ in range(main.MAX_PREFERENCES))
+        alunos[a_code] = main.Aluno(a_code, prefs, notas[i - 1])
+    return projetos, alunos
+
+
+def gerar_edicoes(n_edicoes, projetos, alunos, rng, notas_usadas, proximo, empates=False):
+    n_projetos, n_alunos = len(projetos), len(alunos)
+    nota_maxima = NOTA_MAXIMA_EMPATES if empates else n_alunos
+    edicoes = []
+    removidos = set()
+
+    def nota_nova():
+        if empates:
+            return rng.randint(0, NOTA_MAXIMA_EMPATES)
+        nota = rng.randrange(4 * n_alunos)
+        while nota in notas_usadas:
+            nota = rng.randrange(4 * n_alunos)
+        notas_usadas.add(nota)
+        return nota
+
+    def aluno_existente():
+        a_code = rng.choice(list(alunos))
+        while a_code in removidos:
+            a_code = rng.choice(list(alunos))
+        return a_code
+
+    for _ in range(n_edicoes):
+        tipo = rng.randrange(5)
+        if tipo == 0:
+            prefs = ', '.join(f"P{rng.randint(1, n_projetos)}" for _ in range(main.MAX_PREFERENCES))
+            edicoes.append(('adicionar_aluno', f"A{proximo}", prefs, nota_nova()))
+            proximo += 1
+        elif tipo == 1:
+            a_code = aluno_existente()
+            removidos.add(a_code)
+            edicoes.append(('remover_aluno', a_code))
+        elif tipo == 2:
+            edicoes.append(('alterar_nota', aluno_existente(), nota_nova()))
+        elif tipo == 3:
+            edicoes.append(('alterar_vagas', f"P{rng.randint(1, n_projetos)}", rng.randint(0, 4)))
+        else:
+            edicoes.append(('alterar_nota_minima', f"P{rng.randint(1, n_projetos)}", rng.randint(0, nota_maxima)))
+    return edicoes, proximo
+
+
+def execucao_completa(projetos, alunos):
+    # Cópia limpa do estado editado e emparelhamento do zero (a cópia fica fora da medição)
+    p2 = {c: main.Projeto(c, p.vagas, p.nota_minima) for c, p in projetos.items()}
+    a2 = {c: main.Aluno(c, ', '.join(a.preferencias_originais), a.nota) for c, a in alunos.items()}
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.filtrar_preferencias(p2, a2)
+    main.executar_gale_shapley(p2, a2, por_ranking=True)
+    return time.perf_counter() - inicio, a2
+
+
+def alocacao(alunos):
+    return {a.codigo: (a.projeto_alocado.codigo if a.projeto_alocado else None) for a in alunos.values()}
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--lotes', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='número de edições por lote')
+    parser.add_argument('--notas', choices=('distintas', 'empatadas'), nargs='+',
+                        default=['distintas', 'empatadas'])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'notas':>10} {'alunos':>10} {'edições':>8} {'incremental (ms)':>17} {'completo (ms)':>14} "
+          f"{'speedup':>8} {'alterados':>10}  idêntico")
+    for notas in args.notas:
+        empates = notas == 'empatadas'
+        for n in args.tamanhos:
+            rng = random.Random(args.seed)
+            projetos, alunos = gerar_instancia(n, rng, empates)
+            with contextlib.redirect_stdout(io.StringIO()):
+                main.filtrar_preferencias(projetos, alunos)
+            main.executar_gale_shapley(projetos, alunos, por_ranking=True)
+            inc = main.ReemparelhamentoIncremental(projetos, alunos)
+            notas_usadas = {a.nota for a in alunos.values()}
+            proximo = n + 1
+
+            for n_edicoes in args.lotes:
+                edicoes, proximo = gerar_edicoes(n_edicoes, projetos, alunos, rng, notas_usadas, proximo, empates)
+                inicio = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    mudancas = inc.aplicar(edicoes)
+                t_inc = time.perf_counter() - inicio
+                t_completo, alunos_completo = execucao_completa(projetos, alunos)
+                identico = alocacao(alunos) == alocacao(alunos_completo)
+                print(f"{notas:>10} {n:>10} {n_edicoes:>8} {t_inc * 1000:>17.2f} {t_completo * 1000:>14.2f} "
+                      f"{t_completo / t_inc:>7.1f}x {len(mudancas):>10}  {identico}")
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Benchmark do pipeline completo por faixa de tamanho, com histórico entre commits.
+
+Para cada faixa gera uma instância sintética (`gerar_instancia.py`, semente fixa) e
+mede, no melhor de --repeticoes execuções:
+  - carregar_dados, filtrar_preferencias, executar_gale_shapley, verificar_estabilidade;
+  - relatorio: tabela final + matriz longa gravadas em CSV (sem gráficos).
+
+Cada execução é acrescentada a um histórico JSONL (uma linha por faixa, com commit,
+data e parâmetros). A tabela impressa compara cada etapa com a última execução da
+mesma faixa em outro commit, para que regressões fiquem visíveis.
+
+Uso:
+  python scripts/benchmark_pipeline.py
+  python scripts/benchmark_pipeline.py --faixas pequena media grande enorme --repeticoes 3
+  python scripts/benchmark_pipeline.py --faixas media --assimetria 1.1 --historico /tmp/hist.jsonl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import contextlib
+import io
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+from gerar_instancia import escrever_instancia  # noqa: E402
+
+# main importa numpy/pandas só no primeiro uso; carregados aqui, o custo do import não
+# entra no tempo da primeira etapa que os usa
+import numpy  # noqa: E402, F401
+import pandas  # noqa: E402, F401
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FAIXAS = {'pequena': 1_000, 'media': 10_000, 'grande': 100_000, 'enorme': 1_000_000}
+ETAPAS = ('carregar_dados', 'filtrar_preferencias', 'executar_gale_shapley',
+          'verificar_estabilidade', 'relatorio')
+
+
+def commit_atual():
+    try:
+        saida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        sujo = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+        return saida + ('-sujo' if sujo else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir_pipeline(caminho, pasta_saida):
+    tempos = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        projetos, alunos = main.carregar_dados(caminho)
+        tempos['carregar_dados'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        main.filtrar_preferencias(projetos, alunos)
+        tempos['filtrar_preferencias'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        main.executar_gale_shapley(projetos, alunos)
+        tempos['executar_gale_shapley'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        main.verificar_estabilidade(projetos, alunos)
+        tempos['verificar_estabilidade'] = time.perf_counter() - inicio
+
+        # Relatório sobre a instância compacta, com a alocação final dos objetos
+        inst = main.construir_instancia(projetos, alunos)
+        alocacao = [inst.indice_projetos[a.projeto_alocado.codigo] if a.projeto_alocado else -1
+                    for a in alunos.values()]
+        inicio = time.perf_counter()
+        colunas, _ = main.tabela_resultados(inst, alocacao)
+        main.salvar_tabela(main.pd.DataFrame(colunas, columns=main.COLUNAS_RESULTADO),
+                           os.path.join(pasta_saida, 'resultado_final'), 'csv')
+        main.salvar_tabela(main.matriz_emparelhamento_longa(inst, alocacao),
+                           os.path.join(pasta_saida, 'matriz_emparelhamento'), 'csv')
+        tempos['relatorio'] = time.perf_counter() - inicio
+    return tempos
+
+
+def ler_historico(caminho):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def referencia(historico, registro):
+    # Última execução com a mesma faixa e parâmetros em outro commit
+    for anterior in reversed(historico):
+        if (anterior['faixa'] == registro['faixa'] and anterior['parametros'] == registro['parametros']
+                and anterior['commit'] != registro['commit']):
+            return anterior
+    return None
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--faixas', nargs='+', choices=list(FAIXAS), default=['pequena', 'media', 'grande'])
+    parser.add_argument('--repeticoes', type=int, default=1)
+    parser.add_argument('--assimetria', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--historico', default=os.path.join(RAIZ, '.benchmarks', 'pipeline.jsonl'))
+    args = parser.parse_args()
+
+    commit = commit_atual()
+    historico = ler_historico(args.historico)
+    novos = []
+    print(f"commit {commit or '?'}; histórico em '{args.historico}'")
+    print(f"{'faixa':>8} {'alunos':>9} " + ' '.join(f"{e:>22}" for e in ETAPAS))
+    with tempfile.TemporaryDirectory() as pasta:
+        for faixa in args.faixas:
+            n_alunos = FAIXAS[faixa]
+            caminho = os.path.join(pasta, f'{faixa}.txt')
+            escrever_instancia(caminho, n_alunos, assimetria=args.assimetria, seed=args.seed)
+            medidas = [medir_pipeline(caminho, pasta) for _ in range(max(1, args.repeticoes))]
+            tempos = {e: min(m[e] for m in medidas) for e in ETAPAS}
+
+            registro = {'faixa': faixa, 'n_alunos': n_alunos, 'commit': commit,
+                        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                        'python': sys.version.split()[0],
+                        'parametros': {'assimetria': args.assimetria, 'seed': args.seed,
+                                       'max_preferencias': main.MAX_PREFERENCES},
+                        'tempos_s': tempos}
+            base = referencia(historico, registro)
+            celulas = []
+            for e in ETAPAS:
+                celula = f"{tempos[e]:.3f}s"
+                if base is not None and base['tempos_s'].get(e):
+                    celula += f" ({(tempos[e] / base['tempos_s'][e] - 1) * 100:+.0f}%)"
+                celulas.append(f"{celula:>22}")
+            print(f"{faixa:>8} {n_alunos:>9} " + ' '.join(celulas))
+            if base is not None:
+                print(f"{'':>18} comparado com {base['commit']} ({base['data']})")
+            novos.append(registro)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.historico)), exist_ok=True)
+    with open(args.historico, 'a', encoding='utf-8') as f:
+        for registro in novos:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main_benchmark()
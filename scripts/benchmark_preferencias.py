@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark do tamanho das listas de preferência (3, 10 e 50 projetos por aluno), com os
+projetos ordenando por nota e com rankings próprios em todos os projetos.
+
+Para cada tamanho gera uma coorte sintética (gerar_instancia.py, semente fixa, todos os
+projetos com ranking próprio) e uma cópia do mesmo arquivo sem os registros de ranking,
+então as preferências são idênticas nas duas variantes. Mede leitura, filtragem, índice
+reverso (rankings -> pref_rank), emparelhamento e verificação, e o custo por proposta:
+comparações "o projeto prefere a a b" e "posição de p na lista de a" são consultas O(1)
+a arrays, então o custo por proposta não cresce com o tamanho da lista.
+
+Uso:
+  python scripts/benchmark_preferencias.py
+  python scripts/benchmark_preferencias.py --alunos 20000 --tamanhos 3 10 20 50
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import io
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import main  # noqa: E402
+from gerar_instancia import escrever_instancia  # noqa: E402
+# Carregado aqui para o custo do import não entrar no tempo da primeira etapa
+import numpy  # noqa: E402, F401
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def medir(caminho):
+    with contextlib.redirect_stdout(io.StringIO()):
+        t_carga, inst = cronometrar(lambda: main.carregar_instancia(caminho))
+        t_filtro, _ = cronometrar(lambda: main.filtrar_instancia(inst))
+    t_indice, _ = cronometrar(lambda: main.indexar_candidatos(inst))
+    motor = main.MotorGaleShapley(inst, registrar=False)
+    t_motor, _ = cronometrar(motor.executar)
+    t_verif, (status, _) = cronometrar(lambda: main.verificar_estabilidade_rapida(inst, motor.alocacao))
+    alocados = sum(1 for p in motor.alocacao if p >= 0)
+    return {'carga': t_carga, 'filtro': t_filtro, 'indice': t_indice, 'motor': t_motor, 'verif': t_verif,
+            'propostas': motor.propostas, 'alocados': alocados, 'estavel': status == main.ESTAVEL,
+            'preferencias': len(inst.pref_projeto)}
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alunos', type=int, default=100_000)
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[3, 10, 50])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'lista':>5} {'ranking':>8} {'prefs.':>9} {'carga (s)':>10} {'filtro (s)':>11} {'índice (s)':>11} "
+          f"{'motor (s)':>10} {'verif. (s)':>11} {'propostas':>10} {'µs/prop.':>9} {'alocados':>9}  estável")
+    with tempfile.TemporaryDirectory() as pasta:
+        for tamanho in args.tamanhos:
+            com_ranking = os.path.join(pasta, f'rankings_{tamanho}.txt')
+            so_nota = os.path.join(pasta, f'nota_{tamanho}.txt')
+            escrever_instancia(com_ranking, args.alunos, preferencias=(tamanho, tamanho), rankings=1.0,
+                               seed=args.seed)
+            with open(com_ranking, encoding='utf-8') as origem, open(so_nota, 'w', encoding='utf-8') as destino:
+                destino.writelines(linha for linha in origem if not main._RE_RANKING.fullmatch(linha.strip()))
+
+            main.MAX_PREFERENCES = tamanho
+            for nome, caminho in (('nota', so_nota), ('próprio', com_ranking)):
+                r = medir(caminho)
+                print(f"{tamanho:>5} {nome:>8} {r['preferencias']:>9} {r['carga']:>10.2f} {r['filtro']:>11.3f} "
+                      f"{r['indice']:>11.3f} {r['motor']:>10.2f} {r['verif']:>11.3f} {r['propostas']:>10} "
+                      f"{r['motor'] / max(r['propostas'], 1) * 1e6:>9.2f} {r['alocados']:>9}  {r['estavel']}")
+
+
+if __name__ == '__main__':
+    main_benchmark()
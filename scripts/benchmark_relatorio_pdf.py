@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Benchmark do relatório em PDF: construção original (imagens em resolução cheia e uma
+linha do resumo por parágrafo) contra a versão com miniaturas em cache, com o cache
+vazio, com o cache já preenchido e no modo leve.
+
+Mede o tempo de cada geração e o tamanho do PDF resultante, sobre os gráficos já
+gerados na pasta (padrão: graficos/). Os PDFs e o cache vão para um diretório
+temporário, sem tocar na pasta de entrada.
+
+Uso:
+  python scripts/benchmark_relatorio_pdf.py
+  python scripts/benchmark_relatorio_pdf.py --pasta resultados --processos 4
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate_report_pdf as gerador  # noqa: E402
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak  # noqa: E402
+from reportlab.lib.styles import getSampleStyleSheet  # noqa: E402
+from reportlab.lib.units import cm  # noqa: E402
+
+
+def build_pdf_original(out_path, summary_text, images):
+    # Construção anterior às miniaturas, para comparação
+    doc = SimpleDocTemplate(out_path, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    styles = getSampleStyleSheet()
+    story = [Paragraph('EMPARELHAMENTO ESTÁVEL MÁXIMO: ALOCAÇÃO DE ALUNOS EM PROJETOS', styles['Title']),
+             Spacer(1, 12), Paragraph('Relatório gerado automaticamente', styles['Normal']), Spacer(1, 24)]
+    for line in summary_text.splitlines():
+        if line.strip() == '':
+            story.append(Spacer(1, 6))
+        else:
+            story.append(Paragraph(line.replace('  ', '&nbsp;&nbsp;'), styles['BodyText']))
+    story.append(PageBreak())
+    for img in images:
+        im = Image(img)
+        im._restrictSize(16*cm, 22*cm)
+        story += [im, Spacer(1, 12), Paragraph(os.path.basename(img), styles['Normal']), PageBreak()]
+    doc.build(story)
+
+
+def main_benchmark():
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pasta', default=os.path.join(repo_root, 'graficos'))
+    parser.add_argument('--processos', type=int)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='benchmark_pdf_')
+    try:
+        pasta = os.path.join(tmp, 'graficos')
+        shutil.copytree(args.pasta, pasta)
+        cache = os.path.join(tmp, 'cache')
+        summary = gerador.read_summary(os.path.join(pasta, 'relatorio_resumo.txt'))
+
+        def original():
+            out = os.path.join(tmp, 'original.pdf')
+            build_pdf_original(out, summary, gerador.collect_images(pasta))
+            return out
+
+        def miniaturas(**kwargs):
+            return lambda: gerador.generate(pasta, processes=args.processos, cache_dir=cache, **kwargs)
+
+        print(f"{'versão':<28} {'tempo (s)':>10} {'PDF (MB)':>9}")
+        for nome, gerar in (('original (resolução cheia)', original),
+                            ('miniaturas, cache vazio', miniaturas()),
+                            ('miniaturas, cache cheio', miniaturas()),
+                            ('leve', miniaturas(light=True))):
+            inicio = time.perf_counter()
+            with open(os.devnull, 'w') as nulo:
+                saida, sys.stdout = sys.stdout, nulo
+                try:
+                    out = gerar()
+                finally:
+                    sys.stdout = saida
+            duracao = time.perf_counter() - inicio
+            print(f"{nome:<28} {duracao:>10.2f} {os.path.getsize(out) / 2**20:>9.2f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main_benchmark()
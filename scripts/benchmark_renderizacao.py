@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Benchmark de renderização dos snapshots (`renderizar_snapshots`).
+
+Mede o tempo para renderizar 10 e 100 quadros em instâncias sintéticas com ~1k e
+~10k nós (alunos + projetos), com um único processo e com um processo por núcleo.
+
+Uso:
+  python scripts/benchmark_renderizacao.py
+  python scripts/benchmark_renderizacao.py --nos 1000 --quadros 10 100 --processos 1 4
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+from benchmark_gale_shapley import gerar_instancia_sintetica  # noqa: E402
+
+
+def preparar(n_nos, seed):
+    # 4 alunos por projeto: n_nos = alunos + projetos
+    projetos, alunos = gerar_instancia_sintetica(n_nos * 4 // 5, seed)
+    inst = main.construir_instancia(projetos, alunos)
+    motor = main.MotorGaleShapley(inst)
+    return inst, motor.executar()
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nos', type=int, nargs='+', default=[1_000, 10_000])
+    parser.add_argument('--quadros', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--processos', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'nós':>8} {'quadros':>8} {'processos':>10} {'tempo (s)':>10} {'s/quadro':>9}")
+    for n_nos in args.nos:
+        inst, registro = preparar(n_nos, args.seed)
+        for n_quadros in args.quadros:
+            for processos in sorted(set(args.processos)):
+                with tempfile.TemporaryDirectory() as pasta:
+                    inicio = time.perf_counter()
+                    arquivos = main.renderizar_snapshots(inst, registro, pasta, n_quadros, processos)
+                    duracao = time.perf_counter() - inicio
+                print(f"{n_nos:>8} {n_quadros:>8} {processos:>10} {duracao:>10.2f} {duracao / len(arquivos):>9.3f}")
+
+
+if __name__ == '__main__':
+    main_benchmark()
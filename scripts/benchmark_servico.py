@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Benchmark de latência do serviço local (`main.py --servir`) contra uma execução a frio.
+
+Sobe o servidor em um subprocesso, mede o tempo até ele aceitar consultas e então, com
+um cliente HTTP local (conexões keep-alive), a latência de cada tipo de consulta:
+emparelhar (um aluno), verificar (alocação atual) e cenário (uma vaga a mais em um
+projeto e uma nota alterada, sorteados). Depois repete os cenários com vários clientes
+simultâneos, para medir a vazão com a fila em lotes do servidor. A referência é o tempo
+de um `python -m main --only-match` (processo novo, imports, leitura e emparelhamento).
+
+Uso:
+  python scripts/benchmark_servico.py
+  python scripts/benchmark_servico.py /tmp/coorte_100k.txt --consultas 1000 --clientes 1 8 32
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+import contextlib
+import io
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, RAIZ)
+import main  # noqa: E402
+
+
+class Cliente:
+    def __init__(self, porta):
+        self.conexao = http.client.HTTPConnection('127.0.0.1', porta)
+
+    def post(self, rota, corpo):
+        dados = json.dumps(corpo).encode('utf-8')
+        inicio = time.perf_counter()
+        self.conexao.request('POST', rota, dados, {'Content-Type': 'application/json'})
+        resposta = self.conexao.getresponse()
+        corpo = json.loads(resposta.read())
+        if resposta.status != 200:
+            raise RuntimeError(f"{rota}: {resposta.status} {corpo}")
+        return time.perf_counter() - inicio, corpo
+
+    def get(self, rota):
+        self.conexao.request('GET', rota)
+        return json.loads(self.conexao.getresponse().read())
+
+
+def percentis(tempos):
+    tempos = sorted(tempos)
+    def p(q):
+        return tempos[min(len(tempos) - 1, int(q * len(tempos)))] * 1e3
+    return p(0.5), p(0.95), tempos[-1] * 1e3
+
+
+def subir_servidor(entrada, porta):
+    inicio = time.perf_counter()
+    processo = subprocess.Popen([sys.executable, '-m', 'main', entrada, '--servir', str(porta)], cwd=RAIZ,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for linha in processo.stdout:
+        if linha.startswith('Servindo'):
+            return processo, time.perf_counter() - inicio
+    raise RuntimeError(f"o servidor não subiu (status {processo.wait()})")
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('entrada', nargs='?', default=os.path.join(RAIZ, 'entradaProj2.txt'))
+    parser.add_argument('--porta', type=int, default=8766)
+    parser.add_argument('--consultas', type=int, default=500, help='consultas por tipo')
+    parser.add_argument('--clientes', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    entrada = os.path.abspath(args.entrada)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        inst = main.carregar_instancia_com_cache(entrada)
+    alunos, projetos = inst.codigos_alunos, inst.codigos_projetos
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as saida:
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'main', entrada, '--only-match', '--saida', saida],
+                       cwd=RAIZ, check=True, stdout=subprocess.DEVNULL)
+        t_frio = time.perf_counter() - inicio
+
+    processo, t_subida = subir_servidor(entrada, args.porta)
+    try:
+        print(f"{inst.n_alunos} alunos, {inst.n_projetos} projetos")
+        print(f"execução a frio (--only-match): {t_frio * 1e3:.0f} ms; subida do servidor: {t_subida * 1e3:.0f} ms\n")
+
+        def cenario():
+            return {'delta_vagas': {rng.choice(projetos): 1}, 'nota': {rng.choice(alunos): rng.randint(3, 5)},
+                    'alunos': [rng.choice(alunos)]}
+
+        consultas = (('emparelhar', lambda: {'alunos': [rng.choice(alunos)]}),
+                     ('verificar', lambda: {}),
+                     ('cenario', cenario))
+        cliente = Cliente(args.porta)
+        print(f"{'consulta':<12} {'p50 (ms)':>9} {'p95 (ms)':>9} {'máx (ms)':>9}")
+        for rota, corpo in consultas:
+            tempos = [cliente.post('/' + rota, corpo())[0] for _ in range(args.consultas)]
+            p50, p95, maximo = percentis(tempos)
+            print(f"{rota:<12} {p50:>9.2f} {p95:>9.2f} {maximo:>9.2f}")
+
+        print(f"\n{'clientes':>8} {'consultas/s':>12} {'p50 (ms)':>9} {'p95 (ms)':>9}  (cenários)")
+        for n_clientes in args.clientes:
+            corpos = [[cenario() for _ in range(args.consultas // n_clientes)] for _ in range(n_clientes)]
+            tempos = []
+
+            def trabalhar(lista):
+                c = Cliente(args.porta)
+                tempos.extend(c.post('/cenario', corpo)[0] for corpo in lista)
+
+            threads = [threading.Thread(target=trabalhar, args=(lista,)) for lista in corpos]
+            inicio = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            duracao = time.perf_counter() - inicio
+            p50, p95, _ = percentis(tempos)
+            print(f"{n_clientes:>8} {len(tempos) / duracao:>12.0f} {p50:>9.2f} {p95:>9.2f}")
+
+        saude = cliente.get('/saude')
+        print(f"\nservidor: {saude['consultas']} consultas em {saude['lotes']} lotes "
+              f"(maior lote: {saude['maior_lote']}, coalescidas: {saude['coalescidas']})")
+    finally:
+        processo.send_signal(signal.SIGINT)
+        processo.wait(timeout=10)
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Benchmark das variantes de emparelhamento estável sobre a mesma instância compacta:
+proposta pelos alunos (desempate por ordem de aceite e pelo ranking dos projetos),
+proposta pelos projetos e o reticulado por rotações (cadeia maximal, enumeração com
+limite e amostragem).
+
+Com notas como único critério todos os projetos têm o mesmo ranking e o reticulado
+tem um só emparelhamento. `--rankings-proprios` embaralha o ranking de cada projeto
+(semente fixa) para medir instâncias com rotações de fato.
+
+Uso:
+  python scripts/benchmark_variantes.py
+  python scripts/benchmark_variantes.py --tamanhos 10000 100000 --rankings-proprios --enumerar 1000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from array import array
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+from benchmark_gale_shapley import gerar_instancia_sintetica  # noqa: E402
+
+
+def embaralhar_rankings(inst, seed):
+    # Ranking próprio por projeto: permuta os candidatos de cada projeto e refaz pref_rank
+    rng = random.Random(seed)
+    main.indexar_candidatos(inst)
+    inicio, cand_aluno = inst.cand_inicio, list(inst.cand_aluno)
+    for p in range(inst.n_projetos):
+        trecho = cand_aluno[inicio[p]:inicio[p + 1]]
+        rng.shuffle(trecho)
+        cand_aluno[inicio[p]:inicio[p + 1]] = trecho
+    posicao = {}
+    for p in range(inst.n_projetos):
+        for r, k in enumerate(range(inicio[p], inicio[p + 1])):
+            posicao[(cand_aluno[k], p)] = r
+    inst.cand_aluno = array('i', cand_aluno)
+    inst.pref_rank = array('i', (posicao[(a, inst.pref_projeto[j])] for a in range(inst.n_alunos)
+                                 for j in range(inst.pref_inicio[a], inst.pref_inicio[a + 1])))
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def rodar_motor(classe, inst, **kwargs):
+    motor = classe(inst, registrar=False, **kwargs)
+    motor.executar()
+    return motor.alocacao
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--rankings-proprios', action='store_true',
+                        help='embaralha o ranking de cada projeto (reticulado não trivial)')
+    parser.add_argument('--enumerar', type=int, default=100,
+                        help='limite de emparelhamentos na enumeração (padrão: %(default)s)')
+    parser.add_argument('--amostras', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'alunos':>10} {'alunos (s)':>11} {'ranking (s)':>12} {'projetos (s)':>13} "
+          f"{'rotações':>9} {'cadeia (s)':>11} {'enumerados':>11} {'enum (s)':>9} {'amostras (s)':>13}  extremos ok")
+    for n in args.tamanhos:
+        projetos, alunos = gerar_instancia_sintetica(n, args.seed)
+        inst = main.construir_instancia(projetos, alunos)
+        main.indexar_candidatos(inst)
+        if args.rankings_proprios:
+            embaralhar_rankings(inst, args.seed)
+
+        t_alunos, _ = cronometrar(lambda: rodar_motor(main.MotorGaleShapley, inst))
+        t_ranking, otimo_alunos = cronometrar(lambda: rodar_motor(main.MotorGaleShapley, inst, por_ranking=True))
+        t_projetos, otimo_projetos = cronometrar(lambda: rodar_motor(main.MotorGaleShapleyProjetos, inst))
+        t_cadeia, reticulado = cronometrar(lambda: main.ReticuladoEstavel(inst))
+        t_enum, n_enum = cronometrar(lambda: sum(1 for _ in reticulado.emparelhamentos(limite=args.enumerar)))
+        t_amostras, _ = cronometrar(lambda: reticulado.amostrar(args.amostras, seed=args.seed))
+        ok = reticulado.otimo_alunos == otimo_alunos and reticulado.otimo_projetos == otimo_projetos
+        print(f"{n:>10} {t_alunos:>11.3f} {t_ranking:>12.3f} {t_projetos:>13.3f} "
+              f"{len(reticulado.rotacoes):>9} {t_cadeia:>11.3f} {n_enum:>11} {t_enum:>9.3f} {t_amostras:>13.3f}  {ok}")
+
+
+if __name__ == '__main__':
+    main_benchmark()
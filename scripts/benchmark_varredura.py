@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark da varredura de vagas e notas mínimas com partida a quente
+(`executar_varredura`) contra execuções independentes de cada ponto.
+
+Gera uma coorte sintética (gerar_instancia.py, semente fixa) e varre uma grade de
+`--escala-vagas` x `--delta-nota-minima` (padrão: 101 x 10 = 1010 pontos). Mede a
+varredura completa e, para comparação, executa `--amostra` pontos sorteados do zero
+(ajuste -> filtragem -> Gale-Shapley, como executar_cenario), estimando o tempo da
+varredura fria e conferindo as métricas nesses pontos: com o desempate por ordem de
+leitura (por_ranking) o emparelhamento de cada ponto é único, então a diferença de
+alunos alocados entre as duas execuções deve ser zero.
+
+Uso:
+  python scripts/benchmark_varredura.py
+  python scripts/benchmark_varredura.py --alunos 20000 --escala-vagas 0.5 1.5 0.05 --verificar
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+import io
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import main  # noqa: E402
+from gerar_instancia import escrever_instancia  # noqa: E402
+# Importado aqui para o custo do import não entrar no tempo da primeira etapa
+import numpy as np  # noqa: E402
+
+
+def faixa(inicio, fim, passo):
+    n = int(round((fim - inicio) / passo))
+    return [round(inicio + k * passo, 10) for k in range(n + 1)]
+
+
+def ponto_independente(inst, ponto):
+    # Um ponto do zero sobre a lista original: ajuste, filtragem e Gale-Shapley com o
+    # mesmo desempate da varredura
+    vagas, nota_minima = main.parametros_ponto(inst.visao_numpy('vagas'), inst.visao_numpy('nota_minima'), ponto)
+    atual = main.InstanciaCompacta(inst.codigos_projetos, main._array_intc(vagas), main._array_intc(nota_minima),
+                                   inst.codigos_alunos, inst.nota, inst.orig_inicio, inst.orig_projeto)
+    atual.pref_inicio, atual.pref_projeto, atual.pref_posicao, _, _ = main._filtrar_instancia_numpy(atual)
+    motor = main.MotorGaleShapley(atual, registrar=False, por_ranking=True)
+    motor.executar()
+    return sum(1 for p in motor.alocacao if p >= 0)
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alunos', type=int, default=100_000)
+    parser.add_argument('--escala-vagas', type=float, nargs=3, default=(0.5, 1.5, 0.01),
+                        metavar=('INICIO', 'FIM', 'PASSO'))
+    parser.add_argument('--delta-nota-minima', type=int, nargs=3, default=(-4, 5, 1),
+                        metavar=('INICIO', 'FIM', 'PASSO'))
+    parser.add_argument('--amostra', type=int, default=20, help='pontos executados do zero para comparação')
+    parser.add_argument('--verificar', action='store_true', help='confere a estabilidade de cada ponto')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'coorte.txt')
+        escrever_instancia(caminho, args.alunos, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            inst = main.carregar_instancia(caminho)
+            main.filtrar_instancia(inst)
+    pontos = main.grade_varredura(escala_vagas=faixa(*args.escala_vagas),
+                                  delta_nota_minima=faixa(*args.delta_nota_minima))
+    print(f"{inst.n_alunos} alunos, {inst.n_projetos} projetos, {len(pontos)} pontos")
+
+    inicio = time.perf_counter()
+    df = main.executar_varredura(inst, pontos, verificar=args.verificar)
+    t_quente = time.perf_counter() - inicio
+    passos = df.sort_values('ordem_execucao')['tempo_s'].to_numpy()
+    print(f"varredura a quente: {t_quente:.1f} s ({t_quente / len(pontos) * 1e3:.0f} ms/ponto; "
+          f"passo p50 {np.median(passos) * 1e3:.0f} ms, máx {passos.max() * 1e3:.0f} ms; "
+          f"{int(df['mudancas'].sum())} mudanças de projeto)")
+    if args.verificar:
+        print(f"pontos estáveis: {int(df['estavel'].sum())} de {len(df)}")
+
+    amostra = random.Random(args.seed).sample(range(len(pontos)), min(args.amostra, len(pontos)))
+    inicio = time.perf_counter()
+    alocados = [ponto_independente(inst, pontos[i]) for i in amostra]
+    t_frio = (time.perf_counter() - inicio) / len(amostra)
+    diferenca = [int(df['alocados'].iloc[i]) - a for i, a in zip(amostra, alocados)]
+    print(f"execução independente: {t_frio * 1e3:.0f} ms/ponto -> ~{t_frio * len(pontos):.0f} s para a grade "
+          f"({t_frio * len(pontos) / t_quente:.1f}x)")
+    print(f"alocados (quente - independente) na amostra: mín {min(diferenca):+d}, máx {max(diferenca):+d} "
+          f"(de ~{int(np.mean(alocados))})")
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Execução em lote de cenários "e se" (leitura -> filtragem -> emparelhamento ->
+verificação) em um pool de processos, sem a etapa de visualização.
+
+A origem é um diretório (um cenário por arquivo .txt) ou um manifesto JSON com
+entradas {"entrada": "arquivo.txt", "nome": ..., "max_preferencias": ...,
+"escala_vagas": ..., "delta_nota_minima": ..., "nota_minima": ...}. As opções de
+ajuste aceitam vários valores e geram o produto cartesiano para cada cenário.
+As métricas de todos os cenários (taxa de alocação, ocupação, distribuição de rank,
+iterações, tempos) vão para uma única tabela.
+
+Uso:
+  python scripts/executar_lote.py cenarios/
+  python scripts/executar_lote.py cenarios.json --max-preferencias 2 3 5 --escala-vagas 0.8 1 1.2
+  python scripts/executar_lote.py cenarios/ --processos 8 --formato parquet --saida graficos/cenarios
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+
+
+def main_lote():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('origem', help='diretório com arquivos .txt ou manifesto JSON')
+    parser.add_argument('--max-preferencias', type=int, nargs='+')
+    parser.add_argument('--escala-vagas', type=float, nargs='+')
+    parser.add_argument('--delta-nota-minima', type=int, nargs='+')
+    parser.add_argument('--nota-minima', type=int, nargs='+')
+    parser.add_argument('--processos', type=int, default=None, help='padrão: número de núcleos')
+    parser.add_argument('--saida', default=os.path.join('graficos', 'cenarios'),
+                        help='caminho da tabela, sem extensão')
+    parser.add_argument('--formato', choices=main.FORMATOS_TABELA, default='csv')
+    args = parser.parse_args()
+
+    ajustes = {p: getattr(args, p) for p in main.PARAMETROS_CENARIO if getattr(args, p) is not None}
+    cenarios = main.carregar_cenarios(args.origem, ajustes)
+    if not cenarios:
+        parser.error(f"nenhum cenário encontrado em '{args.origem}'")
+
+    inicio = time.perf_counter()
+    df = main.executar_lote(cenarios, args.processos)
+    duracao = time.perf_counter() - inicio
+
+    pasta = os.path.dirname(args.saida)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    caminho = main.salvar_tabela(df, args.saida, args.formato)
+    print(f"{len(cenarios)} cenários em {duracao:.2f} s ({len(cenarios) / duracao:.1f} cenários/s); "
+          f"métricas salvas em '{caminho}'.")
+    instaveis = int((~df['estavel']).sum())
+    if instaveis:
+        print(f"Aviso: {instaveis} cenário(s) com pares bloqueadores.")
+
+
+if __name__ == '__main__':
+    main_lote()
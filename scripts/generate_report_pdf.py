@@ -2,19 +2,44 @@
 """Gera `graficos/relatorio_completo.pdf` combinando o texto de
 `graficos/relatorio_resumo.txt` com até 10 snapshots e gráficos.
 
+As imagens não entram em resolução cheia (os snapshots têm 18x18 polegadas a 150 dpi):
+cada uma é reduzida ao tamanho em que aparece na página, na resolução `--dpi`, e gravada
+como JPEG (ou PNG) em um cache de miniaturas. O cache é indexado pelo caminho, mtime e
+tamanho de cada imagem, com o hash do conteúdo como chave da miniatura: uma nova geração
+sem mudanças nos gráficos não decodifica nenhum PNG. As miniaturas que faltam são geradas
+em paralelo em um pool de processos. Ao fim, saem do cache as entradas de imagens que não
+existem mais ou que a pasta deixou de usar e as miniaturas que nenhuma entrada usa (como
+as intermediárias da redução de resolução do `--max-mb`). `--leve` gera uma versão reduzida (menos snapshots,
+resolução e qualidade menores) limitada a `--max-mb` megabytes de imagens.
+
 Uso:
   python scripts/generate_report_pdf.py
+  python scripts/generate_report_pdf.py --pasta resultados
+  python scripts/generate_report_pdf.py --leve --max-mb 2
+
+Também é chamado pelo `main.py --pdf`, como tarefa em segundo plano depois dos gráficos.
 
 Dependências:
   pip install reportlab Pillow
 """
 import os
 import glob
+import json
+import hashlib
+import argparse
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Preformatted, Spacer, Image, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import cm
 
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Dentro da pasta do cache binário da instância (main.DIR_CACHE), já ignorada pelo git;
+# ancorado na raiz do repositório, como o --pasta padrão, e não na pasta de trabalho
+CACHE_DIR = os.path.join(REPO_ROOT, '.cache_emparelhamento', 'miniaturas_pdf')
+MAX_WIDTH, MAX_HEIGHT = 16*cm, 22*cm  # área útil de uma página A4 com margens de 2 cm
+LIGHT = {'max_snapshots': 4, 'dpi': 96, 'quality': 70, 'max_mb': 2.0}
+MIN_DPI = 36
+
 
 def read_summary(path):
     if not os.path.exists(path):
@@ -35,8 +60,8 @@ def collect_images(graficos_dir, max_snapshots=10):
     snapshots = sorted(glob.glob(os.path.join(graficos_dir, 'snapshot_*.png')), key=_extract_index)
     snapshots = snapshots[:max_snapshots]
     others = sorted(glob.glob(os.path.join(graficos_dir, '*.png')))
-    # Excluir snapshots já coletados
-    others = [p for p in others if p not in snapshots]
+    # Excluir todos os snapshots (os que passaram do limite também ficam de fora)
+    others = [p for p in others if not os.path.basename(p).startswith('snapshot_')]
     # Priorizar indice_satisfacao e ganho_perda_por_projeto
     prioritized = []
     for name in ('indice_satisfacao.png', 'ganho_perda_por_projeto.png'):
@@ -47,7 +72,148 @@ def collect_images(graficos_dir, max_snapshots=10):
     return snapshots + prioritized + others
 
 
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _thumbnail_name(digest, dpi, fmt, quality):
+    ext = 'jpg' if fmt == 'jpeg' else 'png'
+    return f"{digest}_{dpi}dpi_q{quality}.{ext}" if fmt == 'jpeg' else f"{digest}_{dpi}dpi.{ext}"
+
+
+def make_thumbnail(path, cache_dir, dpi=150, fmt='jpeg', quality=85, digest=None):
+    # Reduz a imagem para caber em MAX_WIDTH x MAX_HEIGHT a `dpi` (sem ampliar) e grava no
+    # cache. Devolve (miniatura, hash da origem, largura e altura na página em pontos).
+    from PIL import Image as PILImage
+
+    digest = digest or _file_hash(path)
+    out = os.path.join(cache_dir, _thumbnail_name(digest, dpi, fmt, quality))
+    if os.path.exists(out):
+        with PILImage.open(out) as im:
+            size = im.size
+    else:
+        with PILImage.open(path) as im:
+            limit = (round(MAX_WIDTH / 72 * dpi), round(MAX_HEIGHT / 72 * dpi))
+            im.draft('RGB', limit)  # JPEG de origem: decodifica já reduzido
+            if im.mode in ('RGBA', 'LA', 'P'):
+                im = im.convert('RGBA')
+                fundo = PILImage.new('RGB', im.size, 'white')
+                fundo.paste(im, mask=im.getchannel('A'))
+                im = fundo
+            elif im.mode != 'RGB':
+                im = im.convert('RGB')
+            im.thumbnail(limit, PILImage.LANCZOS)
+            tmp = f"{out}.{os.getpid()}.tmp"
+            if fmt == 'jpeg':
+                im.save(tmp, 'JPEG', quality=quality, optimize=True)
+            else:
+                im.save(tmp, 'PNG', optimize=True)
+            os.replace(tmp, out)
+            size = im.size
+    # Tamanho na página: o da miniatura a `dpi`, limitado à área útil (a miniatura não é
+    # ampliada, então imagens pequenas mantêm o tamanho original)
+    width, height = size[0] / dpi * 72, size[1] / dpi * 72
+    scale = min(1.0, MAX_WIDTH / width, MAX_HEIGHT / height)
+    return out, digest, width * scale, height * scale
+
+
+def _make_thumbnail_task(args):
+    return make_thumbnail(*args)
+
+
+def prepare_images(images, cache_dir=CACHE_DIR, dpi=150, fmt='jpeg', quality=85, processes=None):
+    # Miniaturas de todas as imagens, na mesma ordem. O índice (caminho -> mtime, tamanho,
+    # hash) evita reler imagens inalteradas; as que faltam são geradas em paralelo.
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, 'indice.json')
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    tasks = []
+    for img in images:
+        st = os.stat(img)
+        entry = index.get(os.path.abspath(img))
+        digest = None
+        if entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+            digest = entry['sha1']
+        tasks.append((img, cache_dir, dpi, fmt, quality, digest))
+
+    # Só vão para o pool as miniaturas que ainda não existem
+    missing = [t for t in tasks
+               if t[5] is None or not os.path.exists(os.path.join(cache_dir, _thumbnail_name(t[5], dpi, fmt, quality)))]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, len(missing)))
+    done = {}
+    if processes > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for task, result in zip(missing, pool.map(_make_thumbnail_task, missing)):
+                done[task[0]] = result
+    else:
+        for task in missing:
+            done[task[0]] = make_thumbnail(*task)
+
+    prepared = []
+    for task in tasks:
+        img = task[0]
+        result = done.get(img) or make_thumbnail(*task)
+        st = os.stat(img)
+        index[os.path.abspath(img)] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha1': result[1]}
+        prepared.append((img, result[0], result[2], result[3]))
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(tmp, index_path)
+    return prepared
+
+
+def prune_cache(cache_dir, graficos_dir, prepared):
+    # Remove do índice as imagens que não existem mais e as da pasta atual que esta geração
+    # não usou; cada entrada guarda a miniatura da última geração que a usou, e as
+    # miniaturas fora do índice (resoluções intermediárias, imagens removidas) são apagadas.
+    index_path = os.path.join(cache_dir, 'indice.json')
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    used = {os.path.abspath(img): os.path.basename(thumb) for img, thumb, _, _ in prepared}
+    pasta = os.path.abspath(graficos_dir)
+    for img in list(index):
+        if img in used:
+            index[img]['miniatura'] = used[img]
+        elif not os.path.exists(img) or os.path.dirname(img) == pasta:
+            del index[img]
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(tmp, index_path)
+
+    keep = {entry.get('miniatura') for entry in index.values()}
+    removed = 0
+    for name in os.listdir(cache_dir):
+        # Arquivos .tmp podem ser de outra geração em andamento
+        if name == 'indice.json' or name in keep or name.endswith('.tmp'):
+            continue
+        try:
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
 def build_pdf(out_path, summary_text, images):
+    # images: caminhos (imagem inteira, restrita à área útil) ou tuplas
+    # (origem, miniatura, largura, altura) de prepare_images
     doc = SimpleDocTemplate(out_path, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
     styles = getSampleStyleSheet()
     story = []
@@ -58,19 +224,19 @@ def build_pdf(out_path, summary_text, images):
     story.append(Paragraph('Relatório gerado automaticamente', styles['Normal']))
     story.append(Spacer(1, 24))
 
-    # Sumário (texto)
-    for line in summary_text.splitlines():
-        if line.strip() == '':
-            story.append(Spacer(1, 6))
-        else:
-            story.append(Paragraph(line.replace('  ', '&nbsp;&nbsp;'), styles['BodyText']))
+    # Sumário (texto): um único bloco pré-formatado, quebrado entre páginas se preciso
+    story.append(Preformatted(summary_text, styles['Code']))
     story.append(PageBreak())
 
-    # Imagens: uma por página (ajusta largura máxima)
+    # Imagens: uma por página
     for img in images:
         try:
-            im = Image(img)
-            im._restrictSize(16*cm, 22*cm)
+            if isinstance(img, tuple):
+                img, thumb, width, height = img
+                im = Image(thumb, width=width, height=height)
+            else:
+                im = Image(img)
+                im._restrictSize(MAX_WIDTH, MAX_HEIGHT)
             story.append(im)
             story.append(Spacer(1, 12))
             story.append(Paragraph(os.path.basename(img), styles['Caption'] if 'Caption' in styles else styles['Normal']))
@@ -81,20 +247,62 @@ def build_pdf(out_path, summary_text, images):
     doc.build(story)
 
 
-def main():
-    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    graficos = os.path.join(repo_root, 'graficos')
-    resumo = os.path.join(graficos, 'relatorio_resumo.txt')
-    out_pdf = os.path.join(graficos, 'relatorio_completo.pdf')
+def generate(graficos_dir, max_snapshots=None, dpi=None, fmt='jpeg', quality=None, light=False,
+             max_mb=None, processes=None, cache_dir=CACHE_DIR):
+    # Relatório completo (padrão: 10 snapshots, 150 dpi, JPEG qualidade 85) ou leve
+    # (LIGHT). Com max_mb, a resolução é reduzida até as imagens caberem no limite.
+    defaults = LIGHT if light else {'max_snapshots': 10, 'dpi': 150, 'quality': 85, 'max_mb': None}
+    max_snapshots = defaults['max_snapshots'] if max_snapshots is None else max_snapshots
+    dpi = dpi or defaults['dpi']
+    quality = quality or defaults['quality']
+    max_mb = defaults['max_mb'] if max_mb is None else max_mb
+
+    resumo = os.path.join(graficos_dir, 'relatorio_resumo.txt')
+    out_pdf = os.path.join(graficos_dir, 'relatorio_leve.pdf' if light else 'relatorio_completo.pdf')
 
     print('Lendo resumo...')
     summary_text = read_summary(resumo)
 
-    print('Coletando imagens (até 10 snapshots)...')
-    imgs = collect_images(graficos, max_snapshots=10)
-    print(f'Encontrei {len(imgs)} imagens; gerando PDF em {out_pdf}')
+    print(f'Coletando imagens (até {max_snapshots} snapshots)...')
+    imgs = collect_images(graficos_dir, max_snapshots=max_snapshots)
+    print(f'Encontrei {len(imgs)} imagens; gerando miniaturas a {dpi} dpi...')
+    prepared = prepare_images(imgs, cache_dir, dpi, fmt, quality, processes)
+    if max_mb:
+        # A área de cada miniatura cresce com dpi², então o tamanho também (aproximadamente)
+        limit = max_mb * 2**20
+        total = sum(os.path.getsize(p[1]) for p in prepared)
+        while total > limit and dpi > MIN_DPI:
+            dpi = max(MIN_DPI, int(dpi * (limit / total) ** 0.5 * 0.95))
+            print(f'Imagens com {total / 2**20:.1f} MB (limite {max_mb} MB); refazendo a {dpi} dpi...')
+            prepared = prepare_images(imgs, cache_dir, dpi, fmt, quality, processes)
+            total = sum(os.path.getsize(p[1]) for p in prepared)
+    removed = prune_cache(cache_dir, graficos_dir, prepared)
+    if removed:
+        print(f'{removed} miniatura(s) sem uso removida(s) do cache.')
+
+    print(f'Gerando PDF em {out_pdf}')
+    build_pdf(out_pdf, summary_text, prepared)
+    return out_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera o relatório completo em PDF.')
+    parser.add_argument('--pasta', default=os.path.join(REPO_ROOT, 'graficos'),
+                        help='pasta com relatorio_resumo.txt e os gráficos (padrão: graficos/)')
+    parser.add_argument('--leve', action='store_true',
+                        help=f"relatório leve (relatorio_leve.pdf): {LIGHT['max_snapshots']} snapshots, "
+                             f"{LIGHT['dpi']} dpi, JPEG qualidade {LIGHT['quality']}, até {LIGHT['max_mb']} MB de imagens")
+    parser.add_argument('--max-snapshots', type=int)
+    parser.add_argument('--dpi', type=int, help='resolução das imagens na página (padrão: 150; leve: 96)')
+    parser.add_argument('--formato', choices=('jpeg', 'png'), default='jpeg', help='formato das miniaturas')
+    parser.add_argument('--qualidade', type=int, help='qualidade JPEG (padrão: 85; leve: 70)')
+    parser.add_argument('--max-mb', type=float, help='limite do total de imagens, reduzindo a resolução')
+    parser.add_argument('--processos', type=int, help='processos para gerar as miniaturas (padrão: um por núcleo)')
+    parser.add_argument('--cache', default=CACHE_DIR, help='pasta do cache de miniaturas (padrão: %(default)s)')
+    args = parser.parse_args()
 
-    build_pdf(out_pdf, summary_text, imgs)
+    out_pdf = generate(args.pasta, args.max_snapshots, args.dpi, args.formato, args.qualidade, args.leve,
+                       args.max_mb, args.processos, args.cache)
     print('PDF gerado com sucesso:', out_pdf)
 
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Gerador de instâncias sintéticas no formato de `entradaProj2.txt`.
+
+Com semente fixa, escreve projetos (vagas e nota mínima) e alunos (preferências e
+nota) controlando:
+  - número de alunos e de projetos;
+  - distribuição de vagas: uniforme entre --vagas MIN MAX ou geométrica (muitos
+    projetos pequenos, poucos grandes) limitada ao mesmo intervalo;
+  - concentração das preferências: popularidade dos projetos segue uma lei de Zipf
+    com expoente --assimetria (0 = todos igualmente procurados);
+  - distribuição das notas: uniforme ou normal (truncada) no intervalo --notas;
+  - tamanho das listas de preferência (--preferencias MIN MAX, sem repetição; acima de 3
+    rode main.py com --max-preferencias);
+  - fração dos projetos com ranking próprio (--rankings): cada um desses ordena, em
+    ordem aleatória, os alunos que o escolheram.
+
+Uso:
+  python scripts/gerar_instancia.py saida.txt --alunos 100000
+  python scripts/gerar_instancia.py saida.txt --alunos 1000000 --projetos 50000 \\
+      --assimetria 1.1 --notas-dist normal --preferencias 1 5 --seed 7
+"""
+import os
+import math
+import random
+import argparse
+import itertools
+import bisect
+
+
+def _vagas(rng, distribuicao, minimo, maximo):
+    if distribuicao == 'uniforme':
+        return rng.randint(minimo, maximo)
+    # Geométrica com média ~ o dobro do mínimo, truncada no máximo
+    p = 1.0 / max(1.0, minimo + 1.0)
+    return min(maximo, minimo + int(math.log(1.0 - rng.random()) / math.log(1.0 - p)))
+
+
+def _nota(rng, distribuicao, minimo, maximo):
+    if distribuicao == 'uniforme':
+        return rng.randint(minimo, maximo)
+    media, desvio = (minimo + maximo) / 2, max(1e-9, (maximo - minimo) / 4)
+    return min(maximo, max(minimo, round(rng.gauss(media, desvio))))
+
+
+def escrever_instancia(caminho, n_alunos, n_projetos=None, vagas=(1, 3), distribuicao_vagas='uniforme',
+                       nota_minima=(3, 5), notas=(3, 5), distribuicao_notas='uniforme',
+                       preferencias=(3, 3), assimetria=0.0, rankings=0.0, seed=42):
+    # Escreve a instância e devolve (n_projetos, n_alunos)
+    rng = random.Random(seed)
+    if n_projetos is None:
+        n_projetos = max(1, n_alunos // 4)
+    # Popularidade: projeto de posição k (em ordem aleatória) tem peso 1 / k^assimetria
+    ordem = list(range(1, n_projetos + 1))
+    rng.shuffle(ordem)
+    acumulado = list(itertools.accumulate(1.0 / (k ** assimetria) for k in range(1, n_projetos + 1)))
+    total = acumulado[-1]
+
+    def sortear_projeto():
+        return ordem[min(bisect.bisect(acumulado, rng.random() * total), n_projetos - 1)]
+
+    # Projetos com ranking próprio -> alunos que os escolheram
+    interessados = {p: [] for p in range(1, n_projetos + 1) if rng.random() < rankings}
+
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(f'// instância sintética: {n_alunos} alunos, {n_projetos} projetos, seed {seed}\n')
+        for i in range(1, n_projetos + 1):
+            f.write(f"(P{i}, {_vagas(rng, distribuicao_vagas, *vagas)}, {rng.randint(*nota_minima)})\n")
+        f.write('\n// alunos\n')
+        for i in range(1, n_alunos + 1):
+            tamanho = min(rng.randint(*preferencias), n_projetos)
+            escolhidos = []
+            while len(escolhidos) < tamanho:
+                p = sortear_projeto()
+                if p not in escolhidos:
+                    escolhidos.append(p)
+            prefs = ', '.join(f"P{p}" for p in escolhidos)
+            f.write(f"(A{i}):({prefs}) ({_nota(rng, distribuicao_notas, *notas)})\n")
+            for p in escolhidos:
+                if p in interessados:
+                    interessados[p].append(i)
+        if interessados:
+            f.write('\n// rankings dos projetos\n')
+        for p, alunos in interessados.items():
+            rng.shuffle(alunos)
+            f.write(f"(P{p}):({', '.join(f'A{a}' for a in alunos)})\n")
+    return n_projetos, n_alunos
+
+
+def main_gerador():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('saida')
+    parser.add_argument('--alunos', type=int, default=10_000)
+    parser.add_argument('--projetos', type=int, default=None, help='padrão: alunos / 4')
+    parser.add_argument('--vagas', type=int, nargs=2, default=(1, 3), metavar=('MIN', 'MAX'))
+    parser.add_argument('--vagas-dist', choices=('uniforme', 'geometrica'), default='uniforme')
+    parser.add_argument('--nota-minima', type=int, nargs=2, default=(3, 5), metavar=('MIN', 'MAX'))
+    parser.add_argument('--notas', type=int, nargs=2, default=(3, 5), metavar=('MIN', 'MAX'))
+    parser.add_argument('--notas-dist', choices=('uniforme', 'normal'), default='uniforme')
+    parser.add_argument('--preferencias', type=int, nargs=2, default=(3, 3), metavar=('MIN', 'MAX'))
+    parser.add_argument('--assimetria', type=float, default=0.0,
+                        help='expoente de Zipf da popularidade dos projetos (0 = uniforme)')
+    parser.add_argument('--rankings', type=float, default=0.0,
+                        help='fração dos projetos com ranking próprio dos alunos (0 = todos por nota)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    n_projetos, n_alunos = escrever_instancia(
+        args.saida, args.alunos, args.projetos, tuple(args.vagas), args.vagas_dist,
+        tuple(args.nota_minima), tuple(args.notas), args.notas_dist, tuple(args.preferencias),
+        args.assimetria, args.rankings, args.seed)
+    tamanho = os.path.getsize(args.saida) / 2**20
+    print(f"'{args.saida}': {n_projetos} projetos, {n_alunos} alunos ({tamanho:.1f} MiB).")
+
+
+if __name__ == '__main__':
+    main_gerador()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Varredura de vagas e notas mínimas sobre uma coorte, com partida a quente
+(`executar_varredura`): cada ponto parte do emparelhamento estável do ponto anterior.
+
+Cada parâmetro aceita valores avulsos e faixas INICIO:FIM:PASSO (FIM incluso); a grade é
+o produto cartesiano. As métricas de todos os pontos (alocação, ocupação, alunos por
+opção `rank_k`, mudanças em relação ao passo anterior e tempo do passo) vão para uma
+única tabela, na ordem da grade.
+
+Uso:
+  python scripts/varredura_parametros.py entrada.txt --escala-vagas 0.5:1.5:0.01 --delta-nota-minima -4:5:1
+  python scripts/varredura_parametros.py entrada.txt --delta-vagas 0 1 2 --projetos P1 P7 --verificar
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+
+# Faixa com início negativo ("-4:5:1"): o argparse só aceita como valor o que parece um
+# número negativo simples e trataria o resto como opção desconhecida
+_RE_FAIXA_NEGATIVA = re.compile(r'-\d*\.?\d+:')
+
+
+def proteger_faixas(argv):
+    # Um espaço à frente tira a faixa do caminho das opções; converter() o descarta
+    return [' ' + arg if _RE_FAIXA_NEGATIVA.match(arg) else arg for arg in argv]
+
+
+def valores_parametro(tipo):
+    # Converte "v" ou "inicio:fim:passo" em uma lista de valores do tipo dado
+    def converter(texto):
+        texto = texto.strip()
+        partes = texto.split(':')
+        if len(partes) == 1:
+            return [tipo(texto)]
+        if len(partes) != 3:
+            raise argparse.ArgumentTypeError(f"faixa inválida {texto!r} (use INICIO:FIM:PASSO)")
+        inicio, fim, passo = (tipo(p) for p in partes)
+        if passo <= 0 or fim < inicio:
+            raise argparse.ArgumentTypeError(f"faixa inválida {texto!r} (PASSO > 0 e FIM >= INICIO)")
+        n = int(round((fim - inicio) / passo))
+        return [tipo(round(inicio + k * passo, 10)) for k in range(n + 1)]
+    return converter
+
+
+def main_varredura():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('entrada', help='arquivo de entrada da coorte')
+    parser.add_argument('--escala-vagas', type=valores_parametro(float), nargs='+')
+    parser.add_argument('--delta-vagas', type=valores_parametro(int), nargs='+')
+    parser.add_argument('--nota-minima', type=valores_parametro(int), nargs='+')
+    parser.add_argument('--delta-nota-minima', type=valores_parametro(int), nargs='+')
+    parser.add_argument('--projetos', nargs='+', help='códigos dos projetos ajustados (padrão: todos)')
+    parser.add_argument('--verificar', action='store_true', help='confere a estabilidade de cada ponto')
+    parser.add_argument('--saida', default=os.path.join('graficos', 'varredura'),
+                        help='caminho da tabela, sem extensão')
+    parser.add_argument('--formato', choices=main.FORMATOS_TABELA, default='csv')
+    args = parser.parse_args(proteger_faixas(sys.argv[1:]))
+
+    valores = {p: [v for lista in getattr(args, p) for v in lista]
+               for p in main.PARAMETROS_VARREDURA if getattr(args, p) is not None}
+    if not valores:
+        parser.error("informe ao menos um parâmetro de varredura")
+    inst = main.carregar_instancia_com_cache(args.entrada)
+    desconhecidos = [p for p in args.projetos or () if p not in inst.indice_projetos]
+    if desconhecidos:
+        parser.error(f"projetos inexistentes: {', '.join(desconhecidos)}")
+    if inst.ranking_explicito:
+        parser.error("a varredura a quente requer projetos ordenando por nota (sem rankings próprios)")
+    pontos = main.grade_varredura(**valores)
+
+    inicio = time.perf_counter()
+    df = main.executar_varredura(inst, pontos, projetos=args.projetos, verificar=args.verificar)
+    duracao = time.perf_counter() - inicio
+
+    pasta = os.path.dirname(args.saida)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    caminho = main.salvar_tabela(df, args.saida, args.formato)
+    print(f"{len(pontos)} pontos em {duracao:.2f} s ({duracao / len(pontos) * 1e3:.1f} ms/ponto); "
+          f"métricas salvas em '{caminho}'.")
+    if args.verificar:
+        instaveis = int((~df['estavel']).sum())
+        if instaveis:
+            print(f"Aviso: {instaveis} ponto(s) com pares bloqueadores.")
+
+
+if __name__ == '__main__':
+    main_varredura()
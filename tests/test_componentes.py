@@ -0,0 +1,57 @@
+"""MotorComponentes contra o motor global, para cada classe de motor."""
+import os
+import sys
+import contextlib
+import io
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+import main  # noqa: E402
+from gerar_instancia import escrever_instancia  # noqa: E402
+
+MOTORES = [
+    (main.MotorGaleShapley, {}),
+    (main.MotorGaleShapley, {'por_ranking': True}),
+    (main.MotorGaleShapleyProjetos, {}),
+    (main.MotorKiraly, {}),
+]
+
+
+def carregar(caminho):
+    with contextlib.redirect_stdout(io.StringIO()):
+        inst = main.carregar_instancia(caminho)
+        main.filtrar_instancia(inst)
+    return inst
+
+
+def instancia_aleatoria(caminho, seed):
+    # Muitos projetos por aluno e notas com empates: vários componentes pequenos
+    escrever_instancia(caminho, 300, 150, vagas=(0, 3), nota_minima=(0, 6), notas=(0, 9),
+                       preferencias=(1, 3), rankings=0.3 * (seed % 2), seed=seed)
+    return carregar(caminho)
+
+
+def comparar(inst, classe, opcoes, processos):
+    motor = classe(inst, registrar=False, **opcoes)
+    motor.executar()
+    componentes = main.MotorComponentes(inst, registrar=False, classe=classe, processos=processos, **opcoes)
+    componentes.executar()
+    assert len(componentes.componentes) > 1
+    assert list(componentes.alocacao) == list(motor.alocacao)
+    # Componentes independentes: as mesmas propostas, só intercaladas de outro jeito
+    assert componentes.propostas == motor.propostas
+
+
+@pytest.mark.parametrize('classe, opcoes', MOTORES)
+@pytest.mark.parametrize('seed', range(6))
+def test_componentes_igual_motor_global(tmp_path, classe, opcoes, seed):
+    inst = instancia_aleatoria(str(tmp_path / 'entrada.txt'), seed)
+    comparar(inst, classe, opcoes, processos=1)
+
+
+@pytest.mark.parametrize('classe, opcoes', MOTORES)
+def test_componentes_em_processos(tmp_path, classe, opcoes):
+    # Mesmo resultado com os componentes distribuídos em um pool de processos
+    comparar(instancia_aleatoria(str(tmp_path / 'entrada.txt'), 1), classe, opcoes, processos=2)
@@ -0,0 +1,59 @@
+"""Filtragem da instância compacta: versão vetorizada (NumPy) contra o laço em Python."""
+import os
+import sys
+import random
+import contextlib
+import io
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+
+ENTRADA = os.path.join(os.path.dirname(__file__), '..', 'entradaProj2.txt')
+
+
+def escrever_instancia_aleatoria(caminho, rng):
+    # Notas mínimas e notas na mesma faixa (muitas remoções por nota), projetos
+    # inexistentes nas listas e alunos sem preferências
+    n_projetos = rng.randint(1, 20)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for p in range(1, n_projetos + 1):
+            f.write(f"(P{p}, {rng.randint(0, 3)}, {rng.randint(0, 9)})\n")
+        for a in range(1, rng.randint(0, 80) + 1):
+            prefs = [f"P{rng.randint(1, n_projetos + 5)}" for _ in range(rng.randint(0, main.MAX_PREFERENCES))]
+            f.write(f"(A{a}):({', '.join(prefs)}) ({rng.randint(0, 9)})\n")
+
+
+def filtrar(inst, usar_numpy):
+    with contextlib.redirect_stdout(io.StringIO()):
+        remocoes = main.filtrar_instancia(inst, usar_numpy=usar_numpy)
+    return remocoes, list(inst.pref_inicio), list(inst.pref_projeto), list(inst.pref_posicao)
+
+
+def comparar(caminho):
+    with contextlib.redirect_stdout(io.StringIO()):
+        inst = main.carregar_instancia(caminho)
+    vetorizada = filtrar(inst, usar_numpy=True)
+    assert filtrar(inst, usar_numpy=False) == vetorizada
+    # Contagem por motivo também igual
+    assert main._filtrar_instancia_numpy(inst)[3:] == main._filtrar_instancia_python(inst)[3:]
+    return inst
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_filtragem_numpy_igual_python(tmp_path, seed):
+    caminho = str(tmp_path / 'entrada.txt')
+    escrever_instancia_aleatoria(caminho, random.Random(seed))
+    inst = comparar(caminho)
+    # Cada preferência mantida existe e aceita a nota do aluno, na ordem da lista original
+    for a in range(inst.n_alunos):
+        inicio = inst.orig_inicio[a]
+        for j in range(inst.pref_inicio[a], inst.pref_inicio[a + 1]):
+            p = inst.pref_projeto[j]
+            assert p >= 0 and inst.nota[a] >= inst.nota_minima[p]
+            assert inst.orig_projeto[inicio + inst.pref_posicao[j]] == p
+
+
+def test_filtragem_entrada_exemplo():
+    comparar(ENTRADA)
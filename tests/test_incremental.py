@@ -0,0 +1,37 @@
+"""Reemparelhamento incremental contra uma execução completa da instância editada."""
+import os
+import sys
+import random
+import contextlib
+import io
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+import main  # noqa: E402
+from benchmark_incremental import gerar_instancia, gerar_edicoes, execucao_completa, alocacao  # noqa: E402
+
+
+@pytest.mark.parametrize('empates', [False, True], ids=['notas_distintas', 'notas_empatadas'])
+@pytest.mark.parametrize('seed', range(20))
+def test_incremental_igual_execucao_completa(seed, empates):
+    rng = random.Random(seed)
+    n = rng.randint(40, 160)
+    projetos, alunos = gerar_instancia(n, rng, empates)
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.filtrar_preferencias(projetos, alunos)
+    # Emparelhamento inicial com o desempate padrão (ordem de chegada): com empates, o
+    # reemparelhamento o refaz pela ordem de leitura
+    main.executar_gale_shapley(projetos, alunos)
+    incremental = main.ReemparelhamentoIncremental(projetos, alunos)
+    assert incremental.por_ranking
+    assert alocacao(alunos) == alocacao(execucao_completa(projetos, alunos)[1])
+
+    notas_usadas = {aluno.nota for aluno in alunos.values()}
+    proximo = n + 1
+    for _ in range(8):
+        edicoes, proximo = gerar_edicoes(rng.randint(1, 4), projetos, alunos, rng, notas_usadas, proximo, empates)
+        with contextlib.redirect_stdout(io.StringIO()):
+            incremental.aplicar(edicoes)
+        assert alocacao(alunos) == alocacao(execucao_completa(projetos, alunos)[1]), edicoes
@@ -0,0 +1,84 @@
+"""Reticulado dos emparelhamentos estáveis contra força bruta em instâncias pequenas."""
+import os
+import sys
+import random
+import itertools
+import contextlib
+import io
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+
+N_MAXIMO = 5
+
+
+def escrever_instancia_pequena(caminho, rng):
+    # Até N_MAXIMO alunos e projetos, listas completas e rankings próprios aleatórios:
+    # mercado apertado, com vários emparelhamentos estáveis. Às vezes um projeto com duas
+    # vagas ou um ranking sem um aluno (que vem depois dos listados, por nota)
+    n_alunos = rng.randint(3, N_MAXIMO)
+    n_projetos = rng.choice((n_alunos - 1, n_alunos))
+    alunos = [f"A{i}" for i in range(1, n_alunos + 1)]
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for p in range(1, n_projetos + 1):
+            f.write(f"(P{p}, {2 if rng.random() < 0.1 else 1}, 0)\n")
+        for a in alunos:
+            prefs = rng.sample(range(1, n_projetos + 1), n_projetos)
+            f.write(f"({a}):({', '.join(f'P{p}' for p in prefs)}) ({rng.randint(0, 9)})\n")
+        for p in range(1, n_projetos + 1):
+            ranking = rng.sample(alunos, n_alunos - (rng.random() < 0.2))
+            f.write(f"(P{p}):({', '.join(ranking)})\n")
+
+
+def instancia_pequena(caminho, seed):
+    # O ranking estrito de cada projeto é o de inst.candidatos(p)
+    escrever_instancia_pequena(caminho, random.Random(seed))
+    with contextlib.redirect_stdout(io.StringIO()):
+        inst = main.carregar_instancia(caminho)
+        main.filtrar_instancia(inst)
+    main.indexar_candidatos(inst)
+    return inst
+
+
+def estavel(inst, alocacao):
+    # Definição: nenhum aluno prefere um projeto com vaga livre, ou que o prefere a algum
+    # dos seus alocados
+    for a in range(inst.n_alunos):
+        for p in inst.preferencias(a):
+            if p == alocacao[a]:
+                break
+            membros = [b for b in range(inst.n_alunos) if alocacao[b] == p]
+            ranking = list(inst.candidatos(p))
+            if len(membros) < inst.vagas[p] or any(ranking.index(a) < ranking.index(b) for b in membros):
+                return False
+    return True
+
+
+def estaveis_forca_bruta(inst):
+    # Todas as alocações viáveis (cada aluno em uma preferência filtrada ou sem projeto,
+    # sem estourar vagas) que são estáveis
+    opcoes = [list(inst.preferencias(a)) + [-1] for a in range(inst.n_alunos)]
+    encontrados = set()
+    for alocacao in itertools.product(*opcoes):
+        if all(alocacao.count(p) <= inst.vagas[p] for p in range(inst.n_projetos)) and estavel(inst, alocacao):
+            encontrados.add(alocacao)
+    return encontrados
+
+
+@pytest.mark.parametrize('seed', range(80))
+def test_reticulado_igual_forca_bruta(tmp_path, monkeypatch, seed):
+    monkeypatch.setattr(main, 'MAX_PREFERENCES', N_MAXIMO)
+    inst = instancia_pequena(str(tmp_path / 'entrada.txt'), seed)
+    assert inst.ranking_explicito
+    reticulado = main.ReticuladoEstavel(inst)
+    gerados = [tuple(alocacao) for alocacao in reticulado.emparelhamentos()]
+    # Cada emparelhamento estável exatamente uma vez
+    assert len(gerados) == len(set(gerados))
+    assert set(gerados) == estaveis_forca_bruta(inst)
+    # Extremos: ótimo dos alunos primeiro; o ótimo dos projetos também está no reticulado
+    motor = main.MotorGaleShapleyProjetos(inst, registrar=False)
+    motor.executar()
+    assert gerados[0] == tuple(reticulado.otimo_alunos)
+    assert tuple(motor.alocacao) in set(gerados)
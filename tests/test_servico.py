@@ -0,0 +1,97 @@
+"""Consultas /cenario do serviço local contra execuções completas da instância editada."""
+import os
+import sys
+import random
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main  # noqa: E402
+
+ENTRADA = os.path.join(os.path.dirname(__file__), '..', 'entradaProj2.txt')
+
+
+@pytest.fixture(scope='module')
+def servico():
+    with contextlib.redirect_stdout(io.StringIO()):
+        inst = main.carregar_instancia(ENTRADA)
+        main.filtrar_instancia(inst)
+    servico = main.ServicoEmparelhamento(inst)
+    yield servico
+    servico.encerrar()
+
+
+def execucao_completa(inst, corpo):
+    # Aplica o cenário sobre os valores base e roda o motor do zero (mesmo desempate
+    # estrito por ordem de leitura), devolvendo {aluno: projeto ou None}
+    vagas = inst.visao_numpy('vagas').astype(np.int64)
+    nota_minima = inst.visao_numpy('nota_minima').astype(np.int64)
+    nota = inst.visao_numpy('nota').astype(np.int64)
+    for p, v in corpo.get('vagas', {}).items():
+        vagas[inst.indice_projetos[p]] = v
+    for p, d in corpo.get('delta_vagas', {}).items():
+        vagas[inst.indice_projetos[p]] = max(0, vagas[inst.indice_projetos[p]] + d)
+    for p, n in corpo.get('nota_minima', {}).items():
+        nota_minima[inst.indice_projetos[p]] = n
+    for a, n in corpo.get('nota', {}).items():
+        nota[inst.codigos_alunos.index(a)] = n
+    atual = main.InstanciaCompacta(inst.codigos_projetos, main._array_intc(vagas), main._array_intc(nota_minima),
+                                   inst.codigos_alunos, main._array_intc(nota), inst.orig_inicio, inst.orig_projeto)
+    atual.pref_inicio, atual.pref_projeto, atual.pref_posicao, _, _ = main._filtrar_instancia_numpy(atual)
+    motor = main.MotorGaleShapley(atual, registrar=False, por_ranking=True)
+    motor.executar()
+    return {inst.codigos_alunos[a]: (inst.codigos_projetos[p] if p >= 0 else None)
+            for a, p in enumerate(motor.alocacao)}
+
+
+def cenario_aleatorio(rng, inst):
+    projetos = lambda k: rng.sample(list(inst.codigos_projetos), k)  # noqa: E731
+    corpo = {'todos': True, 'verificar': True}
+    tipo = rng.randrange(4)
+    if tipo == 0:
+        corpo['vagas'] = {p: rng.randint(0, 4) for p in projetos(rng.randint(1, 3))}
+    elif tipo == 1:
+        corpo['delta_vagas'] = {p: rng.randint(-2, 2) for p in projetos(rng.randint(1, 3))}
+    elif tipo == 2:
+        corpo['nota_minima'] = {p: rng.randint(0, 9) for p in projetos(rng.randint(1, 3))}
+    else:
+        corpo['nota'] = {a: rng.randint(0, 9) for a in rng.sample(list(inst.codigos_alunos), rng.randint(1, 3))}
+    return corpo
+
+
+def test_emparelhar_igual_execucao_completa(servico):
+    resposta = servico.consultar('emparelhar', {'todos': True})
+    assert resposta['alunos'] == execucao_completa(servico.instancia, {})
+
+
+def test_cenario_igual_execucao_completa(servico):
+    rng = random.Random(7)
+    inst = servico.instancia
+    for _ in range(300):
+        corpo = cenario_aleatorio(rng, inst)
+        resposta = servico.consultar('cenario', corpo)
+        assert resposta['estavel'], corpo
+        assert resposta['alunos'] == execucao_completa(inst, corpo), corpo
+    # As simulações não alteram o estado do serviço
+    assert servico.consultar('emparelhar', {'todos': True})['alunos'] == execucao_completa(inst, {})
+
+
+@pytest.mark.parametrize('rota, corpo', [
+    ('cenario', {'vagas': {'P1': -3}}),
+    ('cenario', {'vagas': ['P1']}),
+    ('cenario', {'delta_vagas': {'P1': 'x'}}),
+    ('cenario', {'alunos': 'A1'}),
+    ('cenario', {'nota': {'A_inexistente': 5}}),
+    ('verificar', {'alocacao': [['A1', 'P1']]}),
+    ('verificar', {'alocacao': {'A1': ['P1']}}),
+    ('emparelhar', {'alunos': 7}),
+])
+def test_consulta_invalida(servico, rota, corpo):
+    # Consultas malformadas viram ErroConsulta (HTTP 400) e não alteram o estado
+    antes = servico.consultar('emparelhar', {'todos': True})
+    with pytest.raises(main.ErroConsulta):
+        servico.consultar(rota, corpo)
+    assert servico.consultar('emparelhar', {'todos': True}) == antes